@@ -1,15 +1,31 @@
 from playwright.sync_api import sync_playwright, expect
-import time
 import os
 import sys
 import uuid
-import json
 import re
 import urllib.parse
 
+from harness import ui
+from harness.conditions import (
+    IDLE, expect_lesson_saved, wait_for_editor_idle, wait_for_join_result, wait_for_lesson_id,
+    wait_for_lit_update,
+)
+from harness.browser_pool import ContextPool, shared_browser
+from harness.fastmode import FAST_MODE
+from harness.fixtures import baseline_from_env
+from harness.login import open_persona
+from harness.matrix import run_matrix
+from harness.trace import TRACE, span
+from harness.ui import (
+    UI_TIMINGS, check_empty_save, configure, create_group, log,
+    safe_click, safe_fill, sign_in_professor, input_comic, input_flashcards, input_mindmap, input_post, input_presentation,
+    input_test, input_text, input_video,
+)
+
 # Ensure screenshots directory exists
 SCREENSHOT_DIR = "screenshots"
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+configure(screenshot_dir=SCREENSHOT_DIR)
 
 # Generate unique professor email to ensure clean state in emulators
 PROFESSOR_EMAIL = f"profesor_{uuid.uuid4().hex[:8]}@profesor.cz"
@@ -39,169 +55,6 @@ CONTENT_TYPES = [
 LESSON_IDS = {}
 GROUP_CODE = ""
 
-def log(msg):
-    print(f"[TEST] {msg}")
-
-# --- Helper Functions ---
-
-def safe_click(page, selector, timeout=15000):
-    log(f"Clicking: {selector}")
-    try:
-        page.click(selector, timeout=timeout)
-        return
-    except Exception as e:
-        log(f"Standard click failed for {selector}: {e}. Retrying with force=True...")
-
-    try:
-        page.locator(selector).first.click(force=True, timeout=timeout)
-        return
-    except Exception as e:
-        log(f"Force click failed for {selector}: {e}. Retrying with JS evaluation...")
-
-    try:
-        page.locator(selector).first.evaluate("el => el.click()")
-    except Exception as e:
-        log(f"JS click failed for {selector}: {e}")
-        page.screenshot(path=f"{SCREENSHOT_DIR}/click_fail_{uuid.uuid4().hex[:4]}.png")
-        raise e
-
-def safe_fill(page, selector, value, timeout=5000):
-    log(f"Filling: {selector}")
-    try:
-        page.fill(selector, value, timeout=timeout)
-    except Exception as e:
-        log(f"Standard fill failed for {selector}: {e}. Retrying with force...")
-        try:
-             page.locator(selector).first.fill(value, force=True, timeout=timeout)
-        except Exception as e2:
-             log(f"Force fill failed for {selector}: {e2}. Attempting JS value set...")
-             try:
-                 page.locator(selector).first.evaluate(f"(el, val) => {{ el.value = val; el.dispatchEvent(new Event('input', {{ bubbles: true, composed: true }})); }}", value)
-             except Exception as e3:
-                 log(f"JS fill failed: {e3}")
-                 raise e2
-
-def safe_fill_and_trigger(page, selector, value):
-    """
-    Fills an input and forces DOM events via JS evaluation to ensure LitElement/Frameworks detect the change.
-    Bypasses Playwright's dispatch_event API version issues and correctly passes value as arg.
-    Uses type with delay for robust input in high latency environments.
-    """
-    log(f"Typing into: {selector}")
-    try:
-        # Click to focus first
-        page.locator(selector).first.click()
-        # Clear first (fill clears the field)
-        page.locator(selector).first.fill("")
-        # Type with delay to simulate human and trigger events
-        page.locator(selector).first.type(value, delay=100)
-    except Exception as e:
-        log(f"Type failed for {selector}: {e}. Fallback to safe_fill...")
-        safe_fill(page, selector, value)
-
-    log(f"Triggering events for: {selector}")
-    try:
-        page.locator(selector).first.evaluate("""(el, val) => {
-            el.value = val;
-            el.dispatchEvent(new Event('input', { bubbles: true, composed: true }));
-            el.dispatchEvent(new Event('change', { bubbles: true, composed: true }));
-        }""", value)
-    except Exception as e:
-        log(f"safe_fill_and_trigger evaluate failed: {e}")
-
-def login_professor(page):
-    log("Registering/Logging in Professor...")
-    page.goto(f"{BASE_URL}/")
-    time.sleep(2)
-
-    if page.locator("text='Jsem Profesor'").is_visible():
-        safe_click(page, "button:has-text('Jsem Profesor')")
-
-    try:
-        log("Switching to Registration mode...")
-        safe_click(page, "a:has-text('Registrujte se')")
-        page.wait_for_selector("#register-name", state="visible", timeout=5000)
-    except Exception as e:
-        log(f"Registration switch failed: {e}")
-
-    log(f"Registering as {PROFESSOR_EMAIL}...")
-    safe_fill(page, "#register-name", PROFESSOR_NAME)
-    safe_fill(page, "#register-email", PROFESSOR_EMAIL)
-    safe_fill(page, "#register-password", PROFESSOR_PASSWORD)
-
-    log("Submitting registration...")
-    page.keyboard.press("Enter")
-
-    log("Waiting for global spinner to disappear...")
-    try:
-        page.wait_for_selector("#global-spinner", state="hidden", timeout=20000)
-    except Exception as e:
-        log(f"Spinner wait warning: {e}")
-
-    log("Waiting for Dashboard...")
-    try:
-        expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=30000)
-    except:
-        log("Dashboard not visible immediately. Trying force navigation fallback...")
-        if page.locator("#register-name").is_visible():
-            safe_click(page, "button:has-text('Registrovat se')")
-            page.wait_for_timeout(2000)
-        page.reload()
-        expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=40000)
-
-    log("Professor registered/logged in.")
-
-def create_group(page):
-    global GROUP_CODE
-    log("Creating Group...")
-
-    try:
-        safe_click(page, "professor-navigation button:has-text('Třídy')")
-    except:
-        safe_click(page, "professor-navigation button:has-text('Classes')")
-
-    expect(page.locator("professor-classes-view")).to_be_visible()
-
-    safe_click(page, "button:has-text('Vytvořit novou třídu')")
-
-    group_name = f"QA Group {uuid.uuid4().hex[:4]}"
-    modal_input_selector = "div.fixed.inset-0 input[type='text']"
-
-    page.wait_for_selector(modal_input_selector, state="visible", timeout=5000)
-    safe_fill(page, modal_input_selector, group_name)
-
-    safe_click(page, "div.fixed.inset-0 button:has-text('Uložit')")
-
-    time.sleep(2)
-
-    card_selector = f".bg-white:has-text('{group_name}')"
-    try:
-        expect(page.locator(card_selector)).to_be_visible(timeout=10000)
-    except:
-        log("Card not found immediately. Reloading...")
-        page.reload()
-        safe_click(page, "professor-navigation button:has-text('Třídy')")
-        expect(page.locator(card_selector)).to_be_visible()
-
-    card = page.locator(card_selector).first
-    try:
-        code_el = card.locator("code")
-        if code_el.count() > 0:
-            GROUP_CODE = code_el.inner_text().strip()
-            log(f"Group created: {group_name}, Code: {GROUP_CODE}")
-        else:
-            text = card.inner_text()
-            match = re.search(r"Kód:\s*([A-Z0-9]+)", text)
-            if match:
-                GROUP_CODE = match.group(1)
-                log(f"Group created: {group_name}, Code: {GROUP_CODE} (via Regex)")
-            else:
-                raise Exception("Could not extract group code")
-    except Exception as e:
-        log(f"Failed to get group code: {e}")
-        page.screenshot(path=f"{SCREENSHOT_DIR}/group_code_fail.png")
-        raise e
-
 def create_lesson(page, content_type_def):
     c_type = content_type_def['type']
     c_name = content_type_def['name']
@@ -209,7 +62,7 @@ def create_lesson(page, content_type_def):
     log(f"Creating lesson for {c_name}...")
 
     safe_click(page, "professor-navigation button:has-text('Nástěnka')")
-    time.sleep(1)
+    wait_for_lit_update(page, "professor-dashboard-view")
 
     safe_click(page, "text='Vytvořit manuálně'")
 
@@ -251,8 +104,8 @@ def create_lesson(page, content_type_def):
     input_fn_name = content_type_def['manual_input_fn']
     globals()[input_fn_name](page)
 
-    safe_click(page, "professor-header-editor button:has-text('Uložit změny')")
-    time.sleep(2)
+    with expect_lesson_saved(page):
+        safe_click(page, "professor-header-editor button:has-text('Uložit změny')")
 
     safe_click(page, "professor-header-editor button")
 
@@ -265,7 +118,7 @@ def create_lesson(page, content_type_def):
              checkbox = checkbox_label.locator("input[type='checkbox']")
              if not checkbox.is_checked():
                  checkbox.check()
-                 time.sleep(1)
+                 wait_for_editor_idle(page)
         else:
             log("Group assignment checkbox not found!")
     except Exception as e:
@@ -292,316 +145,149 @@ def create_lesson(page, content_type_def):
         if not lid:
             log("[DEBUG] URL extraction failed. Attempting EXACT DOM extraction paths...")
 
-            # 1. Primary (Lesson Editor) - currentLessonId - RETRY LOOP
-            for attempt in range(5):
-                try:
-                    lid = page.evaluate("document.querySelector('lesson-editor')?.currentLessonId")
-                    if lid:
-                        log(f"[DEBUG] Found ID in Lesson Editor: {lid}")
-                        break
-                except Exception as e:
-                    log(f"[DEBUG] DOM Path 1 failed (Attempt {attempt+1}): {e}")
-                time.sleep(2)
-
-            # 2. Secondary (Header Lesson Object) - lesson.id
-            if not lid:
-                try:
-                    lid = page.evaluate("document.querySelector('professor-header-editor')?.lesson?.id")
-                    if lid:
-                        log(f"[DEBUG] Found ID in Header (id): {lid}")
-                except Exception as e:
-                    log(f"[DEBUG] DOM Path 2 failed: {e}")
-
-            # 3. Tertiary (Header Lesson Object - Alternative) - lesson.uid
-            if not lid:
-                try:
-                    lid = page.evaluate("document.querySelector('professor-header-editor')?.lesson?.uid")
-                    if lid:
-                        log(f"[DEBUG] Found ID in Header (uid): {lid}")
-                except Exception as e:
-                    log(f"[DEBUG] DOM Path 3 failed: {e}")
+            # Editor state (lesson-editor.lesson.id, header lesson id/uid) as soon as it is known
+            try:
+                lid = wait_for_lesson_id(page)
+                log(f"[DEBUG] Found ID in editor state: {lid}")
+            except Exception as e:
+                log(f"[DEBUG] DOM extraction failed: {e}")
 
         if lid:
-            LESSON_IDS[c_type] = lid
-        else:
-            log(f"Could not extract Lesson ID from URL or DOM: {url}")
+            return lid
+        log(f"Could not extract Lesson ID from URL or DOM: {url}")
 
     except Exception as e:
         log(f"Error extracting lesson ID: {e}")
 
-def run_student_phase(p, headless=True):
-    log("Starting Student Phase...")
-    browser = p.chromium.launch(headless=headless, args=['--no-sandbox'])
-    page = browser.new_page()
-
-    page.goto(f"{BASE_URL}/")
-    time.sleep(2)
-
-    if page.locator("text='Jsem Student'").is_visible():
-        safe_click(page, "text='Jsem Student'")
-
-    if page.locator("text='Registrujte se'").is_visible():
-         safe_click(page, "text='Registrujte se'")
-
-    safe_fill(page, "#register-email", STUDENT_EMAIL)
-    safe_fill(page, "#register-password", STUDENT_PASSWORD)
-    safe_fill(page, "#register-name", STUDENT_NAME)
+def build_lesson(page, content_type_def):
+    """Matrix task: runs in its own context, pre-authenticated from the professor's storage state."""
+    sign_in_professor(page, PROFESSOR_EMAIL, PROFESSOR_PASSWORD)
+    with span("create_lesson", key=content_type_def['type']):
+        return create_lesson(page, content_type_def)
 
-    page.keyboard.press("Enter")
-
-    try:
-        expect(page.locator("student-dashboard")).to_be_visible(timeout=20000)
-    except:
-        safe_click(page, "button:has-text('Registrovat se')")
-        expect(page.locator("student-dashboard")).to_be_visible(timeout=20000)
-
-    log("Student logged in.")
-    time.sleep(2)
+def screenshot_lesson_error(page, content_type_def, error):
+    log(f"Error creating/verifying {content_type_def['name']}: {error}")
+    page.screenshot(path=f"{SCREENSHOT_DIR}/error_{content_type_def['type']}.png")
 
+@span("student_phase")
+def run_student_phase(pool):
+    log("Starting Student Phase...")
+    context, page = open_persona(pool.browser, "student", STUDENT_EMAIL, STUDENT_PASSWORD, STUDENT_NAME, pool=pool)
     try:
-        safe_click(page, "div.cursor-pointer:has-text('Připojit se k třídě')")
-    except:
-        safe_click(page, "button:has-text('Třídy')")
-        safe_click(page, "button:has-text('Připojit se k třídě')")
-
-    safe_fill(page, "input[placeholder='CODE']", GROUP_CODE)
+        wait_for_lit_update(page, "student-dashboard")
 
-    safe_click(page, "button:has-text('Přidat se')")
+        with span("join_class"):
+            try:
+                safe_click(page, "div.cursor-pointer:has-text('Připojit se k třídě')")
+            except:
+                safe_click(page, "button:has-text('Třídy')")
+                safe_click(page, "button:has-text('Připojit se k třídě')")
 
-    time.sleep(3)
+            safe_fill(page, "input[placeholder='CODE']", GROUP_CODE)
 
-    failures = []
-    for c_type, lid in LESSON_IDS.items():
-        log(f"Verifying student view for {c_type} (ID: {lid})...")
-        page.goto(f"{BASE_URL}/?view=lesson&id={lid}")
-        time.sleep(3)
+            safe_click(page, "button:has-text('Přidat se')")
 
-        try:
-            expect(page.locator("student-lesson-detail")).to_be_visible(timeout=10000)
-            if c_type == "text":
-                expect(page.locator(".prose")).to_be_visible()
-            log(f"Student View OK for {c_type}")
-        except Exception as e:
-            log(f"Student View FAILED for {c_type}: {e}")
-            page.screenshot(path=f"{SCREENSHOT_DIR}/fail_student_{c_type}.png")
-            failures.append(c_type)
+            joined, error = wait_for_join_result(page)
+        if not joined:
+            raise Exception(f"Joining group {GROUP_CODE} failed: {error}")
 
-    if failures:
-        raise Exception(f"Student verification failed for: {', '.join(failures)}")
+        failures = []
+        for c_type, lid in LESSON_IDS.items():
+            log(f"Verifying student view for {c_type} (ID: {lid})...")
+            try:
+                with span("student_view", key=c_type):
+                    page.goto(f"{BASE_URL}/?view=lesson&id={lid}")
+                    expect(page.locator("student-lesson-detail")).to_be_visible(timeout=10000)
+                    if c_type == "text":
+                        expect(page.locator(".prose")).to_be_visible()
+                log(f"Student View OK for {c_type}")
+            except Exception as e:
+                log(f"Student View FAILED for {c_type}: {e}")
+                page.screenshot(path=f"{SCREENSHOT_DIR}/fail_student_{c_type}.png")
+                failures.append(c_type)
 
-    browser.close()
+        if failures:
+            raise Exception(f"Student verification failed for: {', '.join(failures)}")
+    finally:
+        pool.release(context)
 
 # --- Input Helpers ---
-
-def input_text(page):
-    if page.locator("ai-generator-panel").is_visible():
-        safe_fill(page, "textarea#prompt-input", "Write a short paragraph about Testing.")
-        safe_click(page, "button:has-text('Generovat')")
-        expect(page.locator(".prose")).to_be_visible(timeout=30000)
-    else:
-        pass
-
-def input_presentation(page):
-    if page.locator("ai-generator-panel").is_visible():
-        if page.locator("#prompt-input-topic").count() > 0:
-             safe_fill(page, "#prompt-input-topic", "Space Exploration")
-        else:
-             safe_fill(page, "input[placeholder*='Klíčové momenty']", "Space Exploration")
-
-        safe_click(page, "button:has-text('Generovat')")
-        expect(page.locator(".bg-slate-50.relative").first).to_be_visible(timeout=30000)
+# The shared editor inputs come from harness.ui; quiz and audio add the empty-save negative check.
 
 def input_quiz(page):
-    # Step 1: Negative Test (Empty Quiz)
-    log("[TEST] Testing Empty Quiz Save...")
-    try:
-        # Check if button is disabled first
-        save_btn = page.locator("professor-header-editor button:has-text('Uložit změny')")
-        if save_btn.is_disabled():
-             log("[LOGIC CHECK] Empty Quiz save prevented: SUCCESS (Button Disabled)")
-        else:
-             # Try clicking
-             save_btn.click(timeout=2000)
-             page.wait_for_timeout(1000)
-             if page.locator("text='Změny úspěšně uloženy'").is_visible():
-                 log("[LOGIC FAILURE] Empty Quiz save succeeded!")
-             else:
-                 log("[LOGIC CHECK] Empty Quiz save prevented: SUCCESS (Toast/No-Action)")
-    except Exception as e:
-        log(f"[LOGIC CHECK] Error checking empty quiz save: {e}")
-
-    # Step 2: Correction & Positive Data Entry
-    log("Injecting Manual Quiz Data (Bypassing AI)...")
-    quiz_data = {
-        "questions": [
-            {
-                "question_text": "Manual Quiz Question 1",
-                "options": ["Option A", "Option B", "Option C", "Option D"],
-                "correct_option_index": 0,
-                "type": "Multiple Choice"
-            }
-        ]
-    }
-
-    data_json = json.dumps(quiz_data)
-
-    page.evaluate(f"""
-        const app = document.querySelector('lesson-editor');
-        if (app) {{
-            const newQuiz = {data_json};
-            app.lesson = {{ ...app.lesson, quiz: newQuiz }};
-            app.requestUpdate();
-        }}
-    """)
-
-    page.evaluate(f"""
-        const editor = document.querySelector('editor-view-quiz');
-        if (editor) {{
-            editor.dispatchEvent(new CustomEvent('lesson-updated', {{
-                detail: {data_json},
-                bubbles: true,
-                composed: true
-            }}));
-        }}
-    """)
-
-    try:
-        expect(page.locator("h4.text-green-700").first).to_be_visible(timeout=5000)
-    except:
-        log("Quiz update not visible immediately. Proceeding...")
-        pass
-
-def input_test(page):
-    safe_click(page, "button:has-text('Přidat otázku')")
-    page.wait_for_timeout(2000)
-    safe_fill(page, "input[placeholder*='Zformulujte otázku']", "Test Question 1")
-    opts = page.locator("input[placeholder*='Možnost']").all()
-    if len(opts) >= 2:
-        opts[0].fill("Option A")
-        opts[1].fill("Option B")
-
-def input_post(page):
-    safe_fill(page, "textarea", "Test Post Content")
-
-def input_video(page):
-    selector = "input[placeholder*='youtube.com']"
-    safe_fill_and_trigger(page, selector, "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
-
-    page.wait_for_timeout(2000)
-    page.click("body")
-    expect(page.locator("professor-header-editor button:has-text('Uložit změny')")).to_be_enabled(timeout=20000)
-
-def input_comic(page):
-    if page.locator("ai-generator-panel").is_visible():
-         safe_click(page, "button:has-text('✍️')")
-         page.wait_for_timeout(2000)
-         page.wait_for_selector("textarea", state="visible", timeout=10000)
-
-    safe_fill(page, "textarea[placeholder*='Co se děje na obrázku']", "Scene 1")
-    safe_fill(page, "textarea[placeholder*='Co postavy říkají']", "Hello")
-
-def input_flashcards(page):
-    safe_click(page, "button:has-text('Přidat kartu')")
-    page.wait_for_timeout(2000)
-
-    inputs_front = page.locator("input[placeholder*='Mitochondrie']").all()
-    if inputs_front:
-        last_front = inputs_front[-1]
-        # Use safe_fill_and_trigger logic but for locator context
-        last_front.fill("Front Test")
-        last_front.evaluate("""(el) => {
-            el.dispatchEvent(new Event('input', { bubbles: true, composed: true }));
-            el.dispatchEvent(new Event('change', { bubbles: true, composed: true }));
-        }""")
-
-    inputs_back = page.locator("textarea[placeholder*='Vysvětlení pojmu']").all()
-    if inputs_back:
-        last_back = inputs_back[-1]
-        last_back.fill("Back Test")
-        last_back.evaluate("""(el) => {
-            el.dispatchEvent(new Event('input', { bubbles: true, composed: true }));
-            el.dispatchEvent(new Event('change', { bubbles: true, composed: true }));
-        }""")
-
-def input_mindmap(page):
-    if page.locator("ai-generator-panel").is_visible():
-        safe_click(page, "button:has-text('Psát kód ručně')")
-        page.wait_for_timeout(2000) # Increased wait
-        page.wait_for_selector("textarea", state="visible", timeout=10000)
-
-    safe_fill(page, "textarea", "graph TD; A-->B;")
-    time.sleep(2)
+    check_empty_save(page, "Quiz")
+    ui.input_quiz(page)
 
 def input_audio(page):
-    # Step 1: Negative Test (Empty Audio)
-    log("[TEST] Testing Empty Audio Save...")
-    try:
-        save_btn = page.locator("professor-header-editor button:has-text('Uložit změny')")
-        if save_btn.is_disabled():
-             log("[LOGIC CHECK] Empty Podcast save prevented: SUCCESS (Button Disabled)")
-        else:
-             save_btn.click(timeout=2000)
-             page.wait_for_timeout(1000)
-             if page.locator("text='Změny úspěšně uloženy'").is_visible():
-                 log("[LOGIC FAILURE] Empty Podcast save succeeded!")
-             else:
-                 log("[LOGIC CHECK] Empty Podcast save prevented: SUCCESS (Toast/No-Action)")
-    except Exception as e:
-        log(f"[LOGIC CHECK] Error checking empty podcast save: {e}")
-
-    # Step 2: Correction
-    selector = "#script-editor"
-    if page.locator(selector).count() == 0:
-        selector = "textarea[placeholder*='[Alex]']"
-
-    safe_fill_and_trigger(page, selector, "Test Audio Script")
+    check_empty_save(page, "Podcast")
+    ui.input_audio(page)
 
 def run():
+    global GROUP_CODE, PROFESSOR_EMAIL, PROFESSOR_PASSWORD, STUDENT_EMAIL, STUDENT_PASSWORD
+    # Opt-in: reset the emulators to a named baseline (see harness/fixtures.py) and run the
+    # scenario as its seeded professor and student instead of the fresh personas above.
+    personas = baseline_from_env()
+    if "professor" in personas:
+        PROFESSOR_EMAIL, PROFESSOR_PASSWORD = personas["professor"]
+    if "student" in personas:
+        STUDENT_EMAIL, STUDENT_PASSWORD = personas["student"]
+
     has_error = False
+    professor_state = None
     with sync_playwright() as p:
         is_ci = os.environ.get('CI') == 'true'
-        browser = p.chromium.launch(headless=is_ci, args=['--no-sandbox'])
-        context = browser.new_context()
-        page = context.new_page()
-        # Generous timeout for Full Diagnostic
-        page.set_default_timeout(90000)
+        # One Chromium for every phase; the matrix workers attach to it over CDP.
+        with shared_browser(p, headless=is_ci) as (browser, endpoint):
+            # Fonts, analytics, YouTube and generated images are stubbed (HARNESS_FAST_MODE=0 for full fidelity).
+            pool = ContextPool(browser, setup=FAST_MODE.context_setup)
+            page = None
 
-        try:
-            login_professor(page)
-            create_group(page)
-
-            for ct in CONTENT_TYPES:
+            try:
+                # Signed in via the Auth emulator API (HARNESS_UI_LOGIN=1 registers through the UI instead)
+                context, page = open_persona(browser, "professor", PROFESSOR_EMAIL, PROFESSOR_PASSWORD, PROFESSOR_NAME,
+                                             pool=pool)
+                # Generous timeout for Full Diagnostic
+                page.set_default_timeout(90000)
+                _, GROUP_CODE = create_group(page)
+                # Firebase Auth keeps the session in IndexedDB; the matrix workers start from it.
+                professor_state = context.storage_state(indexed_db=True)
+                pool.release(context)
+            except Exception as e:
+                log(f"Critical Setup Error: {e}")
+                has_error = True
+                if page:
+                    page.screenshot(path=f"{SCREENSHOT_DIR}/critical_error.png")
+
+            if professor_state:
+                # Each content type gets its own page; HARNESS_WORKERS bounds the concurrency.
+                results = run_matrix(CONTENT_TYPES, build_lesson, key=lambda ct: ct['type'],
+                                     storage_state=professor_state, headless=is_ci, default_timeout=90000,
+                                     on_error=screenshot_lesson_error, endpoint=endpoint,
+                                     page_setup=lambda page, ct: FAST_MODE.apply(page, ct['type']))
+                for c_type, result in results.items():
+                    if not result.ok:
+                        has_error = True
+                    elif result.value:
+                        LESSON_IDS[c_type] = result.value
+
+            if GROUP_CODE and LESSON_IDS and not has_error:
                 try:
-                    create_lesson(page, ct)
+                    run_student_phase(pool)
                 except Exception as e:
-                    log(f"Error creating/verifying {ct['name']}: {e}")
-                    page.screenshot(path=f"{SCREENSHOT_DIR}/error_{ct['type']}.png")
+                    log(f"Student Phase Error: {e}")
                     has_error = True
+            else:
+                 if not (GROUP_CODE and LESSON_IDS):
+                     log("Skipping Student Phase - Missing Data")
+                     has_error = True
 
-                try:
-                    page.goto(f"{BASE_URL}/#dashboard")
-                    page.wait_for_timeout(2000)
-                except Exception as e:
-                    log(f"Warning: Failed to navigate back to dashboard: {e}")
-
-        except Exception as e:
-            log(f"Critical Setup Error: {e}")
-            has_error = True
-            page.screenshot(path=f"{SCREENSHOT_DIR}/critical_error.png")
-        finally:
-            browser.close()
-
-        if GROUP_CODE and LESSON_IDS and not has_error:
-            try:
-                run_student_phase(p, headless=is_ci)
-            except Exception as e:
-                log(f"Student Phase Error: {e}")
-                has_error = True
-        else:
-             if not (GROUP_CODE and LESSON_IDS):
-                 log("Skipping Student Phase - Missing Data")
-                 has_error = True
+            pool.report()
+            pool.close()
 
+    UI_TIMINGS.report("[UI]")
+    IDLE.report()
+    FAST_MODE.report()
+    TRACE.save()
     if has_error:
         sys.exit(1)
 
@@ -0,0 +1,18 @@
+"""
+Shared Python harness for the emulator verification scripts.
+
+The root-level verify_*/diagnostic scripts import their REST and browser
+helpers from here so that fixes land in one place instead of being pasted
+into every script.
+"""
+
+# Re-exported lazily: harness.emulator pulls in requests, and submodules such
+# as harness.ui are imported as `from harness import ui`.
+_EMULATOR_EXPORTS = ("API_KEY", "EMULATOR_HOST", "PROJECT_ID", "EmulatorClient", "get_client", "set_client")
+
+
+def __getattr__(name):
+    if name in _EMULATOR_EXPORTS:
+        from harness import emulator
+        return getattr(emulator, name)
+    raise AttributeError(f"module 'harness' has no attribute {name!r}")
@@ -0,0 +1,262 @@
+"""
+ID-token cache for emulator accounts.
+
+Sessions are keyed by email and persisted to .harness/tokens.json, so a
+known account costs no Auth round trip on the next run while its token is
+valid, and one securetoken refresh call once it has expired. The first use of
+an account signs in (or signs up when it does not exist yet).
+
+The Auth emulator forgets every account when it restarts, while the cache
+file survives. So the first cached token used in a process is checked with
+accounts:lookup; if the emulator no longer knows the account, every entry for
+that emulator is dropped and accounts are signed in (or up) again.
+
+An AuthSession can hand out an EmulatorClient that sends the user's ID token
+to Firestore, so REST checks run under real credentials against
+firestore.rules instead of the admin bypass:
+
+    session = get_session("janko@student.com", "password123")
+    rest_firestore_get("users", session.uid, client=session.client())
+"""
+
+import atexit
+import base64
+import json
+import os
+import threading
+import time
+
+from harness.emulator import STATE_DIR, get_client
+
+TOKEN_CACHE_PATH = os.environ.get("HARNESS_TOKEN_CACHE", os.path.join(STATE_DIR, "tokens.json"))
+
+# Refresh a little before expiry so a token never lapses mid-request.
+EXPIRY_SKEW = 60
+
+# Auth errors meaning the account behind a cached token is gone (emulator restarted or wiped).
+STALE_ACCOUNT_ERRORS = ("USER_NOT_FOUND", "INVALID_ID_TOKEN")
+
+
+class AuthError(Exception):
+    pass
+
+
+def _post_auth(client, endpoint, body):
+    r = client.post(f"{client.auth_url}/{endpoint}?key={client.api_key}", json=body)
+    if r.status_code != 200:
+        message = r.json().get("error", {}).get("message", r.text) if r.content else r.status_code
+        raise AuthError(f"{endpoint}: {message}")
+    return r.json()
+
+
+def _entry(uid, id_token, refresh_token, expires_in):
+    return {
+        "uid": uid,
+        "idToken": id_token,
+        "refreshToken": refresh_token,
+        "expiresAt": time.time() + int(expires_in),
+    }
+
+
+class TokenCache:
+    """Thread-safe email -> token entry map, persisted as JSON."""
+
+    def __init__(self, path=TOKEN_CACHE_PATH, client=None):
+        self.path = path
+        self.client = client
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._dirty = False
+        self._verified = set()   # emulator instances (project@host) whose cached tokens were checked
+        self.load()
+        atexit.register(self.save)
+
+    def _instance(self):
+        c = self.client or get_client()
+        return f"{c.project_id}@{c.host}"
+
+    def _key(self, email):
+        return f"{self._instance()}:{email.lower()}"
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def clear(self):
+        """Forget every account, e.g. after the Auth emulator was wiped."""
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
+            self.save()
+
+    def _drop_instance(self, instance):
+        """Forgets every account of one emulator instance."""
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if not k.startswith(f"{instance}:")}
+            self._dirty = True
+
+    def _verify(self, entry):
+        """
+        Once per process and emulator: checks that the account behind a cached
+        token still exists. Returns False (and drops that emulator's entries) if not.
+        """
+        instance = self._instance()
+        if entry["expiresAt"] - EXPIRY_SKEW <= time.time():
+            return True  # checked on a live token; an expired one is refreshed (or re-signed) anyway
+        with self._lock:
+            if instance in self._verified:
+                return True
+            try:
+                _post_auth(self.client or get_client(), "accounts:lookup", {"idToken": entry["idToken"]})
+            except AuthError as e:
+                if not any(code in str(e) for code in STALE_ACCOUNT_ERRORS):
+                    raise
+                print(f"[AUTH] Cached tokens for {instance} are stale (emulator restarted?), signing in again")
+                self._drop_instance(instance)
+                return False
+            finally:
+                self._verified.add(instance)
+            return True
+
+    def _store(self, email, entry):
+        with self._lock:
+            self._entries[self._key(email)] = entry
+            self._dirty = True
+
+    def _refresh(self, email, entry):
+        client = self.client or get_client()
+        r = client.post(
+            f"{client.securetoken_url}/token?key={client.api_key}",
+            data={"grant_type": "refresh_token", "refresh_token": entry["refreshToken"]},
+        )
+        if r.status_code != 200:
+            return None
+        data = r.json()
+        refreshed = _entry(data["user_id"], data["id_token"], data["refresh_token"], data["expires_in"])
+        self._store(email, refreshed)
+        return refreshed
+
+    def _sign_in(self, email, password, create):
+        client = self.client or get_client()
+        body = {"email": email, "password": password, "returnSecureToken": True}
+        try:
+            data = _post_auth(client, "accounts:signInWithPassword", body)
+        except AuthError as e:
+            # Newer emulators answer INVALID_LOGIN_CREDENTIALS for unknown emails too.
+            if not create or not any(code in str(e) for code in ("EMAIL_NOT_FOUND", "INVALID_LOGIN_CREDENTIALS")):
+                raise
+            try:
+                data = _post_auth(client, "accounts:signUp", body)
+            except AuthError as signup_error:
+                if "EMAIL_EXISTS" in str(signup_error):
+                    raise e  # account exists, so the password was wrong
+                raise
+        entry = _entry(data["localId"], data["idToken"], data["refreshToken"], data["expiresIn"])
+        self._store(email, entry)
+        return entry
+
+    def entry(self, email, password=None, create=True):
+        """Valid token entry for `email`: cached, refreshed, or freshly signed in."""
+        with self._lock:
+            entry = self._entries.get(self._key(email))
+        if entry and not self._verify(entry):
+            entry = None
+        if entry and entry["expiresAt"] - EXPIRY_SKEW > time.time():
+            return entry
+        if entry:
+            refreshed = self._refresh(email, entry)
+            if refreshed:
+                return refreshed
+        if password is None:
+            raise AuthError(f"No cached session for {email} and no password given")
+        return self._sign_in(email, password, create)
+
+    def refresh(self, email):
+        """Forces a new ID token for a cached account, e.g. to pick up changed custom claims."""
+        with self._lock:
+            entry = self._entries.get(self._key(email))
+        refreshed = self._refresh(email, entry) if entry else None
+        if not refreshed:
+            raise AuthError(f"Could not refresh the session for {email}")
+        return refreshed
+
+    def session(self, email, password=None, create=True):
+        entry = self.entry(email, password, create)
+        return AuthSession(self, email, password, entry)
+
+
+class AuthSession:
+    """An authenticated emulator user whose ID token is refreshed on demand."""
+
+    def __init__(self, cache, email, password, entry):
+        self.cache = cache
+        self.email = email
+        self._password = password
+        self._entry = entry
+
+    @property
+    def uid(self):
+        return self._entry["uid"]
+
+    @property
+    def refresh_token(self):
+        return self._entry["refreshToken"]
+
+    @property
+    def id_token(self):
+        if self._entry["expiresAt"] - EXPIRY_SKEW <= time.time():
+            self._entry = self.cache.entry(self.email, self._password)
+        return self._entry["idToken"]
+
+    @property
+    def expires_at(self):
+        return self._entry["expiresAt"]
+
+    @property
+    def claims(self):
+        """Claims of the current ID token (decoded locally, not verified)."""
+        payload = self.id_token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+    def refresh(self):
+        self._entry = self.cache.refresh(self.email)
+        return self
+
+    def headers(self):
+        return {"Authorization": f"Bearer {self.id_token}"}
+
+    def client(self, base=None):
+        """EmulatorClient on the shared pool that sends this user's token to Firestore."""
+        return (base or self.cache.client or get_client()).with_auth(self)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TokenCache()
+    return _cache
+
+
+def get_session(email, password=None, create=True):
+    """Cached AuthSession for `email`; signs up the account if it does not exist."""
+    return get_token_cache().session(email, password, create)
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark for the Firestore value codec on large lesson documents.
+
+Builds lesson documents shaped like the real ones (long text, embedded quiz
+and test questions, flashcards, files, presentation slides), serialises them
+to a runQuery response body once, and times turning that body into Python
+documents three ways: json.loads + the previous `in` chain, json.loads + the
+strict table-driven decoder, and the decode-while-parsing fast path.
+
+    python -m harness.bench_codec --docs 200 --repeat 5
+
+The variants run interleaved and the best of `--repeat` counts. On a 1-CPU
+runner the strict decoder is on par with the legacy chain (0.92-1.01x),
+and loads_run_query is 1.0-1.3x faster at 50 documents (3 MB) and about
+2.2-2.4x at 200 (12 MB), where allocating the intermediate Value dicts
+starts to dominate. The numbers are noisy; compare them within one run.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+from harness.codec import decode_run_query, from_value, loads_run_query, to_fields
+
+
+def legacy_from_value(v):
+    # Pre-codec implementation from verify_full_lifecycle.py, kept as the baseline.
+    if "stringValue" in v: return v["stringValue"]
+    if "booleanValue" in v: return v["booleanValue"]
+    if "integerValue" in v: return int(v["integerValue"])
+    if "doubleValue" in v: return float(v["doubleValue"])
+    if "arrayValue" in v: return [legacy_from_value(x) for x in v["arrayValue"].get("values", [])]
+    if "mapValue" in v: return {k: legacy_from_value(val) for k, val in v["mapValue"].get("fields", {}).items()}
+    if "nullValue" in v: return None
+    return None
+
+
+def legacy_decode_run_query(items):
+    results = []
+    for item in items:
+        if "document" in item:
+            doc = item["document"]
+            doc_id = doc["name"].split("/")[-1]
+            fields = {k: legacy_from_value(v) for k, v in doc.get("fields", {}).items()}
+            results.append({"id": doc_id, **fields})
+    return results
+
+
+def make_lesson(i, questions=40, flashcards=80, files=20, slides=25):
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return {
+        "title": f"Lesson {i}",
+        "subject": "Biology",
+        "ownerId": f"prof_{i % 7}",
+        "status": "Aktivní",
+        "assignedToGroups": [f"group_{g}" for g in range(5)],
+        "createdAt": now,
+        "text_content": "Mitochondrie jsou organely eukaryotických buněk. " * 200,
+        "quiz": {"questions": [{
+            "question_text": f"Question {q}?",
+            "options": [f"Option {o}" for o in range(4)],
+            "correct_option_index": q % 4,
+            "type": "Multiple Choice",
+        } for q in range(questions)]},
+        "test": {"questions": [{
+            "question_text": f"Test question {q}?",
+            "options": [f"Answer {o}" for o in range(4)],
+            "correct_option_index": (q + 1) % 4,
+            "points": 2.5,
+        } for q in range(questions)]},
+        "flashcards": {"cards": [{"front": f"Term {c}", "back": f"Definition of term {c} " * 4} for c in range(flashcards)]},
+        "presentation": {"slides": [{"title": f"Slide {s}", "points": [f"Point {p}" for p in range(5)]} for s in range(slides)]},
+        "files": [{
+            "id": f"file_{f}",
+            "name": f"material_{f}.pdf",
+            "path": f"courses/prof_{i % 7}/media/material_{f}.pdf",
+            "type": "application/pdf",
+            "size": 1024 * f,
+        } for f in range(files)],
+    }
+
+
+def make_run_query_body(docs):
+    root = "projects/ai-sensei-czu-pilot/databases/(default)/documents/lessons"
+    items = [{"readTime": "2026-01-01T00:00:00Z"}]
+    for i in range(docs):
+        items.append({"document": {"name": f"{root}/lesson_{i}", "fields": to_fields(make_lesson(i))}})
+    return json.dumps(items).encode("utf-8")
+
+
+def bench(fn, payload, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_interleaved(fns, payload, repeat):
+    """Best time of each fn, running them in turn so machine noise hits all of them alike."""
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            best[i] = min(best[i], bench(fn, payload, 1))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Firestore value decoding on lesson documents.")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = make_run_query_body(args.docs)
+    size_mb = len(body) / (1024 * 1024)
+
+    # Sanity check: all paths agree on everything the legacy decoder understood.
+    legacy = legacy_decode_run_query(json.loads(body))
+    strict = list(decode_run_query(json.loads(body)))
+    fast = loads_run_query(body)
+    assert strict == fast, "fast path differs from strict decoder"
+    for doc in legacy + strict:
+        doc["createdAt"] = None  # legacy drops timestamps
+    assert legacy == strict, "codec output differs from legacy decoder"
+
+    legacy_s, strict_s, fast_s = bench_interleaved([
+        lambda b: legacy_decode_run_query(json.loads(b)),
+        lambda b: list(decode_run_query(json.loads(b))),
+        loads_run_query,
+    ], body, args.repeat)
+    quiz = json.loads(body)[1]["document"]["fields"]["quiz"]
+    value_s = bench(lambda v: [from_value(v) for _ in range(1000)], quiz, args.repeat)
+
+    print(f"[BENCH] {args.docs} lesson docs, {size_mb:.1f} MB runQuery body, best of {args.repeat}")
+    print(f"[BENCH] loads + legacy decode: {legacy_s * 1000:8.1f} ms")
+    print(f"[BENCH] loads + strict codec:  {strict_s * 1000:8.1f} ms  ({legacy_s / strict_s:.2f}x)")
+    print(f"[BENCH] loads_run_query:       {fast_s * 1000:8.1f} ms  ({legacy_s / fast_s:.2f}x)")
+    print(f"[BENCH] quiz map from_value x1000: {value_s * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+One warm Chromium shared by script phases, matrix workers and standalone
+scripts, handing out isolated browser contexts.
+
+Python Playwright has no launch_server(), so the shared browser is Playwright's
+own Chromium started with --remote-debugging-port; clients attach with
+connect_over_cdp(). Each script (or matrix thread) still runs its own
+Playwright driver, but they all drive the same browser process, so only the
+first one pays the browser start-up.
+
+    with shared_browser(p, headless=True) as (browser, endpoint):
+        pool = ContextPool(browser, max_uses=5)
+        with pool.page("professor", storage_state=state) as page:
+            ...
+        run_matrix(items, task, endpoint=endpoint)   # workers attach instead of launching
+
+A long-lived browser for a series of standalone scripts:
+
+    python -m harness.browser_pool serve          # advertises itself in .harness/browser.json
+    python verify_editors.py                      # connect_or_launch() attaches to it
+
+Contexts are keyed by persona: a released context goes back to the pool
+(with its pages closed) and is handed out again only for the same key, so
+sessions never leak between personas. After `max_uses` hand-outs it is closed
+to bound renderer memory. Set HARNESS_SHARED_BROWSER=0 to launch browsers the
+old way.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+from harness.emulator import STATE_DIR
+
+SERVER_FILE = os.path.join(STATE_DIR, "browser.json")
+DEFAULT_MAX_USES = int(os.environ.get("HARNESS_CONTEXT_MAX_USES", "5"))
+DEFAULT_ARGS = ("--no-sandbox",)
+
+_DEVTOOLS_RE = re.compile(r"DevTools listening on (ws://\S+)")
+
+
+def use_shared_browser():
+    return os.environ.get("HARNESS_SHARED_BROWSER") != "0"
+
+
+# --- Browser server ---
+
+class BrowserServer:
+    """A Chromium process with a DevTools endpoint that Playwright clients can attach to."""
+
+    def __init__(self, executable, headless=True, args=DEFAULT_ARGS, port=0):
+        self.executable = executable
+        self.headless = headless
+        self.args = list(args)
+        self.port = port
+        self.process = None
+        self.endpoint = None
+        self._profile_dir = None
+
+    def start(self, timeout=30):
+        self._profile_dir = tempfile.mkdtemp(prefix="harness-chromium-")
+        cmd = [
+            self.executable,
+            f"--remote-debugging-port={self.port}",
+            "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={self._profile_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            *self.args,
+        ]
+        if self.headless:
+            cmd += ["--headless=new", "--hide-scrollbars", "--mute-audio"]
+        cmd.append("about:blank")
+
+        started = time.monotonic()
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        ready = threading.Event()
+
+        def pump():
+            # Chromium announces the endpoint on stderr; keep draining it so the pipe never fills.
+            for line in self.process.stderr:
+                match = _DEVTOOLS_RE.search(line)
+                if match and not ready.is_set():
+                    ws = match.group(1)
+                    self.endpoint = "http://" + ws[len("ws://"):].split("/", 1)[0]
+                    ready.set()
+
+        threading.Thread(target=pump, name="chromium-stderr", daemon=True).start()
+        if not ready.wait(timeout):
+            self.stop()
+            raise Exception(f"Chromium did not expose a DevTools endpoint within {timeout}s")
+        print(f"[BROWSER] Chromium {self.process.pid} listening on {self.endpoint} "
+              f"(started in {time.monotonic() - started:.1f}s)")
+        return self
+
+    def advertise(self, path=SERVER_FILE):
+        """Records the endpoint so connect_or_launch() in other processes can find it."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"endpoint": self.endpoint, "pid": self.process.pid, "headless": self.headless}, f)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
+
+
+def _endpoint_alive(endpoint):
+    try:
+        with urllib.request.urlopen(f"{endpoint}/json/version", timeout=2) as r:
+            return r.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def advertised_endpoint(path=SERVER_FILE):
+    """DevTools endpoint of a running shared browser (HARNESS_BROWSER_ENDPOINT or `serve`), if any."""
+    endpoint = os.environ.get("HARNESS_BROWSER_ENDPOINT")
+    if not endpoint:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                endpoint = json.load(f).get("endpoint")
+        except (OSError, ValueError):
+            return None
+    return endpoint if endpoint and _endpoint_alive(endpoint) else None
+
+
+def connect_or_launch(p, headless=True, args=DEFAULT_ARGS):
+    """
+    The advertised shared browser if one is running, a freshly launched one
+    otherwise. Closing a connected browser only drops this client's contexts.
+    """
+    endpoint = advertised_endpoint() if use_shared_browser() else None
+    if endpoint:
+        return p.chromium.connect_over_cdp(endpoint)
+    return p.chromium.launch(headless=headless, args=list(args))
+
+
+@contextmanager
+def shared_browser(p, headless=True, args=DEFAULT_ARGS):
+    """
+    Yields (browser, endpoint) for one script run: attaches to an advertised
+    browser, or starts one that lives until the block exits. `endpoint` is
+    None when sharing is disabled, in which case the browser is launched
+    directly.
+    """
+    if not use_shared_browser():
+        browser = p.chromium.launch(headless=headless, args=list(args))
+        try:
+            yield browser, None
+        finally:
+            browser.close()
+        return
+
+    server = None
+    endpoint = advertised_endpoint()
+    if not endpoint:
+        server = BrowserServer(p.chromium.executable_path, headless=headless, args=args).start()
+        endpoint = server.endpoint
+    browser = p.chromium.connect_over_cdp(endpoint)
+    try:
+        yield browser, endpoint
+    finally:
+        try:
+            browser.close()
+        finally:
+            if server:
+                server.stop()
+
+
+# --- Context pool ---
+
+class ContextPool:
+    """
+    Hands out browser contexts per persona key and recycles them after
+    `max_uses`. A key of None always gets a fresh context that is closed on
+    release. `setup(context, key)` runs once per new context (e.g. to
+    install routes). Not thread-safe: use one pool per Playwright driver (thread).
+    """
+
+    def __init__(self, browser, max_uses=None, default_timeout=None, setup=None, **context_options):
+        self.browser = browser
+        self.max_uses = max_uses or DEFAULT_MAX_USES
+        self.default_timeout = default_timeout
+        self.setup = setup
+        self.context_options = context_options
+        self._idle = {}
+        self._uses = {}
+        self._keys = {}
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+
+    def acquire(self, key=None, storage_state=None, **options):
+        idle = self._idle.get(key) if key is not None else None
+        if idle:
+            context = idle.pop()
+            self.reused += 1
+        else:
+            context = self.browser.new_context(storage_state=storage_state, **{**self.context_options, **options})
+            if self.default_timeout:
+                context.set_default_timeout(self.default_timeout)
+            if self.setup:
+                self.setup(context, key)
+            self._uses[id(context)] = 0
+            self._keys[id(context)] = key
+            self.created += 1
+        self._uses[id(context)] += 1
+        return context
+
+    def release(self, context, discard=False):
+        """Returns a context to the pool; `discard` (e.g. after a failure) closes it instead."""
+        key = self._keys.get(id(context))
+        if discard or key is None or self._uses.get(id(context), 0) >= self.max_uses:
+            self._close(context)
+            if key is not None and not discard:
+                self.recycled += 1
+            return
+        try:
+            for page in list(context.pages):
+                page.close()
+        except Exception:
+            self._close(context)
+            return
+        self._idle.setdefault(key, []).append(context)
+
+    def _close(self, context):
+        self._uses.pop(id(context), None)
+        self._keys.pop(id(context), None)
+        try:
+            context.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def context(self, key=None, storage_state=None, **options):
+        context = self.acquire(key, storage_state, **options)
+        failed = False
+        try:
+            yield context
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.release(context, discard=failed)
+
+    @contextmanager
+    def page(self, key=None, storage_state=None, **options):
+        with self.context(key, storage_state, **options) as context:
+            yield context.new_page()
+
+    def close(self):
+        for contexts in self._idle.values():
+            for context in contexts:
+                self._close(context)
+        self._idle = {}
+
+    def report(self, prefix="[BROWSER]"):
+        print(f"{prefix} Contexts: {self.created} created, {self.reused} reused, {self.recycled} recycled "
+              f"(max {self.max_uses} uses each)")
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a warm Chromium for harness scripts.")
+    parser.add_argument("command", choices=["serve", "status"])
+    parser.add_argument("--port", type=int, default=9222)
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        endpoint = advertised_endpoint()
+        print(f"[BROWSER] Shared browser at {endpoint}" if endpoint else "[BROWSER] No shared browser running.")
+        return
+
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        server = BrowserServer(p.chromium.executable_path, headless=not args.headed, port=args.port).start()
+    server.advertise()
+    print("[BROWSER] Serving; Ctrl+C to stop.")
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.process.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if os.path.exists(SERVER_FILE):
+            os.remove(SERVER_FILE)
+
+
+if __name__ == "__main__":
+    main()
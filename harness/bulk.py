@@ -0,0 +1,160 @@
+"""
+Bulk Firestore writes for seeding large datasets against the emulator.
+
+Operations are (collection, doc_id, data, mask) tuples. They are sent in
+chunks through `documents:batchWrite`, which applies each write independently
+and returns a status per write, so one bad document does not sink the chunk.
+`atomic=True` uses `documents:commit` instead (all-or-nothing per chunk).
+"""
+
+import re
+
+from harness.codec import to_fields
+from harness.emulator import get_client
+
+# Firestore rejects more than 500 writes per commit/batchWrite request.
+MAX_BATCH_SIZE = 500
+
+_SIMPLE_FIELD = re.compile(r"^[A-Za-z_][A-Za-z_0-9]*$")
+
+
+def quote_field_path(key):
+    """Quotes a single top-level key so it can be used in an updateMask."""
+    if _SIMPLE_FIELD.match(key):
+        return key
+    return "`" + key.replace("\\", "\\\\").replace("`", "\\`") + "`"
+
+
+def merge_mask(data):
+    """Mask that updates only the top-level keys of `data` (upsert/merge)."""
+    return [quote_field_path(k) for k in data.keys()]
+
+
+def build_write(collection, doc_id, data, mask=None, client=None):
+    """
+    Builds a Write. mask=None replaces the whole document; a list of field
+    paths updates only those paths and leaves the rest of the document intact.
+    """
+    client = client or get_client()
+    write = {
+        "update": {
+            "name": client.document_name(collection, doc_id),
+            "fields": to_fields(data),
+        }
+    }
+    if mask is not None:
+        write["updateMask"] = {"fieldPaths": list(mask)}
+    return write
+
+
+class BulkWriteResult:
+    """Outcome of a bulk write: count of applied writes plus per-document failures."""
+
+    def __init__(self):
+        self.written = 0
+        self.failures = []
+        self.requests = 0
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def add_failure(self, collection, doc_id, code, message):
+        self.failures.append({"collection": collection, "id": doc_id, "code": code, "message": message})
+
+    def __repr__(self):
+        return f"BulkWriteResult(written={self.written}, failed={len(self.failures)}, requests={self.requests})"
+
+
+def _chunks(ops, size):
+    chunk = []
+    for op in ops:
+        chunk.append(op)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _send_batch_write(client, labels, writes, result):
+    r = client.post(f"{client.firestore_url}:batchWrite", json={"writes": writes})
+    if r.status_code != 200:
+        for collection, doc_id in labels:
+            result.add_failure(collection, doc_id, r.status_code, r.text[:200])
+        return
+    try:
+        statuses = r.json().get("status") or []
+    except ValueError:
+        statuses = []
+    for i, (collection, doc_id) in enumerate(labels):
+        # One Status per write, {} for success; a write without one is not known to have landed.
+        if i >= len(statuses):
+            result.add_failure(collection, doc_id, r.status_code,
+                               f"batchWrite returned {len(statuses)} statuses for {len(labels)} writes")
+            continue
+        code = statuses[i].get("code", 0)
+        if code:
+            result.add_failure(collection, doc_id, code, statuses[i].get("message", ""))
+        else:
+            result.written += 1
+
+
+def _send_commit(client, labels, writes, result):
+    r = client.post(f"{client.firestore_url}:commit", json={"writes": writes})
+    if r.status_code != 200:
+        # Commit is atomic: nothing in this chunk was applied.
+        for collection, doc_id in labels:
+            result.add_failure(collection, doc_id, r.status_code, r.text[:200])
+        return
+    result.written += len(labels)
+
+
+def _write_chunks(labelled_writes, chunk_size, atomic, client, progress):
+    """Sends (collection, doc_id, write) triples in chunks and collects the outcome."""
+    chunk_size = max(1, min(chunk_size, MAX_BATCH_SIZE))
+    send = _send_commit if atomic else _send_batch_write
+    result = BulkWriteResult()
+
+    for chunk in _chunks(labelled_writes, chunk_size):
+        send(client, [(c, d) for c, d, _ in chunk], [w for _, _, w in chunk], result)
+        result.requests += 1
+        if progress:
+            progress(result.written, len(result.failures))
+
+    for failure in result.failures[:10]:
+        print(f"[BULK] Write failed for {failure['collection']}/{failure['id']}: {failure['code']} {failure['message']}")
+    if len(result.failures) > 10:
+        print(f"[BULK] ... and {len(result.failures) - 10} more failures")
+    return result
+
+
+def rest_firestore_bulk_write(ops, chunk_size=MAX_BATCH_SIZE, atomic=False, client=None, progress=None):
+    """
+    Writes an iterable of (collection, doc_id, data, mask) operations in chunks.
+
+    `ops` is consumed lazily, so generators of many thousands of documents are
+    fine. `progress(written, failed)` is called after each chunk if given.
+    """
+    client = client or get_client()
+    labelled = (
+        (collection, doc_id, build_write(collection, doc_id, data, mask, client=client))
+        for collection, doc_id, data, mask in ops
+    )
+    return _write_chunks(labelled, chunk_size, atomic, client, progress)
+
+
+def rest_firestore_bulk_put_raw(documents, chunk_size=MAX_BATCH_SIZE, client=None, progress=None):
+    """
+    Writes undecoded document resources ({"name": ..., "fields": ...}, as
+    returned by runQuery) back verbatim, replacing whole documents.
+    """
+    client = client or get_client()
+
+    def labelled():
+        for doc in documents:
+            parent, _, doc_id = doc["name"].rpartition("/")
+            write = {"update": {"name": doc["name"], "fields": doc.get("fields") or {}}}
+            yield parent.split("/documents/", 1)[-1], doc_id, write
+
+    return _write_chunks(labelled(), chunk_size, False, client, progress)
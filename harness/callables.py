@@ -0,0 +1,327 @@
+"""
+Callable-function client for the Functions emulator (5001), and a latency
+probe that separates first calls from steady state.
+
+    session = get_session("janko@student.com", "password123")
+    result = call_function("joinClass", {"joinCode": "ABC123"}, session=session)   # harness.auth.get_session
+
+call_function speaks the onCall protocol directly (POST {"data": ...} to
+/<project>/<region>/<name>, Bearer ID token), so a check can exercise a
+function without a browser. Error responses ({"error": {"status", "message"}})
+raise CallableError.
+
+The probe invokes each export in PROBES: once (the first call, which pays
+for the emulator spinning up the function's worker and loading index.js) and
+then `--warm` more times. The AI calls are answered by the emulator stand-in
+in functions/src/gemini-api.ts (FUNCTIONS_EMULATOR=true), so the numbers are
+the functions' own overhead, not Vertex AI's.
+
+    python -m harness.callables probe [--warm 5] [--only joinClass,triggerCrisis]
+    python -m harness.callables history
+
+Every probe run is appended to .harness/callables.json. The report compares
+the run's first-call latency with earlier runs (a first call right after
+the emulator starts is a true cold start), flags functions whose start-up
+got heavier, and suggests timeouts from the observed first-call p95;
+timeout_ms(name, default_ms) hands those to UI waits of runs against the
+emulators; a deployed app keeps the default.
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+import urllib.parse
+import uuid
+
+from harness.bulk import rest_firestore_bulk_write
+from harness.emulator import EMULATOR_HOST, PROJECT_ID, STATE_DIR, get_client
+from harness.trace import span
+from harness.waiters import percentile
+
+FUNCTIONS_PORT = 5001
+REGION = os.environ.get("FUNCTIONS_REGION", "europe-west1")
+HISTORY_FILE = os.path.join(STATE_DIR, "callables.json")
+
+# Read timeout for one call; generous so a cold start is measured, not cut off.
+CALL_TIMEOUT = (3.05, float(os.environ.get("HARNESS_CALLABLE_TIMEOUT", "300")))
+
+
+class CallableError(Exception):
+    def __init__(self, name, status, message, http_status=None):
+        self.name = name
+        self.status = status
+        self.message = message
+        self.http_status = http_status
+        super().__init__(f"{name}: {status} {message}")
+
+
+def function_url(name, host=EMULATOR_HOST, project_id=PROJECT_ID, region=REGION):
+    return f"http://{host}:{FUNCTIONS_PORT}/{project_id}/{region}/{name}"
+
+
+def call_function(name, data=None, session=None, client=None, timeout=CALL_TIMEOUT):
+    """Invokes callable `name` as `session` (unauthenticated when None) and returns its result."""
+    client = client or get_client()
+    headers = {"Content-Type": "application/json"}
+    if session is not None:
+        headers.update(session.headers())
+    r = client.post(function_url(name, host=client.host, project_id=client.project_id),
+                    json={"data": data if data is not None else {}}, headers=headers, timeout=timeout)
+    try:
+        body = r.json()
+    except ValueError:
+        raise CallableError(name, "INVALID_RESPONSE", r.text[:200], r.status_code)
+    if "error" in body:
+        error = body["error"]
+        raise CallableError(name, error.get("status", "UNKNOWN"), error.get("message", ""), r.status_code)
+    if r.status_code != 200 or "result" not in body:
+        raise CallableError(name, "INVALID_RESPONSE", r.text[:200], r.status_code)
+    return body["result"]
+
+
+def timed_call(name, data=None, session=None, client=None, timeout=CALL_TIMEOUT):
+    """(seconds, result, error) for one call; error is the exception text or None."""
+    started = time.monotonic()
+    try:
+        result = call_function(name, data, session=session, client=client, timeout=timeout)
+        error = None
+        # joinClass and friends report failures as {success: false} instead of an HttpsError.
+        if isinstance(result, dict) and result.get("success") is False:
+            error = f"{name}: {result.get('error', 'success=false')}"
+    except Exception as e:
+        result, error = None, str(e)
+    return time.monotonic() - started, result, error
+
+
+# --- Probe ---
+
+class ProbeContext:
+    """Accounts and documents the probed functions need, seeded once per run."""
+
+    def __init__(self, run_id=None, password="password123"):
+        from harness.login import provision_account
+
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.professor = provision_account(f"probe_prof_{self.run_id}@profesor.cz", password, "professor",
+                                           "Probe Professor")
+        self.student = provision_account(f"probe_student_{self.run_id}@example.com", password, "student",
+                                         "Probe Student")
+        self.group_id = f"probe_group_{self.run_id}"
+        self.join_code = self.run_id[:6].upper()
+        self.lesson_id = f"probe_lesson_{self.run_id}"
+        self.kb_id = f"probe_kb_{self.run_id}"
+        self._seq = 0
+
+        result = rest_firestore_bulk_write([
+            ("groups", self.group_id, {"name": f"Probe Group {self.run_id}", "ownerId": self.professor.uid,
+                                       "joinCode": self.join_code, "studentIds": []}, None),
+            ("lessons", self.lesson_id, {"title": "Probe lesson", "topic": "Latency", "ownerId": self.professor.uid,
+                                         "assignedToGroups": [self.group_id], "isPublished": True}, None),
+            ("knowledge_base", self.kb_id, {"ownerId": self.professor.uid, "title": "Probe syllabus",
+                                            "text": "Week 1: kinematics. Week 2: dynamics. Week 3: energy.",
+                                            "competencyMap": {"nodes": [{"id": "n1", "label": "Kinematics"}],
+                                                              "edges": []}}, None),
+        ])
+        if not result.ok:
+            raise Exception(f"Probe seeding failed: {result.failures}")
+
+    def unique_email(self):
+        self._seq += 1
+        return f"probe_reg_{self.run_id}_{self._seq}@example.com"
+
+
+# name -> (caller role or None for unauthenticated, payload builder). The onCall
+# exports that are not probed are listed in SKIPPED with the reason.
+PROBES = {
+    "registerUserWithRole": (None, lambda c: {"email": c.unique_email(), "password": "password123",
+                                              "role": "student", "displayName": "Probe Registrant"}),
+    "joinClass": ("student", lambda c: {"joinCode": c.join_code}),
+    "generateProjectScaffolding": ("professor", lambda c: {"topic": "Bridges", "duration": "4 weeks",
+                                                           "complexity": "medium"}),
+    "analyzeSyllabus": ("professor", lambda c: {"knowledgeBaseId": c.kb_id}),
+    "mapInsightsToGraph": ("professor", lambda c: {"knowledgeBaseId": c.kb_id,
+                                                   "insightText": "We covered kinematics today."}),
+    "triggerCrisis": ("professor", lambda c: {"lessonId": c.lesson_id}),
+    "resolveCrisis": ("student", lambda c: {"lessonId": c.lesson_id}),
+    "generateContent": ("professor", lambda c: {"contentType": "text",
+                                                "promptData": {"userPrompt": "Newton's laws", "language": "cs"}}),
+    "getAiAssistantResponse": ("student", lambda c: {"lessonId": c.lesson_id, "userQuestion": "What is inertia?"}),
+    "generateRemedialExplanation": ("student", lambda c: {"lessonTopic": "Latency",
+                                                          "failedQuestions": ["What is 2+2?"]}),
+    "generateImage": ("professor", lambda c: {"prompt": "A bridge at sunset"}),
+    "generateDiagramElement": ("professor", lambda c: {"prompt": "Water cycle"}),
+    "generateEmbeddings": ("professor", lambda c: {"text": "Kinematics basics", "title": "Probe"}),
+    "getAiStudentSummary": ("professor", lambda c: {"studentId": c.student.uid}),
+    "getGlobalAnalytics": ("professor", lambda c: {}),
+    "submitQuizResults": ("student", lambda c: {"lessonId": c.lesson_id, "quizTitle": "Probe quiz", "score": 1,
+                                                "totalQuestions": 1, "answers": [1]}),
+    "sendMessageFromStudent": ("student", lambda c: {"text": "Probe message"}),
+    "submitTestResults": ("student", lambda c: {"lessonId": c.lesson_id, "testTitle": "Probe test", "score": 1,
+                                                "totalQuestions": 1, "answers": [1]}),
+    "generatePortfolioFeedback": ("student", lambda c: {"ratios": "60/40", "weaknesses": "Pacing",
+                                                        "swot": {"strengths": ["Clear examples"]}}),
+    # The probe student has no telegramChatId, so no Telegram message is sent.
+    "sendMessageToStudent": ("professor", lambda c: {"studentId": c.student.uid, "text": "Probe reply"}),
+    # No filePaths: generates from the topic only, into the probe lesson.
+    "startMagicGeneration": ("professor", lambda c: {"lessonId": c.lesson_id, "lessonTopic": "Latency"}),
+    # Writes the mock image to the Storage emulator (9199).
+    "generateComicPanelImage": ("professor", lambda c: {"lessonId": c.lesson_id, "panelIndex": 0,
+                                                        "panelPrompt": "A robot waiting for a reply"}),
+    "analyzeClassroomAudio": ("professor", lambda c: {"audioData": "UklGRiQAAABXQVZF", "mimeType": "audio/wav"}),
+}
+
+# onCall exports that are not probed, and why.
+SKIPPED = {
+    "generatePodcastAudio": "calls Cloud Text-to-Speech, which has no emulator stand-in",
+    "processFileForRAG": "needs an uploaded file in Storage",
+    "getSecureUploadUrl": "signs an upload URL, which needs service-account credentials the emulator lacks",
+    "finalizeUpload": "needs a file uploaded through getSecureUploadUrl",
+    "admin_setUserRole": "changes another user's role (admin maintenance)",
+    "admin_migrateFileMetadata": "rewrites every file document (admin maintenance)",
+    "admin_migrateStudentRoles": "rewrites every student's role (admin maintenance)",
+    "admin_nuke_all_files": "deletes every file (admin maintenance)",
+    "emergency_restoreProfessors": "rewrites professor accounts (admin maintenance)",
+}
+
+
+def _session(ctx, role):
+    return {"professor": ctx.professor, "student": ctx.student}.get(role)
+
+
+def probe_function(name, ctx, warm=5):
+    """One first call and `warm` steady-state calls of `name`: {"first", "warm", "errors"}."""
+    role, payload = PROBES[name]
+    session = _session(ctx, role)
+    samples = {"first": None, "warm": [], "errors": []}
+    for i in range(warm + 1):
+        phase = "first" if i == 0 else "warm"
+        with span("callable", key=name, phase=phase) as record:
+            seconds, _, error = timed_call(name, payload(ctx), session=session)
+            record["attrs"]["error"] = error
+        if error:
+            samples["errors"].append(error[:200])
+        if i == 0:
+            samples["first"] = seconds
+        else:
+            samples["warm"].append(seconds)
+    return samples
+
+
+def load_history(path=HISTORY_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_history(runs, path=HISTORY_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(runs, f, indent=1)
+
+
+def suggested_timeout(first_calls, headroom=2.0, floor=10):
+    """Seconds to wait for a function: `headroom` x the first-call p95, at least `floor`."""
+    p95 = percentile(first_calls, 95)
+    return max(floor, int(math.ceil(p95 * headroom))) if p95 is not None else None
+
+
+def targets_emulator(base_url):
+    """True when the app under test is served by the local emulators (the probes' mocks apply)."""
+    return urllib.parse.urlsplit(base_url).hostname in ("localhost", "127.0.0.1", EMULATOR_HOST)
+
+
+def timeout_ms(name, default_ms, slack=15, history=None, base_url=None):
+    """
+    UI wait in ms for a step dominated by callable `name`: the suggested timeout
+    from the probe history plus `slack` seconds for rendering, or `default_ms`
+    when the function has not been probed yet. The history is measured against
+    the emulator's AI stand-in, so it is ignored (`default_ms`) when `base_url`
+    (default: $BASE_URL or the local Hosting emulator) is a deployed app.
+    """
+    if not targets_emulator(base_url or os.environ.get("BASE_URL", "http://localhost:5000")):
+        return default_ms
+    runs = load_history() if history is None else history
+    firsts = [r["functions"][name]["first"] for r in runs
+              if name in r["functions"] and r["functions"][name]["first"] is not None]
+    timeout = suggested_timeout(firsts)
+    return (timeout + slack) * 1000 if timeout is not None else default_ms
+
+
+def report(run, history, threshold=0.5, min_delta=1.0, prefix="[CALLABLE]"):
+    """Prints the run next to the history; returns the functions whose first call regressed."""
+    regressed = []
+    print(f"{prefix} {'function':30} {'first':>8} {'warm p50':>9} {'warm p95':>9} "
+          f"{'hist first p50':>15} {'timeout':>8}  errors")
+    for name, s in run["functions"].items():
+        earlier = [r["functions"][name]["first"] for r in history
+                   if name in r["functions"] and r["functions"][name]["first"] is not None]
+        base = percentile(earlier, 50)
+        first = s["first"]
+        heavier = (base is not None and first is not None
+                   and first - base > min_delta and first > base * (1 + threshold))
+        if heavier:
+            regressed.append(name)
+        warm50 = percentile(s["warm"], 50)
+        warm95 = percentile(s["warm"], 95)
+        timeout = suggested_timeout(earlier + [first] if first is not None else earlier)
+        print(f"{'!!' if heavier else '  '}{name[:30]:30} {_fmt(first)} {_fmt(warm50):>9} {_fmt(warm95):>9} "
+              f"{_fmt(base):>15} {str(timeout) + 's' if timeout else '-':>8}  {len(s['errors'])}")
+        if s["errors"]:
+            print(f"{prefix}   {name}: {s['errors'][0]}")
+    if regressed:
+        print(f"{prefix} First-call latency regressed (> {threshold:.0%} and {min_delta}s over history p50): "
+              f"{', '.join(regressed)}")
+    return regressed
+
+
+def _fmt(seconds):
+    return "       -" if seconds is None else f"{seconds:7.2f}s"
+
+
+def probe(names=None, warm=5):
+    ctx = ProbeContext()
+    run = {"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "runId": ctx.run_id, "warm": warm, "functions": {}}
+    for name in names or PROBES:
+        print(f"[CALLABLE] Probing {name}...")
+        run["functions"][name] = probe_function(name, ctx, warm)
+    return run
+
+
+def main():
+    from harness.trace import TRACE
+
+    parser = argparse.ArgumentParser(description="Probe callable-function latency on the Functions emulator.")
+    parser.add_argument("command", choices=["probe", "history"])
+    parser.add_argument("--warm", type=int, default=5, help="steady-state calls after the first one")
+    parser.add_argument("--only", help="comma-separated function names (default: every probe)")
+    parser.add_argument("--threshold", type=float, default=0.5, help="relative first-call slowdown that counts")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="absolute first-call slowdown in seconds")
+    parser.add_argument("--fail", action="store_true", help="exit with status 1 when a first call regressed")
+    args = parser.parse_args()
+
+    history = load_history()
+    if args.command == "history":
+        for run in history:
+            firsts = ", ".join(f"{n}={s['first']:.2f}s" for n, s in run["functions"].items() if s["first"] is not None)
+            print(f"{run['at']} {run['runId']}: {firsts}")
+        return
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else None
+    unknown = [n for n in names or [] if n not in PROBES]
+    if unknown:
+        parser.error("no probe for " + ", ".join(f"{n} ({SKIPPED[n]})" if n in SKIPPED else n for n in unknown))
+    run = probe(names, args.warm)
+    regressed = report(run, history, args.threshold, args.min_delta)
+    save_history(history + [run])
+    print(f"[CALLABLE] Run appended to {HISTORY_FILE}")
+    TRACE.save()
+    if regressed and args.fail:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Table-driven codec between Python values and Firestore REST `Value` objects.
+
+Encoding dispatches on the exact Python type (falling back to the MRO for
+subclasses) and raises TypeError for anything it cannot represent instead of
+silently stringifying it. Decoding dispatches on the single key of the wire
+value. Every Firestore value type is covered:
+
+    nullValue, booleanValue, integerValue, doubleValue, timestampValue,
+    stringValue, bytesValue, referenceValue, geoPointValue, arrayValue,
+    mapValue
+"""
+
+import base64
+import json
+import math
+from collections import namedtuple
+from datetime import datetime, timezone
+
+# Firestore-specific value types without a native Python equivalent.
+GeoPoint = namedtuple("GeoPoint", "latitude longitude")
+Reference = namedtuple("Reference", "name")  # full resource name: projects/.../documents/col/id
+
+
+# --- Encoding ---
+
+def _encode_float(v):
+    if math.isnan(v):
+        return {"doubleValue": "NaN"}
+    if math.isinf(v):
+        return {"doubleValue": "Infinity" if v > 0 else "-Infinity"}
+    return {"doubleValue": v}
+
+
+def _encode_datetime(v):
+    if v.tzinfo is None:
+        v = v.replace(tzinfo=timezone.utc)
+    return {"timestampValue": v.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")}
+
+
+def _encode_list(v):
+    return {"arrayValue": {"values": [to_value(x) for x in v]}}
+
+
+def _encode_dict(v):
+    return {"mapValue": {"fields": {k: to_value(val) for k, val in v.items()}}}
+
+
+_ENCODERS = {
+    type(None): lambda v: {"nullValue": None},
+    bool: lambda v: {"booleanValue": v},
+    int: lambda v: {"integerValue": str(v)},
+    float: _encode_float,
+    str: lambda v: {"stringValue": v},
+    bytes: lambda v: {"bytesValue": base64.b64encode(v).decode("ascii")},
+    bytearray: lambda v: {"bytesValue": base64.b64encode(bytes(v)).decode("ascii")},
+    datetime: _encode_datetime,
+    GeoPoint: lambda v: {"geoPointValue": {"latitude": v.latitude, "longitude": v.longitude}},
+    Reference: lambda v: {"referenceValue": v.name},
+    list: _encode_list,
+    tuple: _encode_list,
+    dict: _encode_dict,
+}
+
+
+def _lookup_encoder(cls):
+    # Subclasses (IntEnum, OrderedDict, ...) resolve through the MRO once and are cached.
+    for base in cls.__mro__[1:]:
+        encoder = _ENCODERS.get(base)
+        if encoder is not None:
+            _ENCODERS[cls] = encoder
+            return encoder
+    raise TypeError(f"Cannot encode {cls.__name__} as a Firestore value")
+
+
+def to_value(v):
+    encoder = _ENCODERS.get(type(v))
+    if encoder is None:
+        encoder = _lookup_encoder(type(v))
+    return encoder(v)
+
+
+def to_fields(data):
+    """Encodes a top-level document dict into a Firestore `fields` map."""
+    return {k: to_value(v) for k, v in data.items()}
+
+
+# --- Decoding ---
+# A decoder of None means the JSON payload already is the Python value.
+
+def _decode_timestamp(v):
+    # RFC 3339 "Z" timestamps with up to nanosecond precision; datetime keeps microseconds.
+    base, _, frac = v.rstrip("Z").partition(".")
+    return datetime.fromisoformat(f"{base}.{frac[:6].ljust(6, '0')}+00:00")
+
+
+def _decode_geopoint(v):
+    return GeoPoint(v.get("latitude", 0.0), v.get("longitude", 0.0))
+
+
+def _decode_array(v):
+    # String values are inlined here and in decode_fields: they are most of a lesson's values.
+    return [x["stringValue"] if "stringValue" in x else from_value(x) for x in v.get("values", ())]
+
+
+def _decode_map(v):
+    return decode_fields(v.get("fields"))
+
+
+_DECODERS = {
+    "stringValue": None,
+    "booleanValue": None,
+    "nullValue": None,
+    "integerValue": int,
+    "doubleValue": float,  # also parses "NaN" / "Infinity" / "-Infinity"
+    "mapValue": _decode_map,
+    "arrayValue": _decode_array,
+    "timestampValue": _decode_timestamp,
+    "referenceValue": Reference,
+    "bytesValue": base64.b64decode,
+    "geoPointValue": _decode_geopoint,
+}
+
+
+def from_value(v):
+    if "stringValue" in v:
+        return v["stringValue"]
+    for key in v:
+        try:
+            decoder = _DECODERS[key]
+        except KeyError:
+            raise ValueError(f"Unknown Firestore value type: {key}") from None
+        return v[key] if decoder is None else decoder(v[key])
+    raise ValueError("Empty Firestore value")
+
+
+def decode_fields(fields, into=None):
+    """Decodes a `fields` map, optionally straight into an existing dict."""
+    out = {} if into is None else into
+    if fields:
+        decode = from_value
+        for name, value in fields.items():
+            out[name] = value["stringValue"] if "stringValue" in value else decode(value)
+    return out
+
+
+def decode_document(doc):
+    """Document resource -> {"id": ..., **fields} built in a single dict."""
+    name = doc["name"]
+    return decode_fields(doc.get("fields"), into={"id": name[name.rfind("/") + 1:]})
+
+
+def decode_run_query(items):
+    """Yields decoded documents from a parsed runQuery response, skipping progress-only entries."""
+    for item in items:
+        doc = item.get("document")
+        if doc is not None:
+            yield decode_document(doc)
+
+
+def decode_batch_get(items):
+    """Yields (name, document-or-None) for each entry of a parsed batchGet response."""
+    for item in items:
+        found = item.get("found")
+        if found is not None:
+            yield found["name"], decode_document(found)
+        elif "missing" in item:
+            yield item["missing"], None
+
+
+# --- Decode-while-parsing fast path ---
+# json calls object_hook bottom-up for every object, so each wire Value is
+# replaced by its Python value as soon as it is parsed and the response is
+# never walked a second time. Payloads of arrayValue/mapValue are already
+# decoded by the time their parent Value is seen.
+#
+# A decoded Value is handed up wrapped in a 1-tuple, which JSON itself never
+# produces. That keeps the hook exact: a `fields` map whose only field is
+# named like a value type ({"stringValue": (5,)}) holds a wrapped value and
+# is left alone, while a real Value ({"stringValue": "5"}) holds a raw one.
+# The parent arrayValue/mapValue (and unwrap_fields for a document's
+# top-level fields) take the values back out of their tuples.
+
+_HOOK_DECODERS = dict(_DECODERS)
+_HOOK_DECODERS["arrayValue"] = lambda v: [x[0] for x in v.get("values", ())]
+_HOOK_DECODERS["mapValue"] = lambda v: unwrap_fields(v.get("fields"))
+
+
+def value_hook(d):
+    """json object_hook that turns Firestore Value objects into (Python value,) tuples."""
+    if len(d) == 1:
+        for key, payload in d.items():
+            if key not in _HOOK_DECODERS or type(payload) is tuple:
+                return d
+            decoder = _HOOK_DECODERS[key]
+            return (payload if decoder is None else decoder(payload),)
+    return d
+
+
+def unwrap_fields(fields, into=None):
+    """Python values of a `fields` map parsed with value_hook."""
+    out = {} if into is None else into
+    if fields:
+        for name, wrapped in fields.items():
+            out[name] = wrapped[0]
+    return out
+
+
+def _hooked_document(doc):
+    name = doc["name"]
+    return unwrap_fields(doc.get("fields"), into={"id": name[name.rfind("/") + 1:]})
+
+
+def loads_run_query(text):
+    """Parses and decodes a raw runQuery response body in one pass."""
+    return [_hooked_document(item["document"]) for item in json.loads(text, object_hook=value_hook) if "document" in item]
+
+
+def loads_batch_get(text):
+    """Parses and decodes a raw batchGet response body into [(name, document-or-None)]."""
+    results = []
+    for item in json.loads(text, object_hook=value_hook):
+        if "found" in item:
+            results.append((item["found"]["name"], _hooked_document(item["found"])))
+        elif "missing" in item:
+            results.append((item["missing"], None))
+    return results
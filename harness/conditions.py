@@ -0,0 +1,229 @@
+"""
+Condition-based waits for the browser scripts, plus accounting of the
+unconditional sleeps that remain.
+
+Instead of sleeping "long enough" after an action, wait for the signal the
+next step actually depends on:
+
+    wait_for_lit_update(page, "lesson-editor")       # Lit render flushed
+    with expect_lesson_saved(page):                  # setDoc/updateDoc acknowledged
+        safe_click(page, SAVE_BUTTON)
+    with expect_url_change(page):                    # router moved on
+        safe_click(page, "button:has-text('Vytvořit manuálně')")
+    wait_for_toast(page, kind="success")
+    wait_for_firestore_ack("lessons", lesson_id, after=update_time)
+
+Any sleep that has no condition to wait on goes through idle_sleep() /
+idle_wait(), which record the time per call site in IDLE so a run can report
+how much wall time it spent doing nothing.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from harness.ui import TIMEOUTS
+from harness.waiters import wait_for_document
+
+# Toastify backgrounds set by showToast() in public/js/utils/utils.js, as computed rgb() triples.
+TOAST_COLORS = {
+    "success": "0, 176, 155",
+    "error": "255, 95, 109",
+    "warning": "247, 151, 30",
+    "info": "79, 172, 254",
+}
+
+
+# --- Idle-time accounting ---
+
+class IdleAccount:
+    """Seconds spent in unconditional sleeps, per call site."""
+
+    def __init__(self):
+        self.sites = {}
+
+    def record(self, site, seconds):
+        count, total = self.sites.get(site, (0, 0.0))
+        self.sites[site] = (count + 1, total + seconds)
+
+    @property
+    def total(self):
+        return sum(total for _, total in self.sites.values())
+
+    def report(self, prefix="[IDLE]"):
+        if not self.sites:
+            print(f"{prefix} No unconditional sleeps.")
+            return
+        print(f"{prefix} {self.total:.1f}s spent in unconditional sleeps:")
+        for site, (count, total) in sorted(self.sites.items(), key=lambda kv: -kv[1][1]):
+            print(f"{prefix}   {total:6.1f}s  {count:3d}x  {site}")
+
+
+IDLE = IdleAccount()
+
+
+def _call_site(reason, depth=2):
+    frame = sys._getframe(depth)
+    site = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+    return f"{site} ({reason})" if reason else site
+
+
+def idle_sleep(seconds, reason=None):
+    """time.sleep that is accounted for in IDLE."""
+    IDLE.record(_call_site(reason), seconds)
+    time.sleep(seconds)
+
+
+def idle_wait(page, ms, reason=None):
+    """page.wait_for_timeout that is accounted for in IDLE."""
+    IDLE.record(_call_site(reason), ms / 1000.0)
+    page.wait_for_timeout(ms)
+
+
+# --- Conditions ---
+
+_LIT_UPDATE_JS = """async (el) => {
+    // Lit resolves updateComplete with false while another update is queued; drain them all.
+    if (!el || !('updateComplete' in el)) return true;
+    for (let i = 0; i < 10; i++) {
+        if (await el.updateComplete) return true;
+    }
+    return false;
+}"""
+
+_TOAST_JS = """([text, rgb]) => {
+    return Array.from(document.querySelectorAll('.toastify')).some(t =>
+        (!text || t.textContent.includes(text)) &&
+        (!rgb || getComputedStyle(t).backgroundImage.includes(rgb)));
+}"""
+
+_LISTEN_JS = """([name, origin]) => {
+    const registry = window.__harnessEvents = window.__harnessEvents || {};
+    const key = name + ':' + Date.now() + ':' + Math.random();
+    registry[key] = null;
+    const listener = (e) => {
+        // With `origin`, only events dispatched by a matching element count (not ones bubbling up from children).
+        const target = e.composedPath()[0];
+        if (origin && !(target instanceof Element && target.matches(origin))) return;
+        registry[key] = true;
+        document.removeEventListener(name, listener, { capture: true });
+    };
+    document.addEventListener(name, listener, { capture: true });
+    return key;
+}"""
+
+_EVENT_OR_ERROR_JS = """([key, errorRgb]) => {
+    const registry = window.__harnessEvents || {};
+    if (registry[key]) return 'event';
+    const failed = Array.from(document.querySelectorAll('.toastify'))
+        .some(t => getComputedStyle(t).backgroundImage.includes(errorRgb));
+    return failed ? 'error' : null;
+}"""
+
+_EDITOR_IDLE_JS = """() => {
+    const el = document.querySelector('lesson-editor');
+    if (!el) return true;
+    // _debouncedSave sets isSaving as soon as a change is queued and clears it after updateDoc resolves.
+    return !el.isSaving && Object.keys(el._pendingUpdates || {}).length === 0;
+}"""
+
+
+def wait_for_lit_update(page, selector, timeout=None):
+    """Waits until the Lit element matched by `selector` has flushed its pending renders."""
+    locator = page.locator(selector).first
+    locator.wait_for(state="attached", timeout=timeout or TIMEOUTS["card"])
+    return locator.evaluate(_LIT_UPDATE_JS)
+
+
+def wait_for_toast(page, text=None, kind=None, timeout=None):
+    """Waits for a Toastify notification, optionally matching its text and kind (success/error/warning/info)."""
+    rgb = TOAST_COLORS[kind] if kind else None
+    page.wait_for_function(_TOAST_JS, arg=[text, rgb], timeout=timeout or TIMEOUTS["toast"])
+
+
+def wait_for_url_change(page, previous_url, timeout=None):
+    """Waits until the page URL (including the hash route) differs from `previous_url`. Returns the new URL."""
+    page.wait_for_function("prev => location.href !== prev", arg=previous_url,
+                           timeout=timeout or TIMEOUTS["navigation"])
+    return page.url
+
+
+@contextmanager
+def expect_url_change(page, timeout=None):
+    previous = page.url
+    yield
+    wait_for_url_change(page, previous, timeout)
+
+
+@contextmanager
+def expect_dom_event(page, name, timeout=None, origin=None):
+    """
+    Listens for a (bubbling, composed) DOM event dispatched during the block
+    and waits for it afterwards; with `origin`, only events dispatched by an
+    element matching that selector count. Raises if an error toast shows up first.
+    """
+    key = page.evaluate(_LISTEN_JS, [name, origin])
+    yield
+    outcome = page.wait_for_function(_EVENT_OR_ERROR_JS, arg=[key, TOAST_COLORS["error"]],
+                                     timeout=timeout or TIMEOUTS["save"]).json_value()
+    if outcome == "error":
+        raise Exception(f"Error toast shown while waiting for '{name}'")
+
+
+@contextmanager
+def expect_lesson_saved(page, timeout=None):
+    """
+    lesson-editor dispatches 'lesson-updated' only after setDoc/updateDoc has
+    been acknowledged, so the block's save has reached Firestore when this returns.
+    The child editors and professor-header-editor dispatch their own
+    'lesson-updated' on every edit; those bubble through lesson-editor and are ignored.
+    """
+    with expect_dom_event(page, "lesson-updated", timeout, origin="lesson-editor"):
+        yield
+
+
+def wait_for_editor_idle(page, timeout=None):
+    """Waits until lesson-editor has no debounced auto-save pending or in flight."""
+    page.wait_for_function(_EDITOR_IDLE_JS, timeout=timeout or TIMEOUTS["save"])
+
+
+def wait_for_firestore_ack(collection, doc_id, after=None, predicate=None, fields=None, timeout=None, metric=None):
+    """
+    Server-side confirmation: waits until the emulator holds a version of the
+    document newer than `after` that satisfies `predicate`. Returns its fields.
+    """
+    timeout_s = (timeout or TIMEOUTS["save"]) / 1000.0
+    return wait_for_document(collection, doc_id, predicate=predicate, after=after, fields=fields,
+                             timeout=timeout_s, metric=metric)
+
+
+_JOIN_RESULT_JS = """() => {
+    const input = document.querySelector("input[placeholder='CODE']");
+    if (!input) return 'joined';
+    const error = input.parentElement.querySelector('.text-red-500');
+    return error ? 'error:' + error.textContent.trim() : null;
+}"""
+
+
+def wait_for_join_result(page, timeout=None):
+    """
+    After submitting a join code: the modal closes on success and shows an
+    inline error otherwise. Returns (joined, error_message).
+    """
+    outcome = page.wait_for_function(_JOIN_RESULT_JS, timeout=timeout or TIMEOUTS["save"]).json_value()
+    if outcome == "joined":
+        return True, None
+    return False, outcome[len("error:"):]
+
+
+_LESSON_ID_JS = """() => {
+    const editor = document.querySelector('lesson-editor');
+    const header = document.querySelector('professor-header-editor');
+    return editor?.currentLessonId || editor?.lesson?.id || header?.lesson?.id || header?.lesson?.uid || null;
+}"""
+
+
+def wait_for_lesson_id(page, timeout=None):
+    """The open lesson's Firestore id, as soon as the editor (or its header) knows it."""
+    return page.wait_for_function(_LESSON_ID_JS, timeout=timeout or TIMEOUTS["card"]).json_value()
@@ -0,0 +1,302 @@
+"""
+Crisis broadcast fan-out benchmark.
+
+act_4_crisis checks one student page. This attaches 10, 50 and 200 student
+pages to one project lesson (each a signed-in student on
+#student/class/<group>/lesson/<lesson>, so each runs its own onSnapshot on
+lessons/<id>), injects a crisis with triggerCrisis and clears it with
+resolveCrisis, and measures for every page:
+
+    time-to-overlay   the activeCrisis write lands -> the red crisis header is visible
+    time-to-resolve   the activeCrisis delete lands -> the overlay is gone
+
+A write "lands" at the lesson's updateTime, read back once the callable
+returns (the call's return time if that read fails). triggerCrisis generates
+the scenario before it writes, so the call latency is reported on its own
+and not counted into time-to-overlay. Pages record the moments themselves
+(a MutationObserver installed with add_init_script stamps Date.now()), so
+waiting on 200 pages adds no polling skew. The report gives p50/p90/p99/max, the spread between the first and the
+last student, the slowest pages, and students that never saw it.
+
+    python -m harness.crisis_fanout [--sizes 10,50,200] [--rounds 3] [--per-context 1]
+
+Pages are added incrementally (the 50 include the first 10). `--per-context`
+opens several tabs per student context to reach large sizes with fewer
+contexts; every tab still holds its own listener. Results go to
+.harness/crisis/<timestamp>.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from harness.bulk import rest_firestore_bulk_write
+from harness.callables import call_function
+from harness.emulator import STATE_DIR
+from harness.seeding import WorkerPool
+from harness.trace import TRACE, span
+from harness.waiters import get_document_with_meta, parse_update_time, percentile
+
+RESULTS_DIR = os.path.join(STATE_DIR, "crisis")
+PASSWORD = "password123"
+OVERLAY_SELECTOR = "student-project-view .bg-red-600"
+
+# Stamps (Date.now()) every time the crisis header appears or disappears.
+CRISIS_OBSERVER_JS = """(() => {
+    if (window.__harnessCrisis) return;
+    const state = window.__harnessCrisis = { shown: [], hidden: [] };
+    let visible = false;
+    const check = () => {
+        const el = document.querySelector(SELECTOR);
+        const now = !!(el && el.getClientRects().length);
+        if (now !== visible) {
+            visible = now;
+            (now ? state.shown : state.hidden).push(Date.now());
+        }
+    };
+    new MutationObserver(check).observe(document, { childList: true, subtree: true });
+})();""".replace("SELECTOR", json.dumps(OVERLAY_SELECTOR))
+
+_STATE_JS = "() => window.__harnessCrisis"
+
+
+class FanoutClass:
+    """A professor, one group, a project lesson assigned to it, and the enrolled students."""
+
+    def __init__(self, students, run_id=None, concurrency=16):
+        from harness.login import provision_account
+
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.professor = provision_account(f"crisis_prof_{self.run_id}@profesor.cz", PASSWORD, "professor",
+                                           "Crisis Professor")
+        self.group_id = f"crisis_group_{self.run_id}"
+        self.lesson_id = f"crisis_lesson_{self.run_id}"
+        self.emails = [f"crisis_student_{self.run_id}_{i}@example.com" for i in range(students)]
+
+        async def provision_all():
+            with WorkerPool(concurrency) as workers:
+                students = await asyncio.gather(*(
+                    workers.run(provision_account, email, PASSWORD, "student", "Crisis Student")
+                    for email in self.emails))
+            print(f"[CRISIS] provisioned {len(students)} students, peak {workers.peak} in flight "
+                  f"(concurrency {concurrency})")
+            return students
+
+        self.students = asyncio.run(provision_all())
+        ops = [
+            ("groups", self.group_id, {"name": f"Crisis Group {self.run_id}", "ownerId": self.professor.uid,
+                                       "joinCode": self.run_id[:6].upper(),
+                                       "studentIds": [s.uid for s in self.students]}, None),
+            ("lessons", self.lesson_id, {
+                "title": "Crisis fan-out project", "topic": "Fan-out", "type": "project",
+                "ownerId": self.professor.uid, "assignedToGroups": [self.group_id], "isPublished": True,
+                "projectData": {
+                    "roles": [{"id": "r1", "title": "Project Manager", "description": "Leads.", "skills": []}],
+                    "milestones": [{"id": "m1", "title": "Kickoff", "description": "Start."}],
+                },
+            }, None),
+        ]
+        for s in self.students:
+            ops.append(("users", s.uid, {"memberOfGroups": [self.group_id]}, ["memberOfGroups"]))
+            ops.append(("students", s.uid, {"memberOfGroups": [self.group_id]}, ["memberOfGroups"]))
+        result = rest_firestore_bulk_write(ops)
+        if not result.ok:
+            raise Exception(f"Seeding failed: {result.failures}")
+
+    @property
+    def lesson_url(self):
+        from harness import ui
+        return f"{ui.BASE_URL}/#student/class/{self.group_id}/lesson/{self.lesson_id}"
+
+
+class FanoutResult:
+    """Per-page latencies of one size, over all rounds."""
+
+    def __init__(self, size):
+        self.size = size
+        self.overlay = []     # seconds, one per page and round
+        self.resolve = []
+        self.missed = {"overlay": 0, "resolve": 0}
+        self.slowest = []     # (seconds, page index, round) for the overlay
+        self.trigger_seconds = []
+        self.resolve_seconds = []
+
+    def summary(self):
+        def dist(values):
+            return {"n": len(values), **{f"p{p}": percentile(values, p) for p in (50, 90, 99)},
+                    "max": max(values) if values else None,
+                    "spread": max(values) - min(values) if values else None}
+        return {"size": self.size, "overlay": dist(self.overlay), "resolve": dist(self.resolve),
+                "missed": self.missed, "triggerCall": percentile(self.trigger_seconds, 50),
+                "resolveCall": percentile(self.resolve_seconds, 50),
+                "slowest": sorted(self.slowest, reverse=True)[:5]}
+
+    def report(self, prefix="[CRISIS]"):
+        s = self.summary()
+        print(f"{prefix} {self.size} listeners (triggerCrisis {_fmt(s['triggerCall'])}, "
+              f"resolveCrisis {_fmt(s['resolveCall'])} per call, median):")
+        for label in ("overlay", "resolve"):
+            d = s[label]
+            print(f"{prefix}   time-to-{label:8} p50 {_fmt(d['p50'])}  p90 {_fmt(d['p90'])}  p99 {_fmt(d['p99'])}  "
+                  f"max {_fmt(d['max'])}  spread {_fmt(d['spread'])}  ({d['n']} seen, {s['missed'][label]} missed)")
+        if s["slowest"]:
+            tail = ", ".join(f"page {i} round {r}: {sec:.2f}s" for sec, i, r in s["slowest"][:3])
+            print(f"{prefix}   slowest overlays: {tail}")
+
+
+def _fmt(seconds):
+    return "-" if seconds is None else f"{seconds:.2f}s"
+
+
+async def _open_pages(browser, fanout, start, count, per_context, timeout):
+    """Opens listener pages start..start+count-1 (student i // per_context) and waits for the project view."""
+    from harness.login import login_state_async
+
+    contexts = {}
+    pages = []
+    for i in range(start, start + count):
+        student = i // per_context
+        if student not in contexts:
+            email = fanout.emails[student % len(fanout.emails)]
+            state = await login_state_async(browser, "student", email, PASSWORD, "Crisis Student")
+            context = await browser.new_context(storage_state=state)
+            await context.add_init_script(CRISIS_OBSERVER_JS)
+            contexts[student] = context
+        pages.append(await contexts[student].new_page())
+
+    sem = asyncio.Semaphore(10)
+
+    async def load(page):
+        async with sem:
+            await page.goto(fanout.lesson_url)
+            await page.wait_for_selector("student-project-view", state="attached", timeout=timeout)
+
+    await asyncio.gather(*(load(p) for p in pages))
+    return list(contexts.values()), pages
+
+
+async def _wait_all(pages, key, count, timeout):
+    """Waits until every page has stamped `key` `count` times (or the timeout); returns their states."""
+    deadline = time.monotonic() + timeout
+    while True:
+        states = await asyncio.gather(*(p.evaluate(_STATE_JS) for p in pages), return_exceptions=True)
+        pending = [s for s in states if isinstance(s, Exception) or not s or len(s[key]) < count]
+        if not pending or time.monotonic() >= deadline:
+            return states
+        await asyncio.sleep(0.25)
+
+
+def _landed_at(fanout, fallback):
+    """Wall time of the lesson's last write (its updateTime); `fallback` when it cannot be read."""
+    try:
+        _, update_time = get_document_with_meta("lessons", fanout.lesson_id, fields=["activeCrisis"])
+    except Exception:
+        return fallback
+    if not update_time:
+        return fallback
+    base, nanos = parse_update_time(update_time)
+    return datetime.fromisoformat(base + "+00:00").timestamp() + nanos / 1e9
+
+
+async def measure(pages, fanout, result, round_no, timeout):
+    """One trigger/resolve round over all pages."""
+    shown_before = round_no  # stamps are reset per size; every earlier round left one shown and one hidden
+
+    with span("crisis_trigger", key=str(result.size)):
+        started = time.monotonic()
+        await asyncio.to_thread(call_function, "triggerCrisis",
+                                {"lessonId": fanout.lesson_id, "milestoneTitle": "Kickoff"}, session=fanout.professor)
+        result.trigger_seconds.append(time.monotonic() - started)
+        landed = await asyncio.to_thread(_landed_at, fanout, time.time())
+        states = await _wait_all(pages, "shown", shown_before + 1, timeout)
+    for i, state in enumerate(states):
+        if isinstance(state, Exception) or not state or len(state["shown"]) <= shown_before:
+            result.missed["overlay"] += 1
+            continue
+        seconds = state["shown"][shown_before] / 1000.0 - landed
+        result.overlay.append(seconds)
+        result.slowest.append((seconds, i, round_no + 1))
+
+    with span("crisis_resolve", key=str(result.size)):
+        started = time.monotonic()
+        await asyncio.to_thread(call_function, "resolveCrisis", {"lessonId": fanout.lesson_id},
+                                session=fanout.students[0])
+        result.resolve_seconds.append(time.monotonic() - started)
+        landed = await asyncio.to_thread(_landed_at, fanout, time.time())
+        states = await _wait_all(pages, "hidden", shown_before + 1, timeout)
+    for state in states:
+        if isinstance(state, Exception) or not state or len(state["hidden"]) <= shown_before:
+            result.missed["resolve"] += 1
+            continue
+        result.resolve.append(state["hidden"][shown_before] / 1000.0 - landed)
+
+
+async def run_benchmark(sizes=(10, 50, 200), rounds=3, per_context=1, headless=True, timeout=30.0):
+    from playwright.async_api import async_playwright
+
+    sizes = sorted(sizes)
+    # Seeding runs its own event loop, so it goes to a worker thread.
+    fanout = await asyncio.to_thread(FanoutClass, -(-sizes[-1] // per_context))
+    print(f"[CRISIS] Seeded {len(fanout.emails)} students, lesson {fanout.lesson_id}")
+    results = []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless, args=["--no-sandbox"])
+        contexts, pages = [], []
+        try:
+            for size in sizes:
+                with span("crisis_listeners", key=str(size)):
+                    new_contexts, new_pages = await _open_pages(browser, fanout, len(pages), size - len(pages),
+                                                                per_context, timeout * 1000)
+                contexts += new_contexts
+                pages += new_pages
+                # A page added at a later size has no stamps from earlier rounds; start everyone level.
+                await asyncio.gather(*(pg.evaluate("() => { window.__harnessCrisis.shown = []; "
+                                                   "window.__harnessCrisis.hidden = []; }") for pg in pages))
+                print(f"[CRISIS] {len(pages)} listeners attached")
+                result = FanoutResult(size)
+                for r in range(rounds):
+                    await measure(pages, fanout, result, r, timeout)
+                result.report()
+                results.append(result)
+        finally:
+            await browser.close()
+    return results
+
+
+def save_results(results, path=None):
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{**r.summary(), "overlaySamples": r.overlay, "resolveSamples": r.resolve} for r in results],
+                  f, indent=1)
+    print(f"[CRISIS] Results written to {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure crisis broadcast fan-out to many student listeners.")
+    parser.add_argument("--sizes", default="10,50,200")
+    parser.add_argument("--rounds", type=int, default=3, help="trigger/resolve rounds per size")
+    parser.add_argument("--per-context", type=int, default=1, help="listener tabs per student context")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for every page per step")
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = asyncio.run(run_benchmark(sizes, args.rounds, args.per_context, not args.headed, args.timeout))
+    print("[CRISIS] Summary:")
+    for result in results:
+        result.report()
+    save_results(results)
+    TRACE.save()
+    if any(r.missed["overlay"] or r.missed["resolve"] for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Pooled REST client for the Firebase Auth (9099) and Firestore (8080) emulators.
+
+All helpers go through one shared `EmulatorClient`, which keeps a keep-alive
+`requests.Session` per process so that seeding and verification runs reuse TCP
+connections instead of opening a new one for every call.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from harness.codec import Reference, decode_fields, loads_run_query, to_fields, to_value
+
+# --- CONFIGURATION ---
+PROJECT_ID = os.environ.get("EMULATOR_PROJECT_ID", "ai-sensei-czu-pilot")
+EMULATOR_HOST = os.environ.get("EMULATOR_HOST", "localhost")
+API_KEY = "fake-api-key"
+
+AUTH_PORT = 9099
+FIRESTORE_PORT = 8080
+
+# Run-to-run state (token cache, baselines, traces) lives here; git-ignored.
+STATE_DIR = os.environ.get(
+    "HARNESS_STATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".harness"),
+)
+
+# (connect, read) timeouts in seconds; override with EMULATOR_HTTP_TIMEOUT=<read>
+DEFAULT_TIMEOUT = (3.05, float(os.environ.get("EMULATOR_HTTP_TIMEOUT", "30")))
+
+
+class AdminAuth:
+    """The emulators' admin credential: bypasses firestore.rules entirely."""
+
+    def headers(self):
+        return {"Authorization": "Bearer owner"}
+
+
+ADMIN_AUTH = AdminAuth()
+
+
+class EmulatorClient:
+    """
+    Keep-alive HTTP client for the local emulators.
+
+    Retries only on connection-level failures (reset/refused/stale pooled
+    socket) with a short linear backoff; HTTP error statuses are returned to
+    the caller unchanged so the helpers keep their existing semantics.
+
+    `auth` supplies the Authorization header for Firestore requests: the
+    admin bypass by default, or a user session (see harness.auth) so the
+    request is evaluated against firestore.rules.
+    """
+
+    def __init__(self, host=EMULATOR_HOST, project_id=PROJECT_ID, api_key=API_KEY,
+                 timeout=DEFAULT_TIMEOUT, retries=3, backoff=0.2, pool_size=32, auth=ADMIN_AUTH):
+        self.host = host
+        self.project_id = project_id
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.auth = auth
+
+        self.auth_url = f"http://{host}:{AUTH_PORT}/identitytoolkit.googleapis.com/v1"
+        self.auth_emulator_url = f"http://{host}:{AUTH_PORT}/emulator/v1/projects/{project_id}"
+        self.securetoken_url = f"http://{host}:{AUTH_PORT}/securetoken.googleapis.com/v1"
+        self._firestore_origin = f"http://{host}:{FIRESTORE_PORT}/"
+        self.documents_root = f"projects/{project_id}/databases/(default)/documents"
+        self.firestore_url = f"http://{host}:{FIRESTORE_PORT}/v1/{self.documents_root}"
+
+        self.session = requests.Session()
+        # One pool per emulator host:port; pool_size bounds concurrent sockets per host.
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+    def document_name(self, collection, doc_id):
+        """Full resource name as used inside commit/batchWrite bodies."""
+        return f"{self.documents_root}/{collection}/{doc_id}"
+
+    def reference(self, collection, doc_id):
+        """Value for a Firestore reference field pointing at collection/doc_id."""
+        return Reference(self.document_name(collection, doc_id))
+
+    def with_auth(self, auth):
+        """A client sharing this one's connection pool but sending `auth` to Firestore."""
+        clone = copy.copy(self)
+        clone.auth = auth
+        return clone
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if self.auth is not None and url.startswith(self._firestore_origin):
+            kwargs["headers"] = {**self.auth.headers(), **(kwargs.get("headers") or {})}
+        for attempt in range(self.retries + 1):
+            try:
+                return self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == self.retries:
+                    raise
+                print(f"[HTTP] {method} {url} connection error ({e.__class__.__name__}), retry {attempt + 1}/{self.retries}")
+                time.sleep(self.backoff * (attempt + 1))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the process-wide client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = EmulatorClient()
+    return _client
+
+
+def set_client(client):
+    """Replaces the process-wide client (e.g. with custom timeouts)."""
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
+
+
+# --- Authentication ---
+
+def rest_auth_signup(email, password, client=None):
+    client = client or get_client()
+    url = f"{client.auth_url}/accounts:signUp?key={client.api_key}"
+    try:
+        r = client.post(url, json={
+            "email": email,
+            "password": password,
+            "returnSecureToken": True
+        })
+        r.raise_for_status()
+        return r.json()
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 400 and "EMAIL_EXISTS" in e.response.text:
+             return rest_auth_signin(email, password, client=client)
+        print(f"Auth Signup Error: {e.response.text}")
+        raise
+
+def rest_auth_signin(email, password, client=None):
+    client = client or get_client()
+    url = f"{client.auth_url}/accounts:signInWithPassword?key={client.api_key}"
+    try:
+        r = client.post(url, json={
+            "email": email,
+            "password": password,
+            "returnSecureToken": True
+        })
+        r.raise_for_status()
+        return r.json()
+    except requests.exceptions.HTTPError as e:
+        print(f"Auth Signin Error: {e.response.text}")
+        raise
+
+def rest_set_claims(localId, claims, client=None):
+    """Sets the account's custom claims with the admin accounts:update call (as the Admin SDK does)."""
+    client = client or get_client()
+    url = f"{client.auth_url}/projects/{client.project_id}/accounts:update"
+    r = client.post(url, headers=ADMIN_AUTH.headers(), json={
+        "localId": localId,
+        "customAttributes": json.dumps(claims)
+    })
+    if r.status_code != 200:
+        raise Exception(f"Setting claims on {localId} failed ({r.status_code}): {r.text[:300]}")
+    return r.json()
+
+
+# --- Firestore ---
+
+def rest_firestore_create(collection, doc_id, data, client=None):
+    client = client or get_client()
+    fields = to_fields(data)
+    url = f"{client.firestore_url}/{collection}?documentId={doc_id}"
+    r = client.post(url, json={"fields": fields})
+    if r.status_code == 409: # Already exists
+        rest_firestore_update(collection, doc_id, data, client=client)
+
+def rest_firestore_update(collection, doc_id, data, client=None):
+    client = client or get_client()
+    fields = to_fields(data)
+    mask = []
+    for k in data.keys():
+        mask.append(f"updateMask.fieldPaths={k}")
+    query = "&".join(mask)
+    url = f"{client.firestore_url}/{collection}/{doc_id}?{query}"
+    r = client.patch(url, json={"fields": fields})
+    # The written document carries updateTime, which change waiters compare against.
+    return r.json() if r.status_code == 200 else None
+
+def rest_firestore_commit(writes, client=None):
+    """Applies a list of Write objects atomically via documents:commit."""
+    client = client or get_client()
+    r = client.post(f"{client.firestore_url}:commit", json={"writes": writes})
+    if r.status_code != 200:
+        raise Exception(f"Commit failed ({r.status_code}): {r.text[:300]}")
+    return r.json()
+
+def rest_firestore_get(collection, doc_id, fields=None, client=None):
+    """
+    Reads one document. `fields` limits the response to those field paths
+    (a document mask), so checks that need only `status` skip the rest.
+    """
+    client = client or get_client()
+    url = f"{client.firestore_url}/{collection}/{doc_id}"
+    params = [("mask.fieldPaths", f) for f in fields] if fields is not None else None
+    r = client.get(url, params=params)
+    if r.status_code == 200:
+        return decode_fields(r.json().get("fields"))
+    return None
+
+def rest_firestore_query(collection, field, operator, value, client=None):
+    client = client or get_client()
+    url = f"{client.firestore_url}:runQuery"
+    body = {
+        "structuredQuery": {
+            "from": [{"collectionId": collection}],
+            "where": {
+                "fieldFilter": {
+                    "field": {"fieldPath": field},
+                    "op": operator,
+                    "value": to_value(value)
+                }
+            }
+        }
+    }
+    r = client.post(url, json=body)
+    if r.status_code == 200:
+        return loads_run_query(r.content)
+    return []
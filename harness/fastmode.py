@@ -0,0 +1,275 @@
+"""
+Resource-blocking fast mode for functional runs.
+
+The checks never look at web fonts, the firebase-analytics module, YouTube
+embeds or AI-generated images, but every page load pays for them. FastMode
+installs Playwright routes that stub or abort them:
+
+    fonts             fonts.googleapis.com CSS -> empty stylesheet, font files aborted
+    analytics         firebase-analytics.js -> stub ES module (it is a static import of
+                      firebase-init.js, so it cannot simply be aborted), gtag/GA aborted
+    youtube           youtube.com/embed iframes -> blank document, ytimg/googlevideo aborted
+    generated_images  images from the Storage emulator, firebasestorage or placehold.co -> 1x1 PNG
+
+Rules are picked per profile: BASE_RULES for every page, plus
+CONTENT_RULES[profile] for a content type (e.g. "video" adds youtube) or a
+persona ("student" sees every content type). Routes go on a context or a page:
+
+    pool = ContextPool(browser, setup=FAST_MODE.context_setup)    # profile = persona role
+    run_matrix(..., page_setup=lambda page, ct: FAST_MODE.apply(page, ct["type"]))
+    FAST_MODE.report()
+
+HARNESS_FAST_MODE=0 turns it off for full-fidelity runs;
+HARNESS_FAST_MODE_RULES=fonts,analytics limits it to those rules.
+
+Each rule counts the requests it intercepted. How much load time a rule
+saves is measured by the bench command, which loads a page with every rule
+on, with each rule left out in turn, and with fast mode off:
+
+    python -m harness.fastmode bench [--url URL] [--selector SEL] [--runs 3]
+"""
+
+import argparse
+import base64
+import json
+import os
+import threading
+import time
+
+from harness.emulator import STATE_DIR
+
+BENCH_FILE = os.path.join(STATE_DIR, "fastmode.json")
+
+_ANALYTICS_STUB = """
+export const getAnalytics = () => ({});
+export const initializeAnalytics = () => ({});
+export const isSupported = async () => false;
+export const logEvent = () => {};
+export const setUserId = () => {};
+export const setUserProperties = () => {};
+export const setAnalyticsCollectionEnabled = () => {};
+"""
+
+_PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+_CORS = {"Access-Control-Allow-Origin": "*"}
+
+
+def _fulfill(body, content_type):
+    def handler(route):
+        route.fulfill(status=200, body=body, content_type=content_type, headers=_CORS)
+    return handler
+
+
+def _abort(route):
+    route.abort()
+
+
+def _generated_image(url):
+    return ":9199/" in url or "firebasestorage.googleapis.com" in url or "placehold.co" in url
+
+
+def _image_only(route):
+    if route.request.resource_type == "image":
+        route.fulfill(status=200, body=_PIXEL_PNG, content_type="image/png", headers=_CORS)
+    else:
+        route.fallback()
+
+
+# rule -> [(url pattern or predicate, handler)]
+RULES = {
+    "fonts": [
+        ("https://fonts.googleapis.com/**", _fulfill("", "text/css")),
+        ("https://fonts.gstatic.com/**", _abort),
+    ],
+    "analytics": [
+        ("**/firebase-analytics.js", _fulfill(_ANALYTICS_STUB, "application/javascript")),
+        ("https://www.googletagmanager.com/**", _abort),
+        ("https://www.google-analytics.com/**", _abort),
+    ],
+    "youtube": [
+        ("https://www.youtube.com/embed/**", _fulfill("<!doctype html><html><body></body></html>", "text/html")),
+        ("https://www.youtube-nocookie.com/embed/**", _fulfill("<!doctype html><html><body></body></html>", "text/html")),
+        ("https://i.ytimg.com/**", _abort),
+        ("https://*.googlevideo.com/**", _abort),
+    ],
+    "generated_images": [
+        (_generated_image, _image_only),
+    ],
+}
+
+BASE_RULES = ("fonts", "analytics")
+
+# Extra rules for pages that render a content type (and the student views that show all of them).
+CONTENT_RULES = {
+    "video": ("youtube",),
+    "comic": ("generated_images",),
+    "presentation": ("generated_images",),
+    "flashcards": ("generated_images",),
+    "student": ("youtube", "generated_images"),
+}
+
+
+def enabled():
+    return os.environ.get("HARNESS_FAST_MODE", "1") not in ("0", "off", "false")
+
+
+class FastMode:
+    """Installs the blocking routes and counts what each rule intercepted. Thread-safe."""
+
+    def __init__(self, enabled=None, allowed=None):
+        self.enabled = enabled
+        if allowed is None and os.environ.get("HARNESS_FAST_MODE_RULES"):
+            allowed = [r.strip() for r in os.environ["HARNESS_FAST_MODE_RULES"].split(",") if r.strip()]
+        self.allowed = set(allowed) if allowed is not None else None
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    @property
+    def active(self):
+        return enabled() if self.enabled is None else self.enabled
+
+    def rules_for(self, profile=None):
+        """Rule names of a profile: BASE_RULES plus CONTENT_RULES[profile]."""
+        names = BASE_RULES + CONTENT_RULES.get(profile, ())
+        return [n for n in names if self.allowed is None or n in self.allowed]
+
+    def _counted(self, name, handler):
+        def wrapped(route):
+            with self._lock:
+                self.counts[name] = self.counts.get(name, 0) + 1
+            handler(route)
+        return wrapped
+
+    def apply(self, target, profile=None, rules=None):
+        """
+        Routes the profile's rules on a page or context. Returns the applied rule
+        names (none when fast mode is off).
+        """
+        if not self.active:
+            return []
+        names = list(rules) if rules is not None else self.rules_for(profile)
+        for name in names:
+            for pattern, handler in RULES[name]:
+                target.route(pattern, self._counted(name, handler))
+        return names
+
+    def context_setup(self, context, key=None):
+        """ContextPool setup hook: the profile is the persona role of keys like "student:<email>"."""
+        self.apply(context, key.split(":", 1)[0] if key else None)
+
+    def report(self, prefix="[FAST]"):
+        if not self.active:
+            print(f"{prefix} Fast mode off (full-fidelity run).")
+            return
+        saved = _load_bench()
+        for name in RULES:
+            per_load = saved.get(name)
+            estimate = f", ~{per_load:.2f}s saved per page load (bench)" if per_load is not None else ""
+            print(f"{prefix} {name:16} {self.counts.get(name, 0):5d} requests intercepted{estimate}")
+        if not saved:
+            print(f"{prefix} Run `python -m harness.fastmode bench` for per-rule load-time savings.")
+
+
+FAST_MODE = FastMode()
+
+
+def _load_bench():
+    try:
+        with open(BENCH_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("saved", {})
+    except (OSError, ValueError):
+        return {}
+
+
+# --- Bench ---
+
+def _load_time(browser, url, selector, rules, quiet=1.0, timeout=30.0):
+    """Seconds from navigation until `selector` is visible and the network has been quiet for `quiet` s."""
+    context = browser.new_context()
+    try:
+        mode = FastMode(enabled=bool(rules))
+        mode.apply(context, rules=rules)
+        page = context.new_page()
+        last = [time.monotonic()]
+
+        def touch(_):
+            last[0] = time.monotonic()
+
+        page.on("request", touch)
+        page.on("requestfinished", touch)
+        page.on("requestfailed", touch)
+        started = time.monotonic()
+        page.goto(url)
+        page.wait_for_selector(selector, state="visible", timeout=timeout * 1000)
+        visible = time.monotonic()
+        deadline = started + timeout
+        while time.monotonic() < deadline and time.monotonic() - last[0] < quiet:
+            page.wait_for_timeout(50)
+        return max(visible, last[0]) - started
+    finally:
+        context.close()
+
+
+def bench(url, selector, runs=3, headless=True):
+    """
+    Median load time with all rules, with each rule left out, and with fast
+    mode off. A rule's saving is (all rules but it) - (all rules).
+    """
+    from playwright.sync_api import sync_playwright
+    from harness.waiters import percentile
+
+    all_rules = list(RULES)
+    configs = {"all": all_rules, "off": []}
+    for name in all_rules:
+        configs[f"-{name}"] = [r for r in all_rules if r != name]
+
+    samples = {key: [] for key in configs}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless, args=["--no-sandbox"])
+        try:
+            for i in range(runs):
+                for key, rules in configs.items():
+                    samples[key].append(_load_time(browser, url, selector, rules))
+                print(f"[FAST] bench run {i + 1}/{runs} done")
+        finally:
+            browser.close()
+
+    medians = {key: percentile(values, 50) for key, values in samples.items()}
+    saved = {name: max(0.0, medians[f"-{name}"] - medians["all"]) for name in all_rules}
+    result = {"url": url, "selector": selector, "runs": runs, "medians": medians, "saved": saved,
+              "total_saved": medians["off"] - medians["all"]}
+    os.makedirs(os.path.dirname(BENCH_FILE), exist_ok=True)
+    with open(BENCH_FILE, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=1)
+
+    print(f"[FAST] {url} until {selector} (median of {runs}):")
+    print(f"[FAST]   full fidelity {medians['off']:.2f}s, fast mode {medians['all']:.2f}s "
+          f"({result['total_saved']:+.2f}s saved)")
+    for name in all_rules:
+        print(f"[FAST]   {name:16} saves {saved[name]:.2f}s")
+    return result
+
+
+def main():
+    from harness import ui
+    parser = argparse.ArgumentParser(description="Measure the load time each fast-mode rule saves.")
+    parser.add_argument("command", choices=["bench", "rules"])
+    parser.add_argument("--url", default=f"{ui.BASE_URL}/")
+    parser.add_argument("--selector", default="login-view")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "rules":
+        print(f"[FAST] base: {', '.join(BASE_RULES)}")
+        for content_type, names in CONTENT_RULES.items():
+            print(f"[FAST] {content_type}: {', '.join(names)}")
+        return
+    bench(args.url, args.selector, args.runs, headless=not args.headed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Named emulator baselines that can be restored before every scenario.
+
+A baseline is a seed function registered under a name. The first
+`use_baseline(name)` clears both emulators, runs the seed and snapshots the
+result to .harness/baselines/<name>.json (all Firestore documents, including
+subcollections, plus the Auth accounts). Later calls clear Firestore and write
+the snapshot back in bulk, and only touch Auth when its accounts differ from
+the snapshot, so a reset takes seconds instead of a UI registration flow.
+
+The emulators have no runtime import (the hub's export only writes a
+directory for the next start), so snapshots go through the REST API; if the
+Auth emulator rejects an account import, the baseline is re-seeded instead.
+
+    python -m harness.fixtures list
+    python -m harness.fixtures restore classroom
+
+The verify/diagnostic scripts restore the baseline named by HARNESS_BASELINE
+before their scenario and then sign in as its first seeded professor and
+student (baseline_from_env) instead of creating fresh per-run accounts.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from harness.auth import get_token_cache
+from harness.bulk import rest_firestore_bulk_put_raw
+from harness.emulator import ADMIN_AUTH, AUTH_PORT, FIRESTORE_PORT, STATE_DIR, get_client
+from harness.query import stream_query
+
+BASELINE_DIR = os.path.join(STATE_DIR, "baselines")
+
+# Fields of an Auth emulator account record that accounts:batchCreate accepts back.
+_ACCOUNT_FIELDS = (
+    "localId", "email", "emailVerified", "displayName", "photoUrl", "phoneNumber", "disabled",
+    "passwordHash", "salt", "customAttributes", "providerUserInfo", "createdAt", "lastLoginAt",
+)
+
+BASELINES = {}
+
+
+def baseline(name):
+    """Registers a seed function (returning JSON-serialisable metadata) as a named baseline."""
+    def register(fn):
+        BASELINES[name] = fn
+        return fn
+    return register
+
+
+@baseline("empty")
+def _seed_empty():
+    return {}
+
+
+@baseline("classroom")
+def _seed_classroom():
+    from harness.seeding import seed_classroom
+    return asyncio.run(seed_classroom(1, 1, 30, prefix="baseline", seed=1)).to_dict()
+
+
+# --- Emulator state ---
+
+def _identity_admin_url(client):
+    return f"http://{client.host}:{AUTH_PORT}/identitytoolkit.googleapis.com/v1/projects/{client.project_id}"
+
+
+def clear_firestore(client=None):
+    client = client or get_client()
+    url = f"http://{client.host}:{FIRESTORE_PORT}/emulator/v1/projects/{client.project_id}/databases/(default)/documents"
+    client.delete(url).raise_for_status()
+
+
+def clear_auth(client=None):
+    client = client or get_client()
+    client.delete(f"{client.auth_emulator_url}/accounts").raise_for_status()
+    # Cached refresh tokens died with the accounts.
+    get_token_cache().clear()
+
+
+def clear_emulators(client=None):
+    clear_firestore(client)
+    clear_auth(client)
+
+
+def export_documents(client=None):
+    """Every document in the database, subcollections included, as raw resources."""
+    # A kindless all-descendants query from the root spans every collection.
+    query = {"from": [{"allDescendants": True}]}
+    return [
+        {"name": doc["name"], "fields": doc.get("fields") or {}}
+        for doc in stream_query(query, page_size=1000, raw=True, client=client)
+    ]
+
+
+def export_accounts(client=None):
+    client = client or get_client()
+    accounts = []
+    page_token = None
+    while True:
+        params = {"maxResults": 1000}
+        if page_token:
+            params["nextPageToken"] = page_token
+        r = client.get(f"{_identity_admin_url(client)}/accounts:batchGet", params=params, headers=ADMIN_AUTH.headers())
+        r.raise_for_status()
+        data = r.json()
+        for user in data.get("users", []):
+            accounts.append({k: user[k] for k in _ACCOUNT_FIELDS if k in user})
+        page_token = data.get("nextPageToken")
+        if not page_token or not data.get("users"):
+            return accounts
+
+
+def import_accounts(accounts, client=None):
+    """Recreates accounts with their original uids. Returns a list of per-account errors."""
+    client = client or get_client()
+    errors = []
+    for i in range(0, len(accounts), 1000):
+        chunk = accounts[i:i + 1000]
+        r = client.post(f"{_identity_admin_url(client)}/accounts:batchCreate",
+                        json={"users": chunk}, headers=ADMIN_AUTH.headers())
+        if r.status_code != 200:
+            errors.append({"index": i, "message": r.text[:200]})
+            continue
+        errors.extend(r.json().get("error", []))
+    return errors
+
+
+# --- Baselines ---
+
+def _snapshot_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_snapshot(name, meta, client=None):
+    started = time.monotonic()
+    snapshot = {
+        "name": name,
+        "createdAt": time.time(),
+        "meta": meta,
+        "accounts": export_accounts(client),
+        "documents": export_documents(client),
+    }
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    tmp = _snapshot_path(name) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, _snapshot_path(name))
+    print(f"[FIXTURE] Saved baseline '{name}': {len(snapshot['documents'])} documents, "
+          f"{len(snapshot['accounts'])} accounts in {time.monotonic() - started:.1f}s")
+    return snapshot
+
+
+def load_snapshot(name):
+    try:
+        with open(_snapshot_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+
+def seed_baseline(name, client=None):
+    """Clears the emulators, runs the baseline's seed function and snapshots the result."""
+    if name not in BASELINES:
+        raise KeyError(f"Unknown baseline '{name}'. Known: {', '.join(sorted(BASELINES))}")
+    started = time.monotonic()
+    clear_emulators(client)
+    meta = BASELINES[name]() or {}
+    print(f"[FIXTURE] Seeded baseline '{name}' in {time.monotonic() - started:.1f}s")
+    return save_snapshot(name, meta, client)
+
+
+def restore_snapshot(snapshot, client=None):
+    """Puts the emulators back into the snapshot's state. Returns False if Auth could not be restored."""
+    started = time.monotonic()
+
+    current_uids = {a["localId"] for a in export_accounts(client)}
+    wanted_uids = {a["localId"] for a in snapshot["accounts"]}
+    if current_uids != wanted_uids:
+        clear_auth(client)
+        errors = import_accounts(snapshot["accounts"], client)
+        if errors:
+            print(f"[FIXTURE] Account import rejected ({errors[0]}); falling back to re-seeding.")
+            return False
+
+    clear_firestore(client)
+    result = rest_firestore_bulk_put_raw(snapshot["documents"], client=client)
+    if not result.ok:
+        raise Exception(f"Restoring baseline '{snapshot['name']}' failed for {len(result.failures)} documents")
+
+    print(f"[FIXTURE] Restored baseline '{snapshot['name']}' ({len(snapshot['documents'])} documents) "
+          f"in {time.monotonic() - started:.1f}s")
+    return True
+
+
+def use_baseline(name, reseed=False, client=None):
+    """
+    Resets the emulators to the named baseline and returns its metadata
+    (e.g. the seeded accounts and groups).
+    """
+    snapshot = None if reseed else load_snapshot(name)
+    if snapshot is not None and restore_snapshot(snapshot, client):
+        return snapshot["meta"]
+    return seed_baseline(name, client)["meta"]
+
+
+def baseline_personas(meta):
+    """{role: (email, password)} of the first seeded professor and student in a baseline's metadata."""
+    personas = {}
+    for role, key in (("professor", "professors"), ("student", "students")):
+        accounts = meta.get(key) or []
+        if accounts and meta.get("password"):
+            personas[role] = (accounts[0]["email"], meta["password"])
+    return personas
+
+
+def baseline_from_env():
+    """
+    Restores the baseline named by HARNESS_BASELINE, if set, and returns its
+    personas (see baseline_personas); {} when unset or the baseline seeds none.
+    """
+    name = os.environ.get("HARNESS_BASELINE")
+    if not name:
+        return {}
+    personas = baseline_personas(use_baseline(name))
+    for role, (email, _) in personas.items():
+        print(f"[FIXTURE] Using baseline '{name}' {role} {email}")
+    return personas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage named emulator baselines.")
+    parser.add_argument("command", choices=["list", "save", "restore", "reseed", "clear"])
+    parser.add_argument("name", nargs="?", default="empty")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name in sorted(BASELINES):
+            snapshot = load_snapshot(name)
+            state = f"{len(snapshot['documents'])} docs, {len(snapshot['accounts'])} accounts" if snapshot else "not saved"
+            print(f"{name}: {state}")
+    elif args.command == "save":
+        # Snapshot whatever the emulators currently hold under this name.
+        save_snapshot(args.name, {})
+        BASELINES.setdefault(args.name, _seed_empty)
+    elif args.command == "restore":
+        use_baseline(args.name)
+    elif args.command == "reseed":
+        use_baseline(args.name, reseed=True)
+    elif args.command == "clear":
+        clear_emulators()
+        print("[FIXTURE] Emulators cleared.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Concurrent joinClass load: a lecture hall joining one class code at once.
+
+Seeds a professor and a group (harness.seeding), signs up N students, then
+releases them together (or spread over `--ramp` seconds) against the same
+join code. Each student calls joinClass over the callable protocol, retrying
+a failed join up to `--retries` times with a growing backoff, like the
+dashboard's join modal being resubmitted.
+
+    python -m harness.join_load --students 200 --concurrency 50 [--ramp 60]
+
+LoadStats reports joinClass latency percentiles (per call and per student,
+retries included), throughput, and error and retry rates; the run ends by
+checking that the group roster and every users/{uid}.memberOfGroups hold
+exactly the students that joined. The browser variant (one context per
+student through the real join modal) lives in
+verification_scripts/verify_production_master.py --join-load N --join-mode browser.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+import uuid
+
+from harness.auth import get_session, get_token_cache
+from harness.callables import timed_call
+from harness.emulator import EmulatorClient, get_client, rest_firestore_get, set_client
+from harness.seeding import SEED_PASSWORD, Progress, WorkerPool, seed_classroom
+from harness.trace import TRACE, span
+from harness.waiters import percentile
+
+
+class LoadStats:
+    """Join outcomes of one load run. Thread-safe."""
+
+    def __init__(self, label="joinClass"):
+        self.label = label
+        self._lock = threading.Lock()
+        self.calls = []      # seconds per joinClass call (every attempt)
+        self.students = []   # seconds from first attempt to outcome, per student
+        self.attempts = []   # attempts per student
+        self.errors = {}     # error message -> count (every failed attempt)
+        self.failed = 0      # students that never joined
+        self.concurrency = None  # calls allowed in flight
+        self.peak = None         # calls that actually were in flight at once
+        self.started = None
+        self.finished = None
+
+    def start(self):
+        self.started = time.monotonic()
+
+    def stop(self):
+        self.finished = time.monotonic()
+
+    def call(self, seconds, error=None):
+        with self._lock:
+            self.calls.append(seconds)
+            if error:
+                key = error[:120]
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def student(self, seconds, attempts, ok):
+        with self._lock:
+            self.students.append(seconds)
+            self.attempts.append(attempts)
+            if not ok:
+                self.failed += 1
+
+    def summary(self):
+        wall = (self.finished or time.monotonic()) - (self.started or time.monotonic())
+        joined = len(self.students) - self.failed
+        failed_calls = sum(self.errors.values())
+        return {
+            "students": len(self.students),
+            "joined": joined,
+            "failed": self.failed,
+            "calls": len(self.calls),
+            "wall": wall,
+            "throughput": joined / wall if wall > 0 else 0.0,
+            "errorRate": failed_calls / len(self.calls) if self.calls else 0.0,
+            "retryRate": sum(1 for a in self.attempts if a > 1) / len(self.attempts) if self.attempts else 0.0,
+            "call": {f"p{p}": percentile(self.calls, p) for p in (50, 95, 99)},
+            "student": {f"p{p}": percentile(self.students, p) for p in (50, 95, 99)},
+            "maxCall": max(self.calls) if self.calls else None,
+            "concurrency": self.concurrency,
+            "peakInFlight": self.peak,
+        }
+
+    def report(self, prefix="[LOAD]"):
+        s = self.summary()
+        print(f"{prefix} {self.label}: {s['joined']}/{s['students']} students joined in {s['wall']:.1f}s "
+              f"({s['throughput']:.1f} joins/s)")
+        if self.peak is not None:
+            print(f"{prefix}   peak {self.peak} calls in flight (concurrency {self.concurrency})")
+        if self.calls:
+            print(f"{prefix}   per call    p50 {s['call']['p50']:.2f}s  p95 {s['call']['p95']:.2f}s  "
+                  f"p99 {s['call']['p99']:.2f}s  max {s['maxCall']:.2f}s  ({s['calls']} calls)")
+            print(f"{prefix}   per student p50 {s['student']['p50']:.2f}s  p95 {s['student']['p95']:.2f}s  "
+                  f"p99 {s['student']['p99']:.2f}s  (retries included)")
+        print(f"{prefix}   error rate {s['errorRate']:.1%} of calls, retry rate {s['retryRate']:.1%} of students, "
+              f"{s['failed']} gave up")
+        for message, count in sorted(self.errors.items(), key=lambda kv: -kv[1])[:5]:
+            print(f"{prefix}   {count:4d}x {message}")
+
+
+async def create_students(n, prefix, concurrency=32):
+    """Signs up N student accounts concurrently; returns their AuthSessions (setup, not measured)."""
+    sem = asyncio.Semaphore(concurrency)
+    progress = Progress("students", n)
+    workers = WorkerPool(concurrency)
+
+    async def one(i):
+        async with sem:
+            try:
+                session = await workers.run(get_session, f"{prefix}_student_{i}@example.com", SEED_PASSWORD)
+            except Exception as e:
+                print(f"[LOAD] Sign-up {i} failed: {e}")
+                progress.tick(ok=False)
+                return None
+        progress.tick()
+        return session
+
+    with workers:
+        sessions = await asyncio.gather(*(one(i) for i in range(n)))
+    print(f"[LOAD] sign-ups: peak {workers.peak} calls in flight (concurrency {concurrency})")
+    get_token_cache().save()
+    return [s for s in sessions if s]
+
+
+async def _join(session, join_code, stats, retries, backoff, client, workers):
+    started = time.monotonic()
+    for attempt in range(1, retries + 2):
+        seconds, _, error = await workers.run(
+            timed_call, "joinClass", {"joinCode": join_code}, session=session, client=client)
+        stats.call(seconds, error)
+        if not error:
+            stats.student(time.monotonic() - started, attempt, True)
+            return True
+        if attempt <= retries:
+            await asyncio.sleep(backoff * attempt)
+    stats.student(time.monotonic() - started, retries + 1, False)
+    return False
+
+
+async def run_join_load(sessions, join_code, concurrency=50, ramp=0.0, retries=2, backoff=0.5, client=None):
+    """
+    Releases every session's joinClass at once (`ramp` = 0) or spread evenly
+    over `ramp` seconds, at most `concurrency` in flight. Returns LoadStats.
+    """
+    stats = LoadStats()
+    stats.concurrency = concurrency
+    sem = asyncio.Semaphore(concurrency)
+    client = client or get_client()
+    workers = WorkerPool(concurrency)
+
+    async def student(i, session):
+        if ramp:
+            await asyncio.sleep(ramp * i / len(sessions))
+        async with sem:
+            return await _join(session, join_code, stats, retries, backoff, client, workers)
+
+    with span("join_load", students=len(sessions), concurrency=concurrency, ramp=ramp) as record, workers:
+        stats.start()
+        await asyncio.gather(*(student(i, s) for i, s in enumerate(sessions)))
+        stats.stop()
+        stats.peak = workers.peak
+        record["attrs"].update({k: v for k, v in stats.summary().items() if not isinstance(v, dict)})
+    return stats
+
+
+def verify_roster(group_id, uids):
+    """Problems with the group's studentIds and the users' memberOfGroups after the run."""
+    problems = []
+    group = rest_firestore_get("groups", group_id, fields=["studentIds"]) or {}
+    roster = set(group.get("studentIds") or [])
+    missing = [uid for uid in uids if uid not in roster]
+    if missing:
+        problems.append(f"{len(missing)} joined students missing from groups/{group_id}.studentIds")
+    extra = roster - set(uids)
+    if extra:
+        problems.append(f"{len(extra)} unexpected uids in groups/{group_id}.studentIds")
+    unlinked = [uid for uid in uids
+                if group_id not in ((rest_firestore_get("users", uid, fields=["memberOfGroups"]) or {})
+                                    .get("memberOfGroups") or [])]
+    if unlinked:
+        problems.append(f"{len(unlinked)} users/{{uid}}.memberOfGroups without {group_id}")
+    return problems
+
+
+async def main_async(args):
+    prefix = f"join_{uuid.uuid4().hex[:8]}"
+    classroom = await seed_classroom(1, 1, 0, prefix=prefix)
+    group = classroom.groups[0]
+    sessions = await create_students(args.students, prefix, args.concurrency)
+    print(f"[LOAD] {len(sessions)} students joining {group['joinCode']} "
+          f"(concurrency {args.concurrency}, ramp {args.ramp:.0f}s)...")
+    stats = await run_join_load(sessions, group["joinCode"], args.concurrency, args.ramp, args.retries)
+    stats.report()
+
+    # Only students whose join succeeded should be on the roster.
+    joined = []
+    for session in sessions:
+        doc = rest_firestore_get("users", session.uid, fields=["memberOfGroups"]) or {}
+        if group["id"] in (doc.get("memberOfGroups") or []):
+            joined.append(session.uid)
+    problems = verify_roster(group["id"], joined)
+    if len(joined) != stats.summary()["joined"]:
+        problems.append(f"{len(joined)} memberships for {stats.summary()['joined']} successful joins")
+    for p in problems:
+        print(f"[LOAD] INCONSISTENT {p}")
+    if not problems:
+        print(f"[LOAD] Roster consistent: {len(joined)} students in {group['id']}.")
+    return stats, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent joinClass load against the emulators.")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50, help="joinClass calls in flight at most")
+    parser.add_argument("--ramp", type=float, default=0.0, help="spread the starts over this many seconds")
+    parser.add_argument("--retries", type=int, default=2, help="retries per student after a failed join")
+    args = parser.parse_args()
+
+    # Size the connection pool to the concurrency so calls never queue for a socket.
+    set_client(EmulatorClient(pool_size=max(args.concurrency, 4)))
+    try:
+        stats, problems = asyncio.run(main_async(args))
+    finally:
+        get_client().close()
+    TRACE.save()
+    if problems or stats.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
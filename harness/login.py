@@ -0,0 +1,271 @@
+"""
+API login fast-path: start a browser context already signed in.
+
+Registering through the login view costs role selection, the registration
+form, the registerUserWithRole callable and a dashboard wait with a 30s+40s
+fallback per persona. Instead, the account is created or signed in over the
+Auth emulator REST API, provisioned like registerUserWithRole would (role
+claim, users/{uid} and for students students/{uid}), and the resulting
+Firebase user is written into the app origin's IndexedDB
+(firebaseLocalStorageDb / firebaseLocalStorage), where the web SDK's default
+persistence looks for it. The captured storage state is cached per persona
+in .harness/storage/<role>-<email>.json and reused while the account still
+exists. The scripts' per-run personas have fresh emails, so they only hit
+within a run; the baseline personas (HARNESS_BASELINE) hit across runs.
+Entries unused for STORAGE_MAX_AGE are pruned.
+
+    state = login_state(browser, "professor", email, password, name)
+    context = browser.new_context(storage_state=state)
+
+Set HARNESS_UI_LOGIN=1 to make the scripts go through the registration UI instead.
+"""
+
+import json
+import os
+import re
+import time
+
+from harness import ui
+from harness.auth import AuthError, get_session
+from harness.emulator import STATE_DIR, get_client, rest_firestore_commit, rest_firestore_get, rest_set_claims
+from harness.trace import span
+from harness.transforms import server_timestamp, transform_write
+
+STORAGE_DIR = os.path.join(STATE_DIR, "storage")
+STORAGE_MAX_AGE = 7 * 24 * 3600  # seconds since an entry was last written or read
+
+DASHBOARDS = {"professor": "professor-dashboard-view", "student": "student-dashboard"}
+
+# Persistence layout of the Firebase JS SDK (indexedDBLocalPersistence).
+AUTH_DB_NAME = "firebaseLocalStorageDb"
+AUTH_STORE_NAME = "firebaseLocalStorage"
+FALLBACK_API_KEY = "dummy-key"  # public/js/firebase-init.js uses it when init.json is unavailable
+
+_INJECT_JS = """async ([dbName, storeName, key, value]) => {
+    const db = await new Promise((resolve, reject) => {
+        const req = indexedDB.open(dbName, 1);
+        req.onupgradeneeded = () => req.result.createObjectStore(storeName, { keyPath: 'fbase_key' });
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+    await new Promise((resolve, reject) => {
+        const tx = db.transaction(storeName, 'readwrite');
+        tx.objectStore(storeName).put({ fbase_key: key, value });
+        tx.oncomplete = resolve;
+        tx.onerror = () => reject(tx.error);
+    });
+    db.close();
+}"""
+
+# Served instead of the app while injecting, so the SDK does not start and race the write.
+_BLANK_PATH = "/__harness_auth__"
+
+_api_keys = {}
+_pruned = False
+
+
+def use_api_login():
+    return os.environ.get("HARNESS_UI_LOGIN") != "1"
+
+
+def firebase_api_key(base_url=None, client=None):
+    """The apiKey the web app initialises with (Hosting's init.json), which names its persistence key."""
+    base_url = base_url or ui.BASE_URL
+    if base_url not in _api_keys:
+        client = client or get_client()
+        api_key = FALLBACK_API_KEY
+        try:
+            r = client.get(f"{base_url}/__/firebase/init.json")
+            if r.status_code == 200:
+                api_key = r.json().get("apiKey") or FALLBACK_API_KEY
+        except Exception:
+            pass
+        _api_keys[base_url] = api_key
+    return _api_keys[base_url]
+
+
+def provision_account(email, password, role, name=""):
+    """
+    Signs the account in (creating it if needed) and gives it what
+    registerUserWithRole would: the role claim, a display name and its
+    profile documents. Returns an AuthSession whose token carries the role.
+    """
+    client = get_client()
+    session = get_session(email, password)
+    if session.claims.get("role") == role and rest_firestore_get("users", session.uid, fields=["role"]):
+        return session
+
+    rest_set_claims(session.uid, {"role": role})
+    if name:
+        client.post(f"{client.auth_url}/accounts:update?key={client.api_key}",
+                    json={"idToken": session.id_token, "displayName": name})
+
+    profile = {"email": email, "role": role, "name": name}
+    writes = [transform_write("users", session.uid, {"createdAt": server_timestamp()}, profile)]
+    if role == "student":
+        writes.append(transform_write("students", session.uid, {"createdAt": server_timestamp()}, profile))
+    rest_firestore_commit(writes)
+
+    # The cached token predates the claim; the app reads the role from it on start-up.
+    session = session.refresh()
+    if session.claims.get("role") != role:
+        raise AuthError(f"{email}: refreshed token carries role {session.claims.get('role')!r}, expected {role!r}")
+    return session
+
+
+def firebase_user(session, email, name, api_key):
+    """The JSON the web SDK persists for a signed-in user (UserImpl.toJSON)."""
+    now_ms = str(int(time.time() * 1000))
+    return {
+        "uid": session.uid,
+        "email": email,
+        "emailVerified": False,
+        "displayName": name or None,
+        "isAnonymous": False,
+        "providerData": [{
+            "providerId": "password",
+            "uid": email,
+            "displayName": name or None,
+            "email": email,
+            "phoneNumber": None,
+            "photoURL": None,
+        }],
+        "stsTokenManager": {
+            "refreshToken": session.refresh_token,
+            "accessToken": session.id_token,
+            "expirationTime": int(session.expires_at * 1000),
+        },
+        "createdAt": now_ms,
+        "lastLoginAt": now_ms,
+        "apiKey": api_key,
+        "appName": "[DEFAULT]",
+    }
+
+
+def _injection_args(session, email, name, base_url):
+    api_key = firebase_api_key(base_url)
+    key = f"firebase:authUser:{api_key}:[DEFAULT]"
+    return [AUTH_DB_NAME, AUTH_STORE_NAME, key, firebase_user(session, email, name, api_key)]
+
+
+def _cache_path(role, email):
+    return os.path.join(STORAGE_DIR, f"{role}-{re.sub(r'[^A-Za-z0-9@._-]', '_', email)}.json")
+
+
+def _load_cached(role, email, uid):
+    path = _cache_path(role, email)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("email") == email and cached.get("uid") == uid and cached.get("baseUrl") == ui.BASE_URL:
+        os.utime(path)  # keeps it from being pruned
+        return cached["state"]
+    return None
+
+
+def _prune_cache():
+    """Removes storage states not used for STORAGE_MAX_AGE (once per process)."""
+    global _pruned
+    if _pruned:
+        return
+    _pruned = True
+    cutoff = time.time() - STORAGE_MAX_AGE
+    for entry in os.scandir(STORAGE_DIR):
+        try:
+            if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _store_cached(role, email, uid, state):
+    os.makedirs(STORAGE_DIR, exist_ok=True)
+    _prune_cache()
+    path = _cache_path(role, email)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"email": email, "uid": uid, "baseUrl": ui.BASE_URL, "state": state}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def login_state(browser, role, email, password, name="", refresh=False):
+    """
+    Storage state (with IndexedDB) of a context signed in as `email`.
+    Reuses the persona's cached state while it belongs to the same account.
+    """
+    started = time.monotonic()
+    session = provision_account(email, password, role, name)
+    state = None if refresh else _load_cached(role, email, session.uid)
+    if state is None:
+        context = browser.new_context()
+        try:
+            context.route(f"{ui.BASE_URL}{_BLANK_PATH}", lambda route: route.fulfill(body="<html></html>", content_type="text/html"))
+            page = context.new_page()
+            page.goto(f"{ui.BASE_URL}{_BLANK_PATH}")
+            page.evaluate(_INJECT_JS, _injection_args(session, email, name, ui.BASE_URL))
+            state = context.storage_state(indexed_db=True)
+        finally:
+            context.close()
+        _store_cached(role, email, session.uid, state)
+    ui.UI_TIMINGS.record(f"api_login.{role}", time.monotonic() - started)
+    return state
+
+
+async def login_state_async(browser, role, email, password, name="", refresh=False):
+    """login_state for playwright.async_api browsers (the REST part runs synchronously)."""
+    started = time.monotonic()
+    session = provision_account(email, password, role, name)
+    state = None if refresh else _load_cached(role, email, session.uid)
+    if state is None:
+        context = await browser.new_context()
+        try:
+            await context.route(f"{ui.BASE_URL}{_BLANK_PATH}", lambda route: route.fulfill(body="<html></html>", content_type="text/html"))
+            page = await context.new_page()
+            await page.goto(f"{ui.BASE_URL}{_BLANK_PATH}")
+            await page.evaluate(_INJECT_JS, _injection_args(session, email, name, ui.BASE_URL))
+            state = await context.storage_state(indexed_db=True)
+        finally:
+            await context.close()
+        _store_cached(role, email, session.uid, state)
+    ui.UI_TIMINGS.record(f"api_login.{role}", time.monotonic() - started)
+    return state
+
+
+def _new_context(browser, pool, role, email, storage_state=None):
+    if pool is not None:
+        return pool.acquire(f"{role}:{email}", storage_state=storage_state)
+    return browser.new_context(storage_state=storage_state)
+
+
+def open_logged_in(browser, role, email, password, name="", timeout=None, pool=None):
+    """
+    Context + page signed in as `email`, with the role's dashboard rendered.
+    With a harness.browser_pool.ContextPool the context comes from (and goes
+    back to) the pool under the key "<role>:<email>". Returns (context, page).
+    """
+    state = login_state(browser, role, email, password, name)
+    context = _new_context(browser, pool, role, email, state)
+    page = context.new_page()
+    page.goto(f"{ui.BASE_URL}/")
+    page.wait_for_selector(DASHBOARDS[role], state="visible", timeout=timeout or ui.TIMEOUTS["dashboard"])
+    ui.log(f"{role.capitalize()} {email} signed in via API.")
+    return context, page
+
+
+def open_persona(browser, role, email, password, name="", pool=None):
+    """
+    Context + page for a persona: API login by default, the registration UI
+    (ui.login_professor / ui.register_student) when HARNESS_UI_LOGIN=1.
+    Returns (context, page).
+    """
+    with span("login", key=role, api=use_api_login()):
+        if use_api_login():
+            return open_logged_in(browser, role, email, password, name, pool=pool)
+        context = _new_context(browser, pool, role, email)
+        page = context.new_page()
+        if role == "professor":
+            ui.login_professor(page, email, password, name)
+        else:
+            ui.register_student(page, email, password, name)
+        return context, page
@@ -0,0 +1,141 @@
+"""
+Bounded parallel runner for per-item browser scenarios.
+
+Each worker thread owns its own Playwright instance (the sync API is bound
+to the thread that started it). Given the `endpoint` of a shared browser
+(harness.browser_pool) the workers attach to it instead of launching their
+own Chromium. Items run in browser contexts from a per-worker ContextPool,
+optionally pre-authenticated from a storage state captured once by the
+caller; with a storage state a context is reused for up to `max_uses` items
+(pages are closed in between), without one every item gets a fresh context.
+Items are pulled from a shared queue, so a slow content type never holds up
+the others.
+
+    results = run_matrix(CONTENT_TYPES, create_lesson, key=lambda ct: ct["type"],
+                         storage_state=state, workers=4, endpoint=endpoint)
+"""
+
+import os
+import queue
+import threading
+import time
+
+from playwright.sync_api import sync_playwright
+
+from harness.browser_pool import ContextPool
+
+DEFAULT_WORKERS = int(os.environ.get("HARNESS_WORKERS", "4"))
+
+
+class MatrixResult:
+    def __init__(self, key):
+        self.key = key
+        self.value = None
+        self.error = None
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _worker(jobs, results, task, key, options):
+    try:
+        _work(jobs, results, task, key, **options)
+    except Exception as e:
+        print(f"[MATRIX] {threading.current_thread().name} stopped: {e}")
+
+
+def _work(jobs, results, task, key, storage_state, headless, default_timeout, launch_args, on_error,
+          endpoint, max_uses, page_setup):
+    with sync_playwright() as p:
+        if endpoint:
+            browser = p.chromium.connect_over_cdp(endpoint)
+        else:
+            browser = p.chromium.launch(headless=headless, args=launch_args)
+        pool = ContextPool(browser, max_uses=max_uses)
+        pool_key = "matrix" if storage_state else None
+        try:
+            while True:
+                try:
+                    item = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                result = MatrixResult(key(item))
+                started = time.monotonic()
+                context = pool.acquire(pool_key, storage_state=storage_state)
+                page = context.new_page()
+                if default_timeout:
+                    page.set_default_timeout(default_timeout)
+                try:
+                    if page_setup:
+                        page_setup(page, item)
+                    result.value = task(page, item)
+                except Exception as e:
+                    result.error = e
+                    if on_error:
+                        try:
+                            on_error(page, item, e)
+                        except Exception as cb_err:
+                            print(f"[MATRIX] Error handler failed for {result.key}: {cb_err}")
+                finally:
+                    result.seconds = time.monotonic() - started
+                    pool.release(context, discard=not result.ok)
+                results[result.key] = result
+                status = "OK" if result.ok else f"FAILED ({result.error})"
+                print(f"[MATRIX] {result.key}: {status} in {result.seconds:.1f}s")
+        finally:
+            pool.close()
+            browser.close()
+
+
+def run_matrix(items, task, key=str, storage_state=None, workers=None, headless=True,
+               default_timeout=None, launch_args=("--no-sandbox",), on_error=None,
+               endpoint=None, max_uses=None, page_setup=None):
+    """
+    Runs `task(page, item)` for every item, each on its own page, on at most
+    `workers` threads. Returns {key(item): MatrixResult} in input order.
+
+    `page_setup(page, item)` runs on each new page before the task (e.g. to
+    install routes). `on_error(page, item, exc)` runs before the failed item's
+    context is closed, e.g. to take a screenshot. A failed item's context is
+    never reused.
+    """
+    items = list(items)
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(items)))
+    jobs = queue.Queue()
+    for item in items:
+        jobs.put(item)
+
+    results = {}
+    options = dict(storage_state=storage_state, headless=headless, default_timeout=default_timeout,
+                   launch_args=list(launch_args), on_error=on_error, endpoint=endpoint, max_uses=max_uses,
+                   page_setup=page_setup)
+    started = time.monotonic()
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(jobs, results, task, key, options),
+            name=f"matrix-{i}",
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # A worker that could not even launch its browser leaves items unprocessed.
+    for item in items:
+        k = key(item)
+        if k not in results:
+            results[k] = MatrixResult(k)
+            results[k].error = Exception("Not run: no worker could process it")
+
+    elapsed = time.monotonic() - started
+    serial = sum(r.seconds for r in results.values())
+    failed = sum(1 for r in results.values() if not r.ok)
+    print(f"[MATRIX] {len(items)} items on {workers} workers in {elapsed:.1f}s "
+          f"(sum of item times {serial:.1f}s), {failed} failed")
+    return {key(item): results[key(item)] for item in items}
@@ -0,0 +1,383 @@
+"""
+Per-view network capture and budgets.
+
+A NetworkRecorder listens to a page's requests and attributes each one
+(URL, category, transferred bytes, duration) to the view window it started
+in, even when it finishes after the window closed:
+
+    recorder = NetworkRecorder(page)
+    with recorder.view("professor-library-view"):
+        safe_click(page, "professor-navigation button[data-view='library']")
+        page.wait_for_selector("professor-library-view")
+    recorder.enforce()            # raises BudgetExceeded listing every violation
+
+Firestore document reads are counted from the Listen channel responses
+(one per documentChange the server streams to the client), which is what
+the web SDK's onSnapshot/getDoc(s) bill for. The Listen backchannel is one
+long-poll that outlives the views, so on Chromium its body is streamed over
+CDP (Network.streamResourceContent) and every chunk's reads and bytes go to
+the view window open when the chunk arrived (by its CDP timestamp); chunks
+between windows are reported as "between views". Elsewhere a Listen response
+is only readable once the request has finished: a window waits (up to 30s)
+for the requests it started, Listen requests that stay open or fail are
+counted as unread, and a view with a reads budget and unread Listen
+responses is a violation rather than a pass. Callables, static JS and the
+locale files are counted as their own categories.
+
+Budgets are declared per view in BUDGETS; a JSON file named by
+HARNESS_NETWORK_BUDGETS ({"view": {"requests": 80, "bytes": 2000000,
+"reads": 40, "callables": 2}}) overrides them.
+"""
+
+import base64
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from harness.trace import span
+
+_LISTEN_RE = re.compile(r"google\.firestore\.v1\.Firestore/Listen/channel")
+_WRITE_RE = re.compile(r"google\.firestore\.v1\.Firestore/Write/channel")
+_DOCUMENT_CHANGE_RE = re.compile(r'"documentChange"')
+_DOCUMENT_CHANGE_TAIL = len('"documentChange"') - 1  # kept between chunks so a split marker still counts
+
+
+class Budget:
+    """Upper bounds for one view window; None means unbounded."""
+
+    FIELDS = ("requests", "bytes", "reads", "callables")
+
+    def __init__(self, requests=None, bytes=None, reads=None, callables=None):
+        self.requests = requests
+        self.bytes = bytes
+        self.reads = reads
+        self.callables = callables
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.FIELDS if getattr(self, f) is not None}
+
+
+# Ceilings for a cold load with an empty HTTP cache (the first view of a run
+# also pays for the app shell, its ES modules and the CDN libraries).
+BUDGETS = {
+    "professor-dashboard-view": Budget(requests=260, bytes=9_000_000, reads=150, callables=2),
+    "professor-library-view": Budget(requests=60, bytes=1_500_000, reads=200, callables=1),
+    "student-lesson-detail": Budget(requests=200, bytes=8_000_000, reads=40, callables=2),
+}
+
+
+def load_budgets(path=None):
+    """BUDGETS overlaid with the JSON file named by `path` or HARNESS_NETWORK_BUDGETS."""
+    budgets = {view: Budget(**b.to_dict()) for view, b in BUDGETS.items()}
+    path = path or os.environ.get("HARNESS_NETWORK_BUDGETS")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for view, limits in json.load(f).items():
+                budgets[view] = Budget(**{**budgets.get(view, Budget()).to_dict(), **limits})
+    return budgets
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__("; ".join(violations))
+
+
+def classify(request):
+    url = request.url
+    if _LISTEN_RE.search(url):
+        return "firestore.listen"
+    if _WRITE_RE.search(url):
+        return "firestore.write"
+    if ":8080/" in url or "firestore.googleapis.com" in url:
+        return "firestore.rest"
+    if ":5001/" in url or "cloudfunctions.net" in url:
+        return "callable"
+    if ":9099/" in url or "identitytoolkit" in url or "securetoken" in url:
+        return "auth"
+    if "/locales/" in url and url.split("?")[0].endswith(".json"):
+        return "locale"
+    if request.resource_type == "script" or url.split("?")[0].endswith(".js"):
+        return "script"
+    return request.resource_type or "other"
+
+
+class ViewTraffic:
+    """Requests attributed to one view window."""
+
+    def __init__(self, view):
+        self.view = view
+        self.entries = []
+        self.seconds = 0.0
+        self.opened = time.time()
+        self.closed = None
+        self.pending = 0            # requests started in the window that have not finished yet
+        self.pending_listens = 0    # ... of which Listen channel requests
+        self.listen_reads = 0       # documentChanges streamed while the window was open
+        self.listen_bytes = 0
+        self.unstreamed = 0         # Listen requests whose stream could not be attached
+
+    def covers(self, wall):
+        return self.opened <= wall and (self.closed is None or wall < self.closed)
+
+    @property
+    def requests(self):
+        return len(self.entries)
+
+    @property
+    def bytes(self):
+        return sum(e["bytes"] for e in self.entries) + self.listen_bytes
+
+    @property
+    def reads(self):
+        return sum(e["reads"] for e in self.entries) + self.listen_reads
+
+    @property
+    def callables(self):
+        return sum(1 for e in self.entries if e["category"] == "callable")
+
+    @property
+    def unread(self):
+        """Listen requests whose documentChanges could not be counted (failed, or still open)."""
+        return self.unstreamed + self.pending_listens + sum(
+            1 for e in self.entries if e["category"] == "firestore.listen" and e["failed"] and not e.get("streamed"))
+
+    def by_category(self):
+        out = {}
+        for e in self.entries:
+            c = out.setdefault(e["category"], {"requests": 0, "bytes": 0, "reads": 0})
+            c["requests"] += 1
+            c["bytes"] += e["bytes"]
+            c["reads"] += e["reads"]
+        if self.listen_reads or self.listen_bytes:
+            c = out.setdefault("firestore.listen", {"requests": 0, "bytes": 0, "reads": 0})
+            c["bytes"] += self.listen_bytes
+            c["reads"] += self.listen_reads
+        return out
+
+    def summary(self):
+        return {"requests": self.requests, "bytes": self.bytes, "reads": self.reads,
+                "callables": self.callables, "unreadListens": self.unread, "seconds": round(self.seconds, 3)}
+
+    def violations(self, budget):
+        out = []
+        for field in Budget.FIELDS:
+            limit = getattr(budget, field)
+            actual = getattr(self, field)
+            if limit is not None and actual > limit:
+                out.append(f"{self.view}: {field} {actual} > budget {limit}")
+        if budget.reads is not None and self.unread:
+            out.append(f"{self.view}: reads unverified, {self.unread} Listen responses could not be read")
+        return out
+
+
+class NetworkRecorder:
+    """Captures a page's requests into the view windows they started in."""
+
+    def __init__(self, page, budgets=None):
+        self.page = page
+        self.budgets = budgets if budgets is not None else load_budgets()
+        self.views = []
+        self.between_views = ViewTraffic("between views")  # streamed Listen chunks outside every window
+        self._current = None
+        self._started = {}
+        self._last_activity = time.monotonic()
+        self._streams = {}       # CDP requestId -> undecoded tail of a streamed Listen response
+        self._clock_offset = None  # wall time - CDP monotonic timestamp
+        self._cdp = self._open_stream(page)
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_finished)
+        page.on("requestfailed", self._on_failed)
+
+    @property
+    def streaming(self):
+        """True when Listen reads are attributed by arrival (Chromium CDP)."""
+        return self._cdp is not None
+
+    def _open_stream(self, page):
+        try:
+            cdp = page.context.new_cdp_session(page)
+            cdp.send("Network.enable")
+        except Exception:
+            return None  # not Chromium: Listen reads are counted when the request finishes
+        cdp.on("Network.requestWillBeSent", self._on_cdp_request)
+        cdp.on("Network.dataReceived", self._on_cdp_data)
+        cdp.on("Network.loadingFinished", lambda params: self._streams.pop(params["requestId"], None))
+        cdp.on("Network.loadingFailed", lambda params: self._streams.pop(params["requestId"], None))
+        return cdp
+
+    def _window_at(self, wall):
+        """The view window open at wall time `wall` (between_views if none was)."""
+        for traffic in reversed(self.views):
+            if traffic.covers(wall):
+                return traffic
+        return self.between_views
+
+    def _on_cdp_request(self, params):
+        if params.get("wallTime") is not None:
+            self._clock_offset = params["wallTime"] - params["timestamp"]
+        if not _LISTEN_RE.search(params["request"]["url"]):
+            return
+        request_id = params["requestId"]
+        self._streams[request_id] = ""
+        try:
+            # Whatever arrived before streaming was enabled comes back buffered.
+            buffered = self._cdp.send("Network.streamResourceContent", {"requestId": request_id})
+        except Exception:
+            self._streams.pop(request_id, None)
+            self._window_at(time.time()).unstreamed += 1
+            return
+        self._count_chunk(request_id, buffered.get("bufferedData"), time.time())
+
+    def _on_cdp_data(self, params):
+        if params["requestId"] not in self._streams:
+            return
+        self._last_activity = time.monotonic()
+        wall = params["timestamp"] + self._clock_offset if self._clock_offset is not None else time.time()
+        traffic = self._count_chunk(params["requestId"], params.get("data"), wall)
+        traffic.listen_bytes += params.get("encodedDataLength") or params.get("dataLength") or 0
+
+    def _count_chunk(self, request_id, data, wall):
+        traffic = self._window_at(wall)
+        if data:
+            text = self._streams.get(request_id, "") + base64.b64decode(data).decode("utf-8", "replace")
+            traffic.listen_reads += len(_DOCUMENT_CHANGE_RE.findall(text))
+            if request_id in self._streams:
+                self._streams[request_id] = text[-_DOCUMENT_CHANGE_TAIL:]
+        return traffic
+
+    def _on_request(self, request):
+        traffic = self._current
+        category = classify(request)
+        # Streamed Listen requests are attributed chunk by chunk; the window does not wait for them.
+        if traffic is not None and not (self.streaming and category == "firestore.listen"):
+            traffic.pending += 1
+            if category == "firestore.listen":
+                traffic.pending_listens += 1
+        self._started[id(request)] = (time.monotonic(), traffic, category)
+        self._last_activity = time.monotonic()
+
+    def _entry(self, request, started, category, failed=False):
+        self._last_activity = time.monotonic()
+        size = 0
+        reads = 0
+        streamed = self.streaming and category == "firestore.listen"
+        if not failed and not streamed:
+            try:
+                sizes = request.sizes()
+                size = sizes["responseBodySize"] + sizes["responseHeadersSize"]
+            except Exception:
+                pass
+            if category == "firestore.listen":
+                try:
+                    reads = len(_DOCUMENT_CHANGE_RE.findall(request.response().text()))
+                except Exception:
+                    pass
+        timing = request.timing
+        if timing and timing.get("responseEnd", -1) >= 0:
+            duration = timing["responseEnd"] / 1000.0
+        else:
+            duration = time.monotonic() - started if started else 0.0
+        entry = {"url": request.url, "method": request.method, "category": category, "bytes": max(size, 0),
+                 "reads": reads, "seconds": round(duration, 4), "failed": failed}
+        if streamed:
+            entry["streamed"] = True  # its bytes and reads went to the windows they arrived in
+        return entry
+
+    def _on_finished(self, request, failed=False):
+        started, traffic, category = self._started.pop(id(request), (None, None, None))
+        if traffic is None:
+            self._last_activity = time.monotonic()
+            return
+        traffic.entries.append(self._entry(request, started, category, failed))
+        if self.streaming and category == "firestore.listen":
+            return
+        traffic.pending -= 1
+        if category == "firestore.listen":
+            traffic.pending_listens -= 1
+
+    def _on_failed(self, request):
+        self._on_finished(request, failed=True)
+
+    def wait_for_quiet(self, quiet=1.0, timeout=15.0):
+        """
+        Waits until no request has started or finished for `quiet` seconds.
+        (Firestore keeps a long-poll open, so Playwright's networkidle never fires.)
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if time.monotonic() - self._last_activity >= quiet:
+                return True
+            self.page.wait_for_timeout(100)
+        return False
+
+    def wait_for_window(self, traffic, timeout=30.0):
+        """Waits until every request started in the window has finished (a Listen response is readable only then)."""
+        deadline = time.monotonic() + timeout
+        while traffic.pending and time.monotonic() < deadline:
+            self.page.wait_for_timeout(100)
+        return not traffic.pending
+
+    @contextmanager
+    def view(self, name, settle=True):
+        """
+        Attributes requests started in the block to view `name`, then waits for
+        the view's traffic to settle and for the requests it started to finish.
+        """
+        traffic = ViewTraffic(name)
+        self._current = traffic
+        self.views.append(traffic)  # now, so streamed chunks handled after the window closes still find it
+        started = time.monotonic()
+        with span("view_network", key=name) as record:
+            try:
+                yield traffic
+                if settle:
+                    self.wait_for_quiet()
+                    # Close the window first: requests started while waiting belong to no view.
+                    self._current = None
+                    traffic.closed = time.time()
+                    self.wait_for_window(traffic)
+            finally:
+                self._current = None
+                if traffic.closed is None:
+                    traffic.closed = time.time()
+                traffic.seconds = time.monotonic() - started
+                record["attrs"].update(traffic.summary())
+
+    def violations(self):
+        out = []
+        for traffic in self.views:
+            budget = self.budgets.get(traffic.view)
+            if budget:
+                out.extend(traffic.violations(budget))
+        return out
+
+    def report(self, prefix="[NETWORK]"):
+        for traffic in self.views:
+            s = traffic.summary()
+            budget = self.budgets.get(traffic.view)
+            limits = f" (budget {budget.to_dict()})" if budget else ""
+            print(f"{prefix} {traffic.view}: {s['requests']} requests, {s['bytes'] / 1024:.0f} KiB, "
+                  f"{s['reads']} reads, {s['callables']} callables in {s['seconds']:.1f}s{limits}")
+            for category, c in sorted(traffic.by_category().items(), key=lambda kv: -kv[1]["bytes"]):
+                reads = f", {c['reads']} reads" if c["reads"] else ""
+                print(f"{prefix}   {category:18} {c['requests']:4d} req {c['bytes'] / 1024:8.0f} KiB{reads}")
+        if self.between_views.listen_reads or self.between_views.listen_bytes:
+            print(f"{prefix} between views: {self.between_views.listen_reads} Listen reads, "
+                  f"{self.between_views.listen_bytes / 1024:.0f} KiB (no budget)")
+
+    def enforce(self):
+        violations = self.violations()
+        for v in violations:
+            print(f"[NETWORK] BUDGET EXCEEDED {v}")
+        if violations:
+            raise BudgetExceeded(violations)
+
+
+def save_traffic(recorders, path):
+    """Writes every captured request of the given recorders, grouped by view, as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({t.view: {"summary": t.summary(), "requests": t.entries}
+                   for recorder in recorders for t in recorder.views}, f, indent=1)
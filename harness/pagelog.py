@@ -0,0 +1,228 @@
+"""
+Buffered browser console, page errors and harness logs, flushed on failure.
+
+Printing every console message as it arrives floods CI logs (Lit's dev-mode
+warnings, debug output of every component) and slows the harness, which
+waits on each print. LOGS keeps the entries instead, per page, in a bounded
+ring buffer with a level and a timestamp, and writes them out only when a
+step fails:
+
+    from harness.pagelog import LOGS
+
+    LOGS.attach(page, "student")                   # sync or async Playwright page
+    LOGS.attach_context(context, "professor")      # every page the context opens
+    with LOGS.step("student_phase"):               # or `async with`; flushes if the block raises
+        ...
+    LOGS.flush("professor phase failed")           # explicit flush, e.g. before sys.exit(1)
+
+Entries are tagged with the enclosing step, tracked per thread and asyncio
+task, so concurrent run_matrix workers tag their own entries.
+
+harness.ui.log records into the "harness" buffer as well, so the flushed
+file interleaves the harness' own steps with what the pages said. A flush
+writes every buffer, merged by time, as compact JSONL to
+.harness/logs/<script>-<YYYYmmdd-HHMMSS>.jsonl (one file per run, appended
+on each flush) and empties the buffers:
+
+    {"t":1760700000.123,"page":"student","src":"console","lvl":"warning","msg":"Lit is in dev mode...","at":"http://...:12"}
+
+Entries at or above HARNESS_LOG_ECHO (default "error"; "off" for none) are
+still printed immediately. HARNESS_LOG_BUFFER sets the entries kept per page
+(default 500); older entries are dropped and counted.
+"""
+
+import collections
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+
+from harness.emulator import STATE_DIR
+
+LOG_DIR = os.path.join(STATE_DIR, "logs")
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+# Playwright ConsoleMessage.type -> level (anything else is "info")
+CONSOLE_LEVELS = {
+    "debug": "debug",
+    "trace": "debug",
+    "log": "info",
+    "info": "info",
+    "warning": "warning",
+    "error": "error",
+    "assert": "error",
+}
+
+MAX_MESSAGE = 4000
+
+# The step the calling thread / asyncio task is in (run_matrix workers each have their own).
+_current_step = contextvars.ContextVar("harness_log_step", default=None)
+
+
+def _echo_level():
+    name = os.environ.get("HARNESS_LOG_ECHO", "error").lower()
+    if name in ("off", "none", "0"):
+        return None
+    return LEVELS.get(name, LEVELS["error"])
+
+
+class PageBuffer:
+    """The most recent entries of one page (or of the harness itself)."""
+
+    def __init__(self, label, capacity):
+        self.label = label
+        self.entries = collections.deque(maxlen=capacity)
+        self.dropped = 0
+
+    def add(self, entry):
+        if len(self.entries) == self.entries.maxlen:
+            self.dropped += 1
+        self.entries.append(entry)
+
+
+class LogCollector:
+    """Per-page ring buffers of console messages, page errors and harness logs. Thread-safe."""
+
+    def __init__(self, script=None, capacity=None):
+        self.script = script or os.path.splitext(os.path.basename(sys.argv[0] or "harness"))[0]
+        self.capacity = capacity or int(os.environ.get("HARNESS_LOG_BUFFER", "500"))
+        self.echo = _echo_level()
+        self.path = None
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._thread_steps = {}  # thread id -> innermost step, for page events (they have no task context)
+        self._flushed = None    # the exception a step already flushed for (outer steps skip it)
+
+    def _buffer(self, label):
+        buffer = self._buffers.get(label)
+        if buffer is None:
+            buffer = self._buffers[label] = PageBuffer(label, self.capacity)
+        return buffer
+
+    def current_step(self):
+        """The caller's step; page event handlers fall back to the step of the thread they run on."""
+        return _current_step.get() or self._thread_steps.get(threading.get_ident())
+
+    def record(self, label, level, msg, source="harness", at=None, echo=True):
+        entry = {"t": round(time.time(), 3), "page": label, "src": source, "lvl": level,
+                 "msg": msg if len(msg) <= MAX_MESSAGE else msg[:MAX_MESSAGE] + "..."}
+        if at:
+            entry["at"] = at
+        step = self.current_step()
+        if step:
+            entry["step"] = step
+        with self._lock:
+            self._buffer(label).add(entry)
+        if echo and self.echo is not None and LEVELS.get(level, 20) >= self.echo:
+            prefix = label.upper() if source == "harness" else f"{label.upper()} {source.upper()}"
+            print(f"[{prefix}] {msg}")
+
+    def attach(self, page, label):
+        """Buffers the page's console messages, uncaught errors and crashes under `label`."""
+        def on_console(msg):
+            location = msg.location or {}
+            at = f"{location.get('url')}:{location.get('lineNumber')}" if location.get("url") else None
+            self.record(label, CONSOLE_LEVELS.get(msg.type, "info"), msg.text, "console", at)
+
+        page.on("console", on_console)
+        page.on("pageerror", lambda err: self.record(label, "error", str(err), "pageerror"))
+        page.on("crash", lambda _: self.record(label, "error", "page crashed", "crash"))
+        return page
+
+    def attach_context(self, context, label):
+        """attach() for the context's open pages and every page it opens later."""
+        for page in context.pages:
+            self.attach(page, label)
+        context.on("page", lambda page: self.attach(page, label))
+        return context
+
+    def counts(self):
+        """{label: {level: entries buffered}}"""
+        with self._lock:
+            result = {}
+            for label, buffer in self._buffers.items():
+                levels = result[label] = {}
+                for entry in buffer.entries:
+                    levels[entry["lvl"]] = levels.get(entry["lvl"], 0) + 1
+            return result
+
+    def flush(self, reason=None, path=None):
+        """
+        Writes every buffered entry (merged by time) as JSONL, empties the
+        buffers and returns the file's path; None when nothing was buffered.
+        """
+        with self._lock:
+            entries = [e for b in self._buffers.values() for e in b.entries]
+            dropped = sum(b.dropped for b in self._buffers.values())
+            pages = len(self._buffers)
+            for buffer in self._buffers.values():
+                buffer.entries.clear()
+                buffer.dropped = 0
+        if not entries:
+            return None
+        entries.sort(key=lambda e: e["t"])
+
+        if path is None:
+            if self.path is None:
+                os.makedirs(LOG_DIR, exist_ok=True)
+                self.path = os.path.join(LOG_DIR, f"{self.script}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+            path = self.path
+        header = {"t": round(time.time(), 3), "flush": reason or "", "entries": len(entries), "dropped": dropped}
+        with open(path, "a", encoding="utf-8") as f:
+            for record in [header] + entries:
+                f.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+        errors = sum(1 for e in entries if e["lvl"] == "error")
+        print(f"[LOGS] {len(entries)} entries ({errors} errors, {dropped} dropped) from {pages} buffers "
+              f"written to {path}")
+        return path
+
+    def failed(self, name, exc):
+        """Records the failure of `name` and flushes, once per exception (enclosing steps skip it)."""
+        if self._flushed is exc:
+            return None
+        self._flushed = exc
+        self.record("harness", "error", f"{name} failed: {exc!r}", echo=False)
+        return self.flush(f"{name} failed: {exc}")
+
+    def step(self, name):
+        """Context manager (sync and async): tags entries with `name` and flushes if the block fails."""
+        return _Step(self, name)
+
+
+class _Step:
+    def __init__(self, collector, name):
+        self.collector = collector
+        self.name = name
+        self.token = None
+        self.thread = None
+        self.outer = None
+
+    def __enter__(self):
+        self.token = _current_step.set(self.name)
+        self.thread = threading.get_ident()
+        steps = self.collector._thread_steps
+        self.outer = steps.get(self.thread)
+        steps[self.thread] = self.name
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not (exc_type is SystemExit and exc.code in (0, None)):
+            self.collector.failed(self.name, exc)
+        _current_step.reset(self.token)
+        if self.outer is None:
+            self.collector._thread_steps.pop(self.thread, None)
+        else:
+            self.collector._thread_steps[self.thread] = self.outer
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+LOGS = LogCollector()
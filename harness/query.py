@@ -0,0 +1,342 @@
+"""
+Streaming, paginated reads of Firestore collections over the REST runQuery API.
+
+`stream_query` yields decoded documents one at a time: the HTTP body is read
+in chunks and the response array is parsed element by element, and large
+result sets are fetched page by page with startAt cursors built from the last
+document of the previous page. Memory use stays bounded by one page chunk
+regardless of collection size.
+
+`Query` builds structured queries with composite AND/OR filters, ordering,
+limit/offset and field projections:
+
+    Query("lessons").where("ownerId", "==", uid).or_where(
+        field_filter("status", "==", "Aktivní"),
+        field_filter("status", "==", "Naplánováno"),
+    ).select("status", "title").order_by("title").limit(50).get()
+
+    python -m harness.query lessons --page-size 200
+"""
+
+import argparse
+import codecs
+import copy
+import json
+
+from harness.codec import to_value, unwrap_fields, value_hook
+from harness.emulator import get_client
+
+DEFAULT_PAGE_SIZE = 300
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks, object_hook=None):
+    """
+    Incrementally parses a top-level JSON array from an iterable of byte chunks,
+    yielding each element as soon as it is complete.
+    """
+    decoder = json.JSONDecoder(object_hook=object_hook)
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    exhausted = False
+    chunks = iter(chunks)
+
+    while True:
+        # Skip separators between elements.
+        while pos < len(buf) and (buf[pos] in _WHITESPACE or (started and buf[pos] == ",")):
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"Expected JSON array, got {buf[pos:pos + 20]!r}")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            else:
+                yield item
+                pos = end
+                continue
+        elif exhausted:
+            if started:
+                raise ValueError("Truncated JSON array")
+            return
+
+        # Need more input: drop consumed text and read the next chunk.
+        buf = buf[pos:]
+        pos = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            buf += utf8.decode(b"", final=True)
+            exhausted = True
+        else:
+            buf += utf8.decode(chunk)
+
+
+def _field(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _with_name_order(structured_query):
+    """Ensures a total order ending in __name__ so cursors are unambiguous."""
+    order_by = list(structured_query.get("orderBy", []))
+    if not order_by or order_by[-1]["field"]["fieldPath"] != "__name__":
+        direction = order_by[-1].get("direction", "ASCENDING") if order_by else "ASCENDING"
+        order_by.append({"field": {"fieldPath": "__name__"}, "direction": direction})
+    structured_query["orderBy"] = order_by
+    return order_by
+
+
+def _with_order_fields_selected(structured_query, order_by):
+    """Projected queries must still return the ordered fields to build cursors from."""
+    select = structured_query.get("select")
+    if select is None:
+        return
+    selected = {f["fieldPath"] for f in select.get("fields", [])}
+    for order in order_by:
+        path = order["field"]["fieldPath"]
+        if path != "__name__" and path not in selected:
+            select.setdefault("fields", []).append({"fieldPath": path})
+            selected.add(path)
+
+
+def _cursor_after(order_by, name, doc, raw=False):
+    values = []
+    for order in order_by:
+        path = order["field"]["fieldPath"]
+        if path == "__name__":
+            values.append({"referenceValue": name})
+        elif raw:
+            values.append(_raw_field(doc, path))
+        else:
+            values.append(to_value(_field(doc, path)))
+    return {"values": values, "before": False}
+
+
+def _raw_field(fields, path):
+    value = {"mapValue": {"fields": fields}}
+    for part in path.split("."):
+        value = value.get("mapValue", {}).get("fields", {}).get(part)
+        if value is None:
+            return {"nullValue": None}
+    return value
+
+
+def _run_page(client, structured_query, raw=False):
+    url = f"{client.firestore_url}:runQuery"
+    r = client.post(url, json={"structuredQuery": structured_query}, stream=True)
+    try:
+        if r.status_code != 200:
+            raise Exception(f"runQuery failed ({r.status_code}): {r.text[:300]}")
+        hook = None if raw else value_hook
+        for item in iter_json_array(r.iter_content(chunk_size=CHUNK_SIZE), object_hook=hook):
+            doc = item.get("document")
+            if doc is not None:
+                if not raw:
+                    doc["fields"] = unwrap_fields(doc.get("fields"))
+                yield doc
+    finally:
+        r.close()
+
+
+def stream_query(structured_query, page_size=DEFAULT_PAGE_SIZE, limit=None, raw=False, client=None):
+    """
+    Yields documents ({"id": ..., **fields}) matching a structuredQuery dict.
+
+    The query's own orderBy is kept (with __name__ appended as a tie-breaker),
+    `limit` caps the total number of documents across all pages, and a
+    startAt cursor on the previous page's last document resumes each page.
+    With raw=True the undecoded document resources ({"name", "fields", ...})
+    are yielded instead, e.g. for snapshots that are written back verbatim.
+    """
+    client = client or get_client()
+    query = copy.deepcopy(structured_query)
+    query.pop("limit", None)
+    order_by = _with_name_order(query)
+    _with_order_fields_selected(query, order_by)
+    remaining = limit
+
+    while remaining is None or remaining > 0:
+        query["limit"] = page_size if remaining is None else min(page_size, remaining)
+        count = 0
+        last = None
+        for doc in _run_page(client, query, raw=raw):
+            last = (doc["name"], doc.get("fields") or {})
+            count += 1
+            yield doc if raw else _named_document(doc)
+        if remaining is not None:
+            remaining -= count
+        if count < query["limit"]:
+            return
+        query["startAt"] = _cursor_after(order_by, *last, raw=raw)
+        # An offset only applies to the first page.
+        query.pop("offset", None)
+
+
+# --- Query builder ---
+
+_OPERATORS = {
+    "<": "LESS_THAN",
+    "<=": "LESS_THAN_OR_EQUAL",
+    ">": "GREATER_THAN",
+    ">=": "GREATER_THAN_OR_EQUAL",
+    "==": "EQUAL",
+    "!=": "NOT_EQUAL",
+    "array-contains": "ARRAY_CONTAINS",
+    "in": "IN",
+    "array-contains-any": "ARRAY_CONTAINS_ANY",
+    "not-in": "NOT_IN",
+}
+
+_UNARY_OPERATORS = {"IS_NAN", "IS_NULL", "IS_NOT_NAN", "IS_NOT_NULL"}
+
+
+def field_filter(field, op, value=None):
+    """
+    Filter on one field. `op` is a Firestore operator name ("EQUAL") or the
+    SDK spelling ("=="). IS_NULL / IS_NAN (and their NOT_ forms) take no value.
+    """
+    op = _OPERATORS.get(op, op)
+    if op in _UNARY_OPERATORS:
+        return {"unaryFilter": {"field": {"fieldPath": field}, "op": op}}
+    return {"fieldFilter": {"field": {"fieldPath": field}, "op": op, "value": to_value(value)}}
+
+
+def _composite(op, filters):
+    filters = [f for f in filters if f]
+    if not filters:
+        return None  # Firestore rejects a compositeFilter without filters
+    if len(filters) == 1:
+        return filters[0]
+    return {"compositeFilter": {"op": op, "filters": filters}}
+
+
+def and_(*filters):
+    return _composite("AND", filters)
+
+
+def or_(*filters):
+    return _composite("OR", filters)
+
+
+class Query:
+    """Chainable builder for a runQuery structuredQuery."""
+
+    def __init__(self, collection, all_descendants=False):
+        self._from = {"collectionId": collection, "allDescendants": all_descendants}
+        self._filters = []
+        self._order_by = []
+        self._select = None
+        self._limit = None
+        self._offset = None
+
+    def where(self, field, op, value=None):
+        """Adds a field filter; multiple calls are combined with AND."""
+        self._filters.append(field_filter(field, op, value))
+        return self
+
+    def filter(self, f):
+        """Adds a prebuilt filter (field_filter/and_/or_), combined with AND."""
+        self._filters.append(f)
+        return self
+
+    def or_where(self, *filters):
+        """Adds an OR group of filters, combined with AND with the rest."""
+        self._filters.append(or_(*filters))
+        return self
+
+    def order_by(self, field, direction="ASCENDING"):
+        direction = {"asc": "ASCENDING", "desc": "DESCENDING"}.get(direction.lower(), direction)
+        self._order_by.append({"field": {"fieldPath": field}, "direction": direction})
+        return self
+
+    def select(self, *fields):
+        """Projects the result to these fields; select() with none returns ids only."""
+        self._select = list(fields)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def offset(self, n):
+        self._offset = n
+        return self
+
+    def to_dict(self):
+        query = {"from": [dict(self._from)]}
+        where = and_(*self._filters)
+        if where:
+            query["where"] = where
+        if self._order_by:
+            query["orderBy"] = [dict(o) for o in self._order_by]
+        if self._select is not None:
+            query["select"] = {"fields": [{"fieldPath": f} for f in self._select]}
+        if self._offset:
+            query["offset"] = self._offset
+        if self._limit is not None:
+            query["limit"] = self._limit
+        return query
+
+    def get(self, client=None):
+        """Runs the query as a single request and returns the decoded documents."""
+        client = client or get_client()
+        return [
+            _named_document(doc)
+            for doc in _run_page(client, self.to_dict())
+        ]
+
+    def stream(self, page_size=DEFAULT_PAGE_SIZE, client=None):
+        """Streams results page by page; the builder's limit caps the total."""
+        return stream_query(self.to_dict(), page_size=page_size, limit=self._limit, client=client)
+
+
+def _named_document(doc):
+    name = doc["name"]
+    out = {"id": name[name.rfind("/") + 1:]}
+    out.update(doc.get("fields") or {})
+    return out
+
+
+def iter_collection(collection, page_size=DEFAULT_PAGE_SIZE, limit=None, all_descendants=False, client=None):
+    """Streams every document of a collection (or collection group)."""
+    query = Query(collection, all_descendants=all_descendants)
+    return stream_query(query.to_dict(), page_size=page_size, limit=limit, client=client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a Firestore emulator collection and summarise its fields.")
+    parser.add_argument("collection")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--group", action="store_true", help="Query as a collection group")
+    args = parser.parse_args()
+
+    count = 0
+    field_counts = {}
+    for doc in iter_collection(args.collection, page_size=args.page_size, limit=args.limit, all_descendants=args.group):
+        count += 1
+        for key in doc:
+            field_counts[key] = field_counts.get(key, 0) + 1
+    print(f"[AUDIT] {args.collection}: {count} documents")
+    for key, n in sorted(field_counts.items(), key=lambda kv: -kv[1]):
+        print(f"[AUDIT]   {key}: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Concurrent seeder for synthetic classrooms on the emulators.
+
+Creates N professors, M groups and K students: Auth sign-in/up (through the
+token cache, so re-runs skip known accounts) and role claims run
+as asyncio tasks (bounded by a semaphore, each blocking REST call on a
+WorkerPool of `--concurrency` threads sharing the keep-alive pool), then the
+users/students/groups documents go out through the bulk writer.
+
+    python -m harness.seeding --professors 5 --groups 20 --students 1000
+"""
+
+import argparse
+import asyncio
+import functools
+import random
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from harness.auth import get_session, get_token_cache
+from harness.bulk import rest_firestore_bulk_write
+from harness.emulator import (
+    EmulatorClient,
+    get_client,
+    rest_set_claims,
+    set_client,
+)
+
+SEED_PASSWORD = "password123"
+JOIN_CODE_CHARS = string.ascii_uppercase + string.digits
+
+
+class Progress:
+    """Prints throughput at most once per `interval` seconds and at completion."""
+
+    def __init__(self, label, total, interval=1.0):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last_print = 0.0
+
+    def tick(self, ok=True):
+        self.done += 1
+        if not ok:
+            self.failed += 1
+        now = time.monotonic()
+        if self.done == self.total or now - self._last_print >= self.interval:
+            self._last_print = now
+            elapsed = now - self.started
+            rate = self.done / elapsed if elapsed > 0 else 0.0
+            print(f"[SEED] {self.label}: {self.done}/{self.total} ({self.failed} failed, {rate:.1f}/s)")
+
+
+class WorkerPool:
+    """
+    Runs blocking calls for asyncio tasks on `concurrency` dedicated threads.
+
+    asyncio.to_thread uses the loop's default executor, which has
+    min(32, cpu + 4) workers, so a Semaphore(50) in front of it still ran
+    about five calls at once on a small CI runner. `peak` is the number of
+    calls that actually ran at the same time.
+    """
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="harness-worker")
+        self.peak = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(self._call, fn, args, kwargs))
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self._in_flight += 1
+            self.peak = max(self.peak, self._in_flight)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class SeededClassroom:
+    """Everything the seeder created, for scenarios that need ids and credentials."""
+
+    def __init__(self):
+        self.professors = []  # [{"uid", "email"}]
+        self.students = []    # [{"uid", "email", "groups"}]
+        self.groups = []      # [{"id", "name", "ownerId", "joinCode", "studentIds"}]
+        self.failures = []
+
+    def to_dict(self):
+        return {"professors": self.professors, "students": self.students, "groups": self.groups,
+                "password": SEED_PASSWORD}
+
+
+def _join_code(rng):
+    return "".join(rng.choice(JOIN_CODE_CHARS) for _ in range(6))
+
+
+async def _create_account(sem, workers, email, role, progress, classroom):
+    async with sem:
+        try:
+            session = await workers.run(get_session, email, SEED_PASSWORD)
+            uid = session.uid
+            await workers.run(rest_set_claims, uid, {"role": role})
+        except Exception as e:
+            classroom.failures.append({"email": email, "error": str(e)})
+            progress.tick(ok=False)
+            return None
+    progress.tick()
+    return {"uid": uid, "email": email}
+
+
+async def seed_classroom(professors, groups, students, concurrency=32, prefix="seed", seed=None):
+    """Seeds the emulators and returns a SeededClassroom."""
+    rng = random.Random(seed)
+    classroom = SeededClassroom()
+    sem = asyncio.Semaphore(concurrency)
+    started = time.monotonic()
+
+    progress = Progress("accounts", professors + students)
+    with WorkerPool(concurrency) as workers:
+        prof_tasks = [
+            _create_account(sem, workers, f"{prefix}_prof_{i}@profesor.cz", "professor", progress, classroom)
+            for i in range(professors)
+        ]
+        stud_tasks = [
+            _create_account(sem, workers, f"{prefix}_student_{i}@example.com", "student", progress, classroom)
+            for i in range(students)
+        ]
+        accounts = await asyncio.gather(*prof_tasks, *stud_tasks)
+    print(f"[SEED] accounts: peak {workers.peak} calls in flight (concurrency {concurrency})")
+    classroom.professors = [a for a in accounts[:professors] if a]
+    classroom.students = [dict(a, groups=[]) for a in accounts[professors:] if a]
+
+    if not classroom.professors and groups:
+        raise Exception("No professor accounts could be created; cannot own groups.")
+
+    # Groups are owned round-robin by professors; students are spread round-robin over groups.
+    for g in range(groups):
+        owner = classroom.professors[g % len(classroom.professors)]
+        classroom.groups.append({
+            "id": f"{prefix}_group_{g}",
+            "name": f"Seed Group {g}",
+            "ownerId": owner["uid"],
+            "joinCode": _join_code(rng),
+            "studentIds": [],
+        })
+    if classroom.groups:
+        for i, student in enumerate(classroom.students):
+            group = classroom.groups[i % len(classroom.groups)]
+            group["studentIds"].append(student["uid"])
+            student["groups"].append(group["id"])
+
+    def ops():
+        for prof in classroom.professors:
+            yield ("users", prof["uid"], {
+                "email": prof["email"], "role": "professor", "name": prof["email"].split("@")[0]
+            }, None)
+        for student in classroom.students:
+            name = student["email"].split("@")[0]
+            yield ("users", student["uid"], {
+                "email": student["email"], "role": "student", "name": name,
+                "memberOfGroups": student["groups"]
+            }, None)
+            yield ("students", student["uid"], {
+                "email": student["email"], "role": "student", "name": name,
+                "memberOfGroups": student["groups"]
+            }, None)
+        for group in classroom.groups:
+            yield ("groups", group["id"], {
+                "name": group["name"], "ownerId": group["ownerId"],
+                "joinCode": group["joinCode"], "studentIds": group["studentIds"]
+            }, None)
+
+    total_docs = len(classroom.professors) + 2 * len(classroom.students) + len(classroom.groups)
+
+    def report(written, failed):
+        print(f"[SEED] documents: {written + failed}/{total_docs} ({failed} failed)")
+
+    get_token_cache().save()
+    result = await asyncio.to_thread(rest_firestore_bulk_write, ops(), progress=report)
+    classroom.failures.extend(result.failures)
+
+    elapsed = time.monotonic() - started
+    print(f"[SEED] Done in {elapsed:.1f}s: {len(classroom.professors)} professors, "
+          f"{len(classroom.groups)} groups, {len(classroom.students)} students, "
+          f"{len(classroom.failures)} failures.")
+    return classroom
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic classrooms into the Firebase emulators.")
+    parser.add_argument("--professors", type=int, default=1)
+    parser.add_argument("--groups", type=int, default=1)
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--prefix", default="seed")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for join codes")
+    args = parser.parse_args()
+
+    # Size the connection pool to the concurrency limit so tasks never wait on sockets.
+    set_client(EmulatorClient(pool_size=max(args.concurrency, 4)))
+    try:
+        classroom = asyncio.run(seed_classroom(
+            args.professors, args.groups, args.students,
+            concurrency=args.concurrency, prefix=args.prefix, seed=args.seed,
+        ))
+    finally:
+        get_client().close()
+    if classroom.failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Timing spans for harness steps, written as one JSON trace per run, and a
+report that diffs two runs.
+
+    from harness.trace import TRACE, span
+
+    with span("create_lesson", key="quiz"):      # context manager
+        ...
+
+    @span("student_phase")                        # decorator (sync or async)
+    def run_student_phase(...):
+        ...
+
+    TRACE.save()    # .harness/traces/<script>-<YYYYmmdd-HHMMSS>.json
+
+Spans nest per thread / asyncio task (the parent is tracked in a ContextVar),
+so matrix workers and concurrent async steps each get their own tree. A
+failed step is recorded with status "error" and the exception text. The
+helpers decorated with harness.ui.timed open spans automatically.
+
+    python -m harness.trace list
+    python -m harness.trace show [TRACE]
+    python -m harness.trace diff BASE.json NEW.json [--threshold 0.2] [--min-delta 0.5] [--fail]
+
+`diff` compares the two runs step by step (spans aggregated by name and key)
+and flags steps that got slower by more than `threshold` (relative) and
+`min-delta` seconds, or that started failing. Without arguments it compares
+the two most recent traces of the same script.
+"""
+
+import argparse
+import contextvars
+import functools
+import glob
+import inspect
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from harness.emulator import STATE_DIR
+
+TRACE_DIR = os.path.join(STATE_DIR, "traces")
+
+_current = contextvars.ContextVar("harness_span", default=None)
+
+
+class Tracer:
+    """Collects finished spans of one run. Thread-safe."""
+
+    def __init__(self, script=None):
+        self.script = script or os.path.splitext(os.path.basename(sys.argv[0] or "harness"))[0]
+        self.started_at = datetime.now(timezone.utc)
+        self._origin = time.monotonic()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.spans = []
+
+    def next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def offset(self):
+        return time.monotonic() - self._origin
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        return {
+            "script": self.script,
+            "startedAt": self.started_at.isoformat(),
+            "duration": self.offset(),
+            "argv": sys.argv,
+            "env": {k: v for k, v in os.environ.items() if k.startswith("HARNESS_") or k == "CI"},
+            "spans": spans,
+        }
+
+    def save(self, path=None):
+        """Writes the trace as JSON and returns its path."""
+        if path is None:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            stamp = self.started_at.astimezone().strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(TRACE_DIR, f"{self.script}-{stamp}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        print(f"[TRACE] {len(self.spans)} spans written to {path}")
+        return path
+
+
+TRACE = Tracer()
+
+
+def step_name(record):
+    return f"{record['name']}[{record['key']}]" if record.get("key") is not None else record["name"]
+
+
+class span:
+    """
+    Times a step as a context manager or decorator. `key` distinguishes
+    repeated steps (e.g. the content type) and `attrs` are stored as-is.
+    """
+
+    def __init__(self, name, key=None, tracer=None, **attrs):
+        self.name = name
+        self.key = key
+        self.tracer = tracer
+        self.attrs = attrs
+        self._state = threading.local()
+
+    def __enter__(self):
+        tracer = self.tracer or TRACE
+        parent = _current.get()
+        record = {
+            "id": tracer.next_id(),
+            "parent": parent["id"] if parent else None,
+            "name": self.name,
+            "key": self.key,
+            "thread": threading.current_thread().name,
+            "start": tracer.offset(),
+            "attrs": dict(self.attrs),
+        }
+        stack = getattr(self._state, "stack", None)
+        if stack is None:
+            stack = self._state.stack = []
+        stack.append((record, _current.set(record), tracer))
+        return record
+
+    def __exit__(self, exc_type, exc, tb):
+        record, token, tracer = self._state.stack.pop()
+        _current.reset(token)
+        record["duration"] = tracer.offset() - record["start"]
+        record["status"] = "ok" if exc_type is None else "error"
+        if exc is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"[:500]
+        tracer.add(record)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def __call__(self, fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                # A fresh span per call, so concurrent calls keep separate stacks.
+                with span(self.name, self.key, self.tracer, **self.attrs):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(self.name, self.key, self.tracer, **self.attrs):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+# --- Reports ---
+
+def load_trace(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_traces(script=None):
+    """Saved trace paths, oldest first."""
+    pattern = f"{script}-*.json" if script else "*.json"
+    return sorted(glob.glob(os.path.join(TRACE_DIR, pattern)), key=os.path.getmtime)
+
+
+def aggregate(trace):
+    """{step: {"count", "total", "errors"}} over all spans of a trace."""
+    steps = {}
+    for record in trace["spans"]:
+        s = steps.setdefault(step_name(record), {"count": 0, "total": 0.0, "errors": 0})
+        s["count"] += 1
+        s["total"] += record["duration"]
+        if record["status"] != "ok":
+            s["errors"] += 1
+    return steps
+
+
+def diff_traces(base, new, threshold=0.2, min_delta=0.5):
+    """
+    Per-step comparison rows sorted by time added. A step regressed when it
+    is slower by more than `threshold` (relative) and `min_delta` seconds,
+    or when it has errors now and had none before.
+    """
+    a, b = aggregate(base), aggregate(new)
+    rows = []
+    for step in sorted(set(a) | set(b)):
+        old, cur = a.get(step), b.get(step)
+        old_total = old["total"] if old else None
+        new_total = cur["total"] if cur else None
+        delta = (new_total or 0.0) - (old_total or 0.0)
+        ratio = new_total / old_total if old_total and new_total is not None else None
+        slower = old is not None and cur is not None and delta > min_delta and ratio is not None and ratio > 1 + threshold
+        failing = cur is not None and cur["errors"] > 0 and (old is None or old["errors"] == 0)
+        rows.append({
+            "step": step,
+            "base": old_total,
+            "new": new_total,
+            "delta": delta,
+            "ratio": ratio,
+            "base_errors": old["errors"] if old else 0,
+            "new_errors": cur["errors"] if cur else 0,
+            "regressed": slower or failing,
+        })
+    rows.sort(key=lambda r: -r["delta"])
+    return rows
+
+
+def _fmt(seconds):
+    return "-" if seconds is None else f"{seconds:7.2f}s"
+
+
+def print_diff(base_path, new_path, threshold=0.2, min_delta=0.5):
+    base, new = load_trace(base_path), load_trace(new_path)
+    rows = diff_traces(base, new, threshold, min_delta)
+    print(f"[TRACE] base: {base_path} ({base['duration']:.1f}s)")
+    print(f"[TRACE] new:  {new_path} ({new['duration']:.1f}s)")
+    print(f"{'':2} {'step':40} {'base':>8} {'new':>8} {'delta':>9} {'ratio':>6}  errors")
+    for r in rows:
+        mark = "!!" if r["regressed"] else "  "
+        ratio = f"{r['ratio']:5.2f}x" if r["ratio"] is not None else "     -"
+        errors = f"{r['base_errors']}->{r['new_errors']}" if r["base_errors"] or r["new_errors"] else ""
+        print(f"{mark} {r['step'][:40]:40} {_fmt(r['base']):>8} {_fmt(r['new']):>8} "
+              f"{r['delta']:+8.2f}s {ratio}  {errors}")
+    regressed = [r["step"] for r in rows if r["regressed"]]
+    if regressed:
+        print(f"[TRACE] {len(regressed)} step(s) regressed: {', '.join(regressed)}")
+    else:
+        print("[TRACE] No regressions.")
+    return regressed
+
+
+def print_trace(path):
+    trace = load_trace(path)
+    children = {}
+    for record in trace["spans"]:
+        children.setdefault(record["parent"], []).append(record)
+
+    def walk(parent, depth):
+        for record in children.get(parent, []):
+            status = "" if record["status"] == "ok" else f"  [{record.get('error', record['status'])}]"
+            print(f"{record['start']:8.2f}s {record['duration']:7.2f}s  {'  ' * depth}{step_name(record)}{status}")
+            walk(record["id"], depth + 1)
+
+    print(f"[TRACE] {trace['script']} started {trace['startedAt']}, {trace['duration']:.1f}s")
+    walk(None, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and compare harness run traces.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list")
+    p_list.add_argument("script", nargs="?")
+    p_show = sub.add_parser("show")
+    p_show.add_argument("trace", nargs="?")
+    p_diff = sub.add_parser("diff")
+    p_diff.add_argument("base", nargs="?")
+    p_diff.add_argument("new", nargs="?")
+    p_diff.add_argument("--script", help="compare the two latest traces of this script")
+    p_diff.add_argument("--threshold", type=float, default=0.2, help="relative slowdown that counts (0.2 = 20%%)")
+    p_diff.add_argument("--min-delta", type=float, default=0.5, help="absolute slowdown in seconds that counts")
+    p_diff.add_argument("--fail", action="store_true", help="exit with status 1 when a step regressed")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for path in list_traces(args.script):
+            trace = load_trace(path)
+            print(f"{path}  {trace['duration']:7.1f}s  {len(trace['spans'])} spans")
+        return
+
+    if args.command == "show":
+        path = args.trace or (list_traces() or [None])[-1]
+        if not path:
+            sys.exit("[TRACE] No traces saved yet.")
+        print_trace(path)
+        return
+
+    base, new = args.base, args.new
+    if not (base and new):
+        latest = base or (list_traces() or [None])[-1]
+        script = args.script or (load_trace(latest)["script"] if latest else None)
+        candidates = [p for p in list_traces(script) if p != base]
+        if base:
+            new = candidates[-1] if candidates else None
+        elif len(candidates) >= 2:
+            base, new = candidates[-2], candidates[-1]
+    if not (base and new):
+        sys.exit("[TRACE] Need two traces to compare.")
+    regressed = print_diff(base, new, args.threshold, args.min_delta)
+    if regressed and args.fail:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Server-side field transforms (array union/remove, increment, server timestamp)
+applied through documents:commit.
+
+Read-modify-write cycles on arrays lose updates when several clients write at
+once; a transform is evaluated by Firestore itself, so concurrent joins each
+land exactly once and several documents can change in one atomic request:
+
+    rest_firestore_commit([
+        transform_write("groups", group_id, {"studentIds": array_union(uid)}),
+        transform_write("users", uid, {"memberOfGroups": array_union(group_id)}),
+    ])
+"""
+
+from harness.bulk import merge_mask
+from harness.codec import to_fields, to_value
+from harness.emulator import get_client, rest_firestore_commit
+
+
+def array_union(*values):
+    return {"appendMissingElements": {"values": [to_value(v) for v in values]}}
+
+
+def array_remove(*values):
+    return {"removeAllFromArray": {"values": [to_value(v) for v in values]}}
+
+
+def increment(n=1):
+    return {"increment": to_value(n)}
+
+
+def server_timestamp():
+    return {"setToServerValue": "REQUEST_TIME"}
+
+
+def transform_write(collection, doc_id, transforms, data=None, client=None):
+    """
+    Builds a Write that applies `transforms` ({field_path: transform}) and
+    optionally merges the top-level keys of `data`. Other fields are left
+    untouched, and a missing document is created.
+    """
+    client = client or get_client()
+    data = data or {}
+    return {
+        "update": {"name": client.document_name(collection, doc_id), "fields": to_fields(data)},
+        "updateMask": {"fieldPaths": merge_mask(data)},
+        "updateTransforms": [dict(spec, fieldPath=path) for path, spec in transforms.items()],
+    }
+
+
+def rest_firestore_transform(collection, doc_id, transforms, data=None, client=None):
+    """Applies transforms to one document in a single round trip. Returns its transform results."""
+    client = client or get_client()
+    result = rest_firestore_commit([transform_write(collection, doc_id, transforms, data, client=client)], client=client)
+    return result.get("writeResults", [{}])[0].get("transformResults", [])
+
+
+def rest_join_group(group_id, student_uid, client=None):
+    """
+    Adds a student to a group the way the joinClass function does (group
+    roster + users profile), plus the legacy students mirror, atomically.
+    """
+    client = client or get_client()
+    return rest_firestore_commit([
+        transform_write("groups", group_id, {"studentIds": array_union(student_uid)}, client=client),
+        transform_write("users", student_uid, {"memberOfGroups": array_union(group_id)}, client=client),
+        transform_write("students", student_uid, {"memberOfGroups": array_union(group_id)}, client=client),
+    ], client=client)
+
+
+def rest_leave_group(group_id, student_uid, client=None):
+    """Inverse of rest_join_group."""
+    client = client or get_client()
+    return rest_firestore_commit([
+        transform_write("groups", group_id, {"studentIds": array_remove(student_uid)}, client=client),
+        transform_write("users", student_uid, {"memberOfGroups": array_remove(group_id)}, client=client),
+        transform_write("students", student_uid, {"memberOfGroups": array_remove(group_id)}, client=client),
+    ], client=client)
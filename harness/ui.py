@@ -0,0 +1,564 @@
+"""
+Shared Playwright helpers for the diagnostic scripts (sync front-end).
+
+The click/fill fallbacks, professor/student registration, group creation and
+the per-content-type editor inputs used to be copied into every script, and
+the copies had drifted apart (5s vs 15s click timeouts, typing vs filling).
+They now live here once. harness.ui_async mirrors the same helpers for
+playwright.async_api pages.
+
+Timeouts come from one TimeoutPolicy (TIMEOUTS), scaled by
+HARNESS_TIMEOUT_SCALE on slow machines, and every helper call is timed into
+UI_TIMINGS:
+
+    from harness.ui import TIMEOUTS, UI_TIMINGS, configure, login_professor
+    configure(screenshot_dir="screenshots_lite")
+    TIMEOUTS.set(click=5000)
+    ...
+    UI_TIMINGS.report("[UI]")
+"""
+
+import functools
+import inspect
+import json
+import os
+import re
+import time
+import uuid
+
+from playwright.sync_api import expect
+
+from harness.pagelog import LOGS
+from harness.trace import span
+from harness.waiters import LatencyRecorder
+
+BASE_URL = os.environ.get("BASE_URL", "http://localhost:5000")
+SCREENSHOT_DIR = "screenshots"
+
+
+def configure(base_url=None, screenshot_dir=None):
+    global BASE_URL, SCREENSHOT_DIR
+    if base_url:
+        BASE_URL = base_url
+    if screenshot_dir:
+        SCREENSHOT_DIR = screenshot_dir
+
+
+def log(msg):
+    print(f"[TEST] {msg}")
+    LOGS.record("harness", "info", str(msg))
+
+
+def screenshot_path(name):
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    return f"{SCREENSHOT_DIR}/{name}.png"
+
+
+class TimeoutPolicy:
+    """Default timeouts in milliseconds per kind of UI wait."""
+
+    DEFAULTS = {
+        "click": 15000,
+        "fill": 5000,
+        "modal": 5000,
+        "spinner": 20000,
+        "dashboard": 30000,
+        "dashboard_retry": 40000,
+        "student_dashboard": 20000,
+        "card": 10000,
+        "editor": 15000,
+        "generation": 45000,
+        "save_enabled": 20000,
+        "save": 20000,
+        "toast": 10000,
+        "navigation": 15000,
+        "negative_window": 1000,
+        "stability": 5000,
+    }
+
+    def __init__(self, scale=None, **overrides):
+        self.scale = scale if scale is not None else float(os.environ.get("HARNESS_TIMEOUT_SCALE", "1"))
+        self.values = dict(self.DEFAULTS, **overrides)
+
+    def set(self, **overrides):
+        unknown = set(overrides) - set(self.values)
+        if unknown:
+            raise KeyError(f"Unknown timeout kinds: {', '.join(sorted(unknown))}")
+        self.values.update(overrides)
+
+    def __getitem__(self, kind):
+        return int(self.values[kind] * self.scale)
+
+
+TIMEOUTS = TimeoutPolicy()
+UI_TIMINGS = LatencyRecorder()
+
+
+def timed(name, traced=True):
+    """
+    Records every call of the wrapped helper (sync or async) in UI_TIMINGS,
+    failed calls included. Steps (traced=True) also open a harness.trace span;
+    primitives like safe_click pass traced=False to keep traces readable.
+    """
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.monotonic()
+                try:
+                    if not traced:
+                        return await fn(*args, **kwargs)
+                    with span(name):
+                        return await fn(*args, **kwargs)
+                finally:
+                    UI_TIMINGS.record(name, time.monotonic() - started)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                if not traced:
+                    return fn(*args, **kwargs)
+                with span(name):
+                    return fn(*args, **kwargs)
+            finally:
+                UI_TIMINGS.record(name, time.monotonic() - started)
+        return wrapper
+    return decorate
+
+
+# --- Shared selectors and scripts (used by both front-ends) ---
+
+SAVE_BUTTON = "professor-header-editor button:has-text('Uložit změny')"
+SAVE_TOAST = "text='Změny úspěšně uloženy'"
+MODAL_INPUT = "div.fixed.inset-0 input[type='text']"
+GROUP_CODE_RE = re.compile(r"Kód:\s*([A-Z0-9]+)")
+
+SET_VALUE_JS = """(el, val) => {
+    el.value = val;
+    el.dispatchEvent(new Event('input', { bubbles: true, composed: true }));
+}"""
+
+SET_VALUE_AND_CHANGE_JS = """(el, val) => {
+    el.value = val;
+    el.dispatchEvent(new Event('input', { bubbles: true, composed: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true, composed: true }));
+}"""
+
+TRIGGER_JS = """(el) => {
+    el.dispatchEvent(new Event('input', { bubbles: true, composed: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true, composed: true }));
+}"""
+
+MANUAL_QUIZ = {
+    "questions": [
+        {
+            "question_text": "Manual Quiz Question 1",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "correct_option_index": 0,
+            "type": "Multiple Choice"
+        }
+    ]
+}
+
+
+def inject_quiz_js(quiz):
+    """Page scripts that put `quiz` into the open lesson editor, bypassing AI generation."""
+    data_json = json.dumps(quiz)
+    return [
+        f"""
+        const app = document.querySelector('lesson-editor');
+        if (app) {{
+            const newQuiz = {data_json};
+            app.lesson = {{ ...app.lesson, quiz: newQuiz }};
+            app.requestUpdate();
+        }}
+        """,
+        f"""
+        const editor = document.querySelector('editor-view-quiz');
+        if (editor) {{
+            editor.dispatchEvent(new CustomEvent('lesson-updated', {{
+                detail: {data_json},
+                bubbles: true,
+                composed: true
+            }}));
+        }}
+        """,
+    ]
+
+
+def extract_group_code(text):
+    match = GROUP_CODE_RE.search(text)
+    return match.group(1) if match else None
+
+
+# --- Primitives ---
+
+@timed("safe_click", traced=False)
+def safe_click(page, selector, timeout=None):
+    timeout = timeout or TIMEOUTS["click"]
+    log(f"Clicking: {selector}")
+    try:
+        page.click(selector, timeout=timeout)
+        return
+    except Exception as e:
+        log(f"Standard click failed for {selector}: {e}. Retrying with force=True...")
+
+    try:
+        page.locator(selector).first.click(force=True, timeout=timeout)
+        return
+    except Exception as e:
+        log(f"Force click failed for {selector}: {e}. Retrying with JS evaluation...")
+
+    try:
+        page.locator(selector).first.evaluate("el => el.click()")
+    except Exception as e:
+        log(f"JS click failed for {selector}: {e}")
+        page.screenshot(path=screenshot_path(f"click_fail_{uuid.uuid4().hex[:4]}"))
+        raise e
+
+
+@timed("safe_fill", traced=False)
+def safe_fill(page, selector, value, timeout=None):
+    timeout = timeout or TIMEOUTS["fill"]
+    log(f"Filling: {selector}")
+    try:
+        page.fill(selector, value, timeout=timeout)
+    except Exception as e:
+        log(f"Standard fill failed for {selector}: {e}. Retrying with force...")
+        try:
+            page.locator(selector).first.fill(value, force=True, timeout=timeout)
+        except Exception as e2:
+            log(f"Force fill failed for {selector}: {e2}. Attempting JS value set...")
+            try:
+                page.locator(selector).first.evaluate(SET_VALUE_JS, value)
+            except Exception as e3:
+                log(f"JS fill failed: {e3}")
+                raise e2
+
+
+@timed("safe_fill_and_trigger", traced=False)
+def safe_fill_and_trigger(page, selector, value, type_delay=None):
+    """
+    Fills an input and forces input/change events via JS so LitElement components see the change.
+
+    The final JS step sets the value itself, so a plain fill is enough; pass
+    `type_delay` (ms per key) only for inputs that react to individual keystrokes.
+    """
+    if type_delay:
+        log(f"Typing into: {selector}")
+        try:
+            field = page.locator(selector).first
+            field.click()
+            field.fill("")
+            field.type(value, delay=type_delay)
+        except Exception as e:
+            log(f"Type failed for {selector}: {e}. Fallback to safe_fill...")
+            safe_fill(page, selector, value)
+    else:
+        safe_fill(page, selector, value)
+
+    log(f"Triggering events for: {selector}")
+    try:
+        page.locator(selector).first.evaluate(SET_VALUE_AND_CHANGE_JS, value)
+    except Exception as e:
+        log(f"safe_fill_and_trigger evaluate failed: {e}")
+
+
+def fill_locator_and_trigger(locator, value):
+    locator.fill(value)
+    locator.evaluate(TRIGGER_JS)
+
+
+@timed("wait_for_stability", traced=False)
+def wait_for_stability(page, timeout=None):
+    """Waits for the global spinner and Toastify notifications to go away so they cannot intercept clicks."""
+    timeout = timeout or TIMEOUTS["stability"]
+    try:
+        spinner = page.locator("#global-spinner")
+        if spinner.count() > 0:
+            expect(spinner).to_be_hidden(timeout=timeout)
+        toasts = page.locator(".toastify")
+        if toasts.count() > 0:
+            expect(toasts.first).to_be_hidden(timeout=timeout)
+    except Exception as e:
+        log(f"Stability wait timed out (proceeding anyway): {e}")
+
+
+# --- Flows ---
+
+@timed("login_professor")
+def login_professor(page, email, password, name="Test Professor"):
+    """Registers a fresh professor account through the login view and waits for the dashboard."""
+    log("Registering/Logging in Professor...")
+    page.goto(f"{BASE_URL}/")
+    page.wait_for_selector("login-view", state="attached", timeout=TIMEOUTS["editor"])
+
+    if page.locator("text='Jsem Profesor'").is_visible():
+        safe_click(page, "button:has-text('Jsem Profesor')")
+
+    try:
+        log("Switching to Registration mode...")
+        safe_click(page, "a:has-text('Registrujte se')")
+        page.wait_for_selector("#register-name", state="visible", timeout=TIMEOUTS["modal"])
+    except Exception as e:
+        log(f"Registration switch failed: {e}")
+
+    log(f"Registering as {email}...")
+    safe_fill(page, "#register-name", name)
+    safe_fill(page, "#register-email", email)
+    safe_fill(page, "#register-password", password)
+
+    log("Submitting registration...")
+    page.keyboard.press("Enter")
+
+    log("Waiting for global spinner to disappear...")
+    try:
+        page.wait_for_selector("#global-spinner", state="hidden", timeout=TIMEOUTS["spinner"])
+    except Exception as e:
+        log(f"Spinner wait warning: {e}")
+
+    log("Waiting for Dashboard...")
+    try:
+        expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=TIMEOUTS["dashboard"])
+    except Exception:
+        log("Dashboard not visible immediately. Trying force navigation fallback...")
+        if page.locator("#register-name").is_visible():
+            safe_click(page, "button:has-text('Registrovat se')")
+            try:
+                page.wait_for_selector("professor-dashboard-view, #global-spinner", state="attached",
+                                         timeout=TIMEOUTS["modal"])
+            except Exception:
+                pass
+        page.reload()
+        expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=TIMEOUTS["dashboard_retry"])
+
+    log("Professor registered/logged in.")
+
+
+@timed("sign_in_professor")
+def sign_in_professor(page, email, password):
+    """Signs an existing professor in through the login form and waits for the dashboard."""
+    log(f"Signing in as {email}...")
+    page.goto(f"{BASE_URL}/")
+    page.wait_for_selector("login-view, professor-dashboard-view", state="attached", timeout=TIMEOUTS["editor"])
+    if page.locator("professor-dashboard-view").count() > 0:
+        return
+
+    if page.locator("text='Jsem Profesor'").is_visible():
+        safe_click(page, "button:has-text('Jsem Profesor')")
+
+    safe_fill(page, "#login-email", email)
+    safe_fill(page, "#login-password", password)
+    page.keyboard.press("Enter")
+    expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=TIMEOUTS["dashboard"])
+
+
+@timed("register_student")
+def register_student(page, email, password, name="Test Student"):
+    """Registers a fresh student account and waits for the student dashboard."""
+    page.goto(f"{BASE_URL}/")
+    page.wait_for_selector("login-view", state="attached", timeout=TIMEOUTS["editor"])
+
+    if page.locator("text='Jsem Student'").is_visible():
+        safe_click(page, "text='Jsem Student'")
+
+    if page.locator("text='Registrujte se'").is_visible():
+        safe_click(page, "text='Registrujte se'")
+
+    safe_fill(page, "#register-email", email)
+    safe_fill(page, "#register-password", password)
+    safe_fill(page, "#register-name", name)
+
+    page.keyboard.press("Enter")
+
+    try:
+        expect(page.locator("student-dashboard")).to_be_visible(timeout=TIMEOUTS["student_dashboard"])
+    except Exception:
+        safe_click(page, "button:has-text('Registrovat se')")
+        expect(page.locator("student-dashboard")).to_be_visible(timeout=TIMEOUTS["student_dashboard"])
+
+    log("Student logged in.")
+
+
+@timed("create_group")
+def create_group(page, group_name=None):
+    """Creates a class from the classes view. Returns (group_name, join_code)."""
+    log("Creating Group...")
+
+    try:
+        safe_click(page, "professor-navigation button:has-text('Třídy')")
+    except Exception:
+        safe_click(page, "professor-navigation button:has-text('Classes')")
+
+    expect(page.locator("professor-classes-view")).to_be_visible()
+
+    safe_click(page, "button:has-text('Vytvořit novou třídu')")
+
+    group_name = group_name or f"QA Group {uuid.uuid4().hex[:4]}"
+    page.wait_for_selector(MODAL_INPUT, state="visible", timeout=TIMEOUTS["modal"])
+    safe_fill(page, MODAL_INPUT, group_name)
+
+    safe_click(page, "div.fixed.inset-0 button:has-text('Uložit')")
+
+    card_selector = f".bg-white:has-text('{group_name}')"
+    try:
+        expect(page.locator(card_selector)).to_be_visible(timeout=TIMEOUTS["card"])
+    except Exception:
+        log("Card not found immediately. Reloading...")
+        page.reload()
+        safe_click(page, "professor-navigation button:has-text('Třídy')")
+        expect(page.locator(card_selector)).to_be_visible()
+
+    card = page.locator(card_selector).first
+    try:
+        code_el = card.locator("code")
+        if code_el.count() > 0:
+            code = code_el.inner_text().strip()
+            log(f"Group created: {group_name}, Code: {code}")
+        else:
+            code = extract_group_code(card.inner_text())
+            if not code:
+                raise Exception("Could not extract group code")
+            log(f"Group created: {group_name}, Code: {code} (via Regex)")
+    except Exception as e:
+        log(f"Failed to get group code: {e}")
+        page.screenshot(path=screenshot_path("group_code_fail"))
+        raise e
+
+    return group_name, code
+
+
+@timed("check_empty_save")
+def check_empty_save(page, label):
+    """Negative check: saving an empty editor must be refused (disabled button or no success toast)."""
+    log(f"[TEST] Testing Empty {label} Save...")
+    try:
+        save_btn = page.locator(SAVE_BUTTON)
+        if save_btn.is_disabled():
+            log(f"[LOGIC CHECK] Empty {label} save prevented: SUCCESS (Button Disabled)")
+        else:
+            save_btn.click(timeout=2000)
+            # Absence check: give a success toast a bounded window to show up.
+            try:
+                page.locator(SAVE_TOAST).wait_for(state="visible", timeout=TIMEOUTS["negative_window"])
+                saved = True
+            except Exception:
+                saved = False
+            if saved:
+                log(f"[LOGIC FAILURE] Empty {label} save succeeded!")
+            else:
+                log(f"[LOGIC CHECK] Empty {label} save prevented: SUCCESS (Toast/No-Action)")
+    except Exception as e:
+        log(f"[LOGIC CHECK] Error checking empty {label.lower()} save: {e}")
+
+
+# --- Editor inputs, one per content type ---
+
+@timed("input_text")
+def input_text(page):
+    if page.locator("ai-generator-panel").is_visible():
+        page.wait_for_selector("textarea#prompt-input", state="attached", timeout=TIMEOUTS["card"])
+        safe_fill(page, "textarea#prompt-input", "Write a short paragraph about Testing.")
+        safe_click(page, "button:has-text('Generovat')")
+        expect(page.locator(".prose")).to_be_visible(timeout=TIMEOUTS["generation"])
+
+
+@timed("input_presentation")
+def input_presentation(page):
+    if page.locator("ai-generator-panel").is_visible():
+        topic = "#prompt-input-topic"
+        fallback = "input[placeholder*='Klíčové momenty']"
+        page.wait_for_selector(f"{topic}, {fallback}", state="attached", timeout=TIMEOUTS["card"])
+        safe_fill(page, topic if page.locator(topic).count() > 0 else fallback, "Space Exploration")
+
+        safe_click(page, "button:has-text('Generovat')")
+        expect(page.locator(".bg-slate-50.relative").first).to_be_visible(timeout=TIMEOUTS["generation"])
+
+
+@timed("input_quiz")
+def input_quiz(page):
+    log("Injecting Manual Quiz Data (Bypassing AI)...")
+    for script in inject_quiz_js(MANUAL_QUIZ):
+        page.evaluate(script)
+
+    try:
+        expect(page.locator("h4.text-green-700").first).to_be_visible(timeout=TIMEOUTS["fill"])
+    except Exception:
+        log("Quiz update not visible immediately. Proceeding...")
+
+
+@timed("input_test")
+def input_test(page):
+    questions = page.locator("input[placeholder*='Zformulujte otázku']")
+    options = page.locator("input[placeholder*='Možnost']")
+    count, option_count = questions.count(), options.count()
+    safe_click(page, "button:has-text('Přidat otázku')")
+    # An existing question already matches the selector; wait for the new one.
+    expect(questions).to_have_count(count + 1, timeout=TIMEOUTS["card"])
+    fill_locator_and_trigger(questions.nth(count), "Test Question 1")
+    opts = options.all()[option_count:]
+    if len(opts) >= 2:
+        opts[0].fill("Option A")
+        opts[1].fill("Option B")
+
+
+@timed("input_post")
+def input_post(page):
+    safe_fill(page, "textarea", "Test Post Content")
+
+
+@timed("input_video")
+def input_video(page):
+    safe_fill_and_trigger(page, "input[placeholder*='youtube.com']", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+
+    # Blur the field so the editor validates the URL, then wait for the save button to unlock.
+    page.click("body")
+    expect(page.locator(SAVE_BUTTON)).to_be_enabled(timeout=TIMEOUTS["save_enabled"])
+
+
+@timed("input_comic")
+def input_comic(page):
+    if page.locator("ai-generator-panel").is_visible():
+        safe_click(page, "button:has-text('✍️')")
+        page.wait_for_selector("textarea", state="visible", timeout=TIMEOUTS["card"])
+
+    safe_fill(page, "textarea[placeholder*='Co se děje na obrázku']", "Scene 1")
+    safe_fill(page, "textarea[placeholder*='Co postavy říkají']", "Hello")
+
+
+@timed("input_flashcards")
+def input_flashcards(page):
+    fronts = page.locator("input[placeholder*='Mitochondrie']")
+    backs = page.locator("textarea[placeholder*='Vysvětlení pojmu']")
+    count = fronts.count()
+    safe_click(page, "button:has-text('Přidat kartu')")
+    # An existing card already matches the selector; wait for the new one.
+    expect(fronts).to_have_count(count + 1, timeout=TIMEOUTS["card"])
+    fill_locator_and_trigger(fronts.nth(count), "Front Test")
+    if backs.count():
+        fill_locator_and_trigger(backs.last, "Back Test")
+
+
+@timed("input_mindmap")
+def input_mindmap(page):
+    if page.locator("ai-generator-panel").is_visible():
+        safe_click(page, "button:has-text('Psát kód ručně')")
+        page.wait_for_selector("textarea", state="visible", timeout=TIMEOUTS["card"])
+
+    safe_fill(page, "textarea", "graph TD; A-->B;")
+    # The preview renders asynchronously; wait for it instead of sleeping.
+    try:
+        page.wait_for_selector("#mermaid-preview svg", state="attached", timeout=TIMEOUTS["fill"])
+    except Exception:
+        log("Mindmap preview not rendered yet. Proceeding...")
+
+
+@timed("input_audio")
+def input_audio(page):
+    selector = "#script-editor"
+    if page.locator(selector).count() == 0:
+        selector = "textarea[placeholder*='[Alex]']"
+
+    safe_fill_and_trigger(page, selector, "Test Audio Script")
@@ -0,0 +1,388 @@
+"""
+Async front-end of harness.ui for playwright.async_api pages.
+
+Same helpers, selectors, TimeoutPolicy and UI_TIMINGS as the sync module;
+only the Playwright calls are awaited.
+"""
+
+import uuid
+
+from playwright.async_api import expect
+
+from harness import ui
+from harness.ui import (
+    MANUAL_QUIZ, MODAL_INPUT, SAVE_BUTTON, SAVE_TOAST, SET_VALUE_AND_CHANGE_JS, SET_VALUE_JS, TIMEOUTS,
+    TRIGGER_JS, UI_TIMINGS, extract_group_code, inject_quiz_js, log, screenshot_path, timed,
+)
+
+__all__ = [
+    "TIMEOUTS", "UI_TIMINGS", "safe_click", "safe_fill", "safe_fill_and_trigger", "fill_locator_and_trigger",
+    "wait_for_stability",
+    "login_professor", "sign_in_professor", "register_student", "create_group", "check_empty_save", "input_text",
+    "input_presentation", "input_quiz", "input_test", "input_post", "input_video", "input_comic",
+    "input_flashcards", "input_mindmap", "input_audio",
+]
+
+
+# --- Primitives ---
+
+@timed("safe_click", traced=False)
+async def safe_click(page, selector, timeout=None):
+    timeout = timeout or TIMEOUTS["click"]
+    log(f"Clicking: {selector}")
+    try:
+        await page.click(selector, timeout=timeout)
+        return
+    except Exception as e:
+        log(f"Standard click failed for {selector}: {e}. Retrying with force=True...")
+
+    try:
+        await page.locator(selector).first.click(force=True, timeout=timeout)
+        return
+    except Exception as e:
+        log(f"Force click failed for {selector}: {e}. Retrying with JS evaluation...")
+
+    try:
+        await page.locator(selector).first.evaluate("el => el.click()")
+    except Exception as e:
+        log(f"JS click failed for {selector}: {e}")
+        await page.screenshot(path=screenshot_path(f"click_fail_{uuid.uuid4().hex[:4]}"))
+        raise e
+
+
+@timed("safe_fill", traced=False)
+async def safe_fill(page, selector, value, timeout=None):
+    timeout = timeout or TIMEOUTS["fill"]
+    log(f"Filling: {selector}")
+    try:
+        await page.fill(selector, value, timeout=timeout)
+    except Exception as e:
+        log(f"Standard fill failed for {selector}: {e}. Retrying with force...")
+        try:
+            await page.locator(selector).first.fill(value, force=True, timeout=timeout)
+        except Exception as e2:
+            log(f"Force fill failed for {selector}: {e2}. Attempting JS value set...")
+            try:
+                await page.locator(selector).first.evaluate(SET_VALUE_JS, value)
+            except Exception as e3:
+                log(f"JS fill failed: {e3}")
+                raise e2
+
+
+@timed("safe_fill_and_trigger", traced=False)
+async def safe_fill_and_trigger(page, selector, value, type_delay=None):
+    """See harness.ui.safe_fill_and_trigger."""
+    if type_delay:
+        log(f"Typing into: {selector}")
+        try:
+            field = page.locator(selector).first
+            await field.click()
+            await field.fill("")
+            await field.type(value, delay=type_delay)
+        except Exception as e:
+            log(f"Type failed for {selector}: {e}. Fallback to safe_fill...")
+            await safe_fill(page, selector, value)
+    else:
+        await safe_fill(page, selector, value)
+
+    log(f"Triggering events for: {selector}")
+    try:
+        await page.locator(selector).first.evaluate(SET_VALUE_AND_CHANGE_JS, value)
+    except Exception as e:
+        log(f"safe_fill_and_trigger evaluate failed: {e}")
+
+
+async def fill_locator_and_trigger(locator, value):
+    await locator.fill(value)
+    await locator.evaluate(TRIGGER_JS)
+
+
+@timed("wait_for_stability", traced=False)
+async def wait_for_stability(page, timeout=None):
+    """See harness.ui.wait_for_stability."""
+    timeout = timeout or TIMEOUTS["stability"]
+    try:
+        spinner = page.locator("#global-spinner")
+        if await spinner.count() > 0:
+            await expect(spinner).to_be_hidden(timeout=timeout)
+        toasts = page.locator(".toastify")
+        if await toasts.count() > 0:
+            await expect(toasts.first).to_be_hidden(timeout=timeout)
+    except Exception as e:
+        log(f"Stability wait timed out (proceeding anyway): {e}")
+
+
+# --- Flows ---
+
+@timed("login_professor")
+async def login_professor(page, email, password, name="Test Professor"):
+    """Registers a fresh professor account through the login view and waits for the dashboard."""
+    log("Registering/Logging in Professor...")
+    await page.goto(f"{ui.BASE_URL}/")
+    await page.wait_for_selector("login-view", state="attached", timeout=TIMEOUTS["editor"])
+
+    if await page.locator("text='Jsem Profesor'").is_visible():
+        await safe_click(page, "button:has-text('Jsem Profesor')")
+
+    try:
+        log("Switching to Registration mode...")
+        await safe_click(page, "a:has-text('Registrujte se')")
+        await page.wait_for_selector("#register-name", state="visible", timeout=TIMEOUTS["modal"])
+    except Exception as e:
+        log(f"Registration switch failed: {e}")
+
+    log(f"Registering as {email}...")
+    await safe_fill(page, "#register-name", name)
+    await safe_fill(page, "#register-email", email)
+    await safe_fill(page, "#register-password", password)
+
+    log("Submitting registration...")
+    await page.keyboard.press("Enter")
+
+    log("Waiting for global spinner to disappear...")
+    try:
+        await page.wait_for_selector("#global-spinner", state="hidden", timeout=TIMEOUTS["spinner"])
+    except Exception as e:
+        log(f"Spinner wait warning: {e}")
+
+    log("Waiting for Dashboard...")
+    try:
+        await expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=TIMEOUTS["dashboard"])
+    except Exception:
+        log("Dashboard not visible immediately. Trying force navigation fallback...")
+        if await page.locator("#register-name").is_visible():
+            await safe_click(page, "button:has-text('Registrovat se')")
+            try:
+                await page.wait_for_selector("professor-dashboard-view, #global-spinner", state="attached",
+                                         timeout=TIMEOUTS["modal"])
+            except Exception:
+                pass
+        await page.reload()
+        await expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=TIMEOUTS["dashboard_retry"])
+
+    log("Professor registered/logged in.")
+
+
+@timed("sign_in_professor")
+async def sign_in_professor(page, email, password):
+    """Signs an existing professor in through the login form and waits for the dashboard."""
+    log(f"Signing in as {email}...")
+    await page.goto(f"{ui.BASE_URL}/")
+    await page.wait_for_selector("login-view, professor-dashboard-view", state="attached", timeout=TIMEOUTS["editor"])
+    if await page.locator("professor-dashboard-view").count() > 0:
+        return
+
+    if await page.locator("text='Jsem Profesor'").is_visible():
+        await safe_click(page, "button:has-text('Jsem Profesor')")
+
+    await safe_fill(page, "#login-email", email)
+    await safe_fill(page, "#login-password", password)
+    await page.keyboard.press("Enter")
+    await expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=TIMEOUTS["dashboard"])
+
+
+@timed("register_student")
+async def register_student(page, email, password, name="Test Student"):
+    """Registers a fresh student account and waits for the student dashboard."""
+    await page.goto(f"{ui.BASE_URL}/")
+    await page.wait_for_selector("login-view", state="attached", timeout=TIMEOUTS["editor"])
+
+    if await page.locator("text='Jsem Student'").is_visible():
+        await safe_click(page, "text='Jsem Student'")
+
+    if await page.locator("text='Registrujte se'").is_visible():
+        await safe_click(page, "text='Registrujte se'")
+
+    await safe_fill(page, "#register-email", email)
+    await safe_fill(page, "#register-password", password)
+    await safe_fill(page, "#register-name", name)
+
+    await page.keyboard.press("Enter")
+
+    try:
+        await expect(page.locator("student-dashboard")).to_be_visible(timeout=TIMEOUTS["student_dashboard"])
+    except Exception:
+        await safe_click(page, "button:has-text('Registrovat se')")
+        await expect(page.locator("student-dashboard")).to_be_visible(timeout=TIMEOUTS["student_dashboard"])
+
+    log("Student logged in.")
+
+
+@timed("create_group")
+async def create_group(page, group_name=None):
+    """Creates a class from the classes view. Returns (group_name, join_code)."""
+    log("Creating Group...")
+
+    try:
+        await safe_click(page, "professor-navigation button:has-text('Třídy')")
+    except Exception:
+        await safe_click(page, "professor-navigation button:has-text('Classes')")
+
+    await expect(page.locator("professor-classes-view")).to_be_visible()
+
+    await safe_click(page, "button:has-text('Vytvořit novou třídu')")
+
+    group_name = group_name or f"QA Group {uuid.uuid4().hex[:4]}"
+    await page.wait_for_selector(MODAL_INPUT, state="visible", timeout=TIMEOUTS["modal"])
+    await safe_fill(page, MODAL_INPUT, group_name)
+
+    await safe_click(page, "div.fixed.inset-0 button:has-text('Uložit')")
+
+    card_selector = f".bg-white:has-text('{group_name}')"
+    try:
+        await expect(page.locator(card_selector)).to_be_visible(timeout=TIMEOUTS["card"])
+    except Exception:
+        log("Card not found immediately. Reloading...")
+        await page.reload()
+        await safe_click(page, "professor-navigation button:has-text('Třídy')")
+        await expect(page.locator(card_selector)).to_be_visible()
+
+    card = page.locator(card_selector).first
+    try:
+        code_el = card.locator("code")
+        if await code_el.count() > 0:
+            code = (await code_el.inner_text()).strip()
+            log(f"Group created: {group_name}, Code: {code}")
+        else:
+            code = extract_group_code(await card.inner_text())
+            if not code:
+                raise Exception("Could not extract group code")
+            log(f"Group created: {group_name}, Code: {code} (via Regex)")
+    except Exception as e:
+        log(f"Failed to get group code: {e}")
+        await page.screenshot(path=screenshot_path("group_code_fail"))
+        raise e
+
+    return group_name, code
+
+
+@timed("check_empty_save")
+async def check_empty_save(page, label):
+    """Negative check: saving an empty editor must be refused (disabled button or no success toast)."""
+    log(f"[TEST] Testing Empty {label} Save...")
+    try:
+        save_btn = page.locator(SAVE_BUTTON)
+        if await save_btn.is_disabled():
+            log(f"[LOGIC CHECK] Empty {label} save prevented: SUCCESS (Button Disabled)")
+        else:
+            await save_btn.click(timeout=2000)
+            # Absence check: give a success toast a bounded window to show up.
+            try:
+                await page.locator(SAVE_TOAST).wait_for(state="visible", timeout=TIMEOUTS["negative_window"])
+                saved = True
+            except Exception:
+                saved = False
+            if saved:
+                log(f"[LOGIC FAILURE] Empty {label} save succeeded!")
+            else:
+                log(f"[LOGIC CHECK] Empty {label} save prevented: SUCCESS (Toast/No-Action)")
+    except Exception as e:
+        log(f"[LOGIC CHECK] Error checking empty {label.lower()} save: {e}")
+
+
+# --- Editor inputs, one per content type ---
+
+@timed("input_text")
+async def input_text(page):
+    if await page.locator("ai-generator-panel").is_visible():
+        await page.wait_for_selector("textarea#prompt-input", state="attached", timeout=TIMEOUTS["card"])
+        await safe_fill(page, "textarea#prompt-input", "Write a short paragraph about Testing.")
+        await safe_click(page, "button:has-text('Generovat')")
+        await expect(page.locator(".prose")).to_be_visible(timeout=TIMEOUTS["generation"])
+
+
+@timed("input_presentation")
+async def input_presentation(page):
+    if await page.locator("ai-generator-panel").is_visible():
+        topic = "#prompt-input-topic"
+        fallback = "input[placeholder*='Klíčové momenty']"
+        await page.wait_for_selector(f"{topic}, {fallback}", state="attached", timeout=TIMEOUTS["card"])
+        await safe_fill(page, topic if await page.locator(topic).count() > 0 else fallback, "Space Exploration")
+
+        await safe_click(page, "button:has-text('Generovat')")
+        await expect(page.locator(".bg-slate-50.relative").first).to_be_visible(timeout=TIMEOUTS["generation"])
+
+
+@timed("input_quiz")
+async def input_quiz(page):
+    log("Injecting Manual Quiz Data (Bypassing AI)...")
+    for script in inject_quiz_js(MANUAL_QUIZ):
+        await page.evaluate(script)
+
+    try:
+        await expect(page.locator("h4.text-green-700").first).to_be_visible(timeout=TIMEOUTS["fill"])
+    except Exception:
+        log("Quiz update not visible immediately. Proceeding...")
+
+
+@timed("input_test")
+async def input_test(page):
+    questions = page.locator("input[placeholder*='Zformulujte otázku']")
+    options = page.locator("input[placeholder*='Možnost']")
+    count, option_count = await questions.count(), await options.count()
+    await safe_click(page, "button:has-text('Přidat otázku')")
+    # An existing question already matches the selector; wait for the new one.
+    await expect(questions).to_have_count(count + 1, timeout=TIMEOUTS["card"])
+    await fill_locator_and_trigger(questions.nth(count), "Test Question 1")
+    opts = (await options.all())[option_count:]
+    if len(opts) >= 2:
+        await opts[0].fill("Option A")
+        await opts[1].fill("Option B")
+
+
+@timed("input_post")
+async def input_post(page):
+    await safe_fill(page, "textarea", "Test Post Content")
+
+
+@timed("input_video")
+async def input_video(page):
+    await safe_fill_and_trigger(page, "input[placeholder*='youtube.com']", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+
+    await page.click("body")
+    await expect(page.locator(SAVE_BUTTON)).to_be_enabled(timeout=TIMEOUTS["save_enabled"])
+
+
+@timed("input_comic")
+async def input_comic(page):
+    if await page.locator("ai-generator-panel").is_visible():
+        await safe_click(page, "button:has-text('✍️')")
+        await page.wait_for_selector("textarea", state="visible", timeout=TIMEOUTS["card"])
+
+    await safe_fill(page, "textarea[placeholder*='Co se děje na obrázku']", "Scene 1")
+    await safe_fill(page, "textarea[placeholder*='Co postavy říkají']", "Hello")
+
+
+@timed("input_flashcards")
+async def input_flashcards(page):
+    fronts = page.locator("input[placeholder*='Mitochondrie']")
+    backs = page.locator("textarea[placeholder*='Vysvětlení pojmu']")
+    count = await fronts.count()
+    await safe_click(page, "button:has-text('Přidat kartu')")
+    # An existing card already matches the selector; wait for the new one.
+    await expect(fronts).to_have_count(count + 1, timeout=TIMEOUTS["card"])
+    await fill_locator_and_trigger(fronts.nth(count), "Front Test")
+    if await backs.count():
+        await fill_locator_and_trigger(backs.last, "Back Test")
+
+
+@timed("input_mindmap")
+async def input_mindmap(page):
+    if await page.locator("ai-generator-panel").is_visible():
+        await safe_click(page, "button:has-text('Psát kód ručně')")
+        await page.wait_for_selector("textarea", state="visible", timeout=TIMEOUTS["card"])
+
+    await safe_fill(page, "textarea", "graph TD; A-->B;")
+    try:
+        await page.wait_for_selector("#mermaid-preview svg", state="attached", timeout=TIMEOUTS["fill"])
+    except Exception:
+        log("Mindmap preview not rendered yet. Proceeding...")
+
+
+@timed("input_audio")
+async def input_audio(page):
+    selector = "#script-editor"
+    if await page.locator(selector).count() == 0:
+        selector = "textarea[placeholder*='[Alex]']"
+
+    await safe_fill_and_trigger(page, selector, "Test Audio Script")
@@ -0,0 +1,219 @@
+"""
+Core Web Vitals and app load milestones, sampled per view.
+
+VITALS_INIT_JS is installed with add_init_script, so its observers exist
+before the first byte of the app runs. It records FCP, LCP, CLS (shifts
+without recent input), long tasks, and performance marks for the app's
+milestones:
+
+    login-view-attached              <login-view> is in the DOM
+    professor-dashboard-view-visible <professor-dashboard-view> has a layout box
+    student-dashboard-visible        <student-dashboard> has a layout box
+
+All times are milliseconds since navigation start.
+
+    install(context)                                   # or await install_async(context)
+    page.goto(BASE_URL)
+    sample = collect(page, wait_for="professor-dashboard-view-visible")
+
+`python -m harness.vitals --runs 5` loads the login view, the professor
+dashboard and the student dashboard (API login, harness.login) in fresh
+contexts and prints p50/p75/p95 per metric; the samples are written to
+.harness/vitals/<timestamp>.json.
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+
+from harness.emulator import STATE_DIR
+from harness.waiters import percentile
+
+VITALS_DIR = os.path.join(STATE_DIR, "vitals")
+
+# Custom marks: mark name -> (selector, condition)
+MARKS = {
+    "login-view-attached": ("login-view", "attached"),
+    "professor-dashboard-view-visible": ("professor-dashboard-view", "visible"),
+    "student-dashboard-visible": ("student-dashboard", "visible"),
+}
+
+VITALS_INIT_JS = """(() => {
+    if (window.__harnessVitals) return;
+    const v = window.__harnessVitals = { fcp: null, lcp: null, cls: 0, longTasks: 0, longTaskMs: 0, marks: {} };
+    const observe = (type, fn) => {
+        try { new PerformanceObserver(list => list.getEntries().forEach(fn)).observe({ type, buffered: true }); }
+        catch (e) { /* entry type not supported */ }
+    };
+    observe('paint', e => { if (e.name === 'first-contentful-paint') v.fcp = e.startTime; });
+    observe('largest-contentful-paint', e => { v.lcp = e.renderTime || e.loadTime || e.startTime; });
+    observe('layout-shift', e => { if (!e.hadRecentInput) v.cls += e.value; });
+    observe('longtask', e => { v.longTasks += 1; v.longTaskMs += e.duration; });
+
+    const marks = MARKS_PLACEHOLDER;
+    const check = () => {
+        let pending = false;
+        for (const [name, [selector, state]] of Object.entries(marks)) {
+            if (v.marks[name] !== undefined) continue;
+            const el = document.querySelector(selector);
+            const hit = el && (state === 'attached' || el.getClientRects().length > 0);
+            if (hit) {
+                v.marks[name] = performance.now();
+                performance.mark(name);
+            } else {
+                pending = true;
+            }
+        }
+        return pending;
+    };
+    const tick = () => { if (check()) requestAnimationFrame(tick); };
+    new MutationObserver(check).observe(document, { childList: true, subtree: true });
+    requestAnimationFrame(tick);
+})();""".replace("MARKS_PLACEHOLDER", json.dumps({name: list(spec) for name, spec in MARKS.items()}))
+
+_COLLECT_JS = """() => {
+    const v = window.__harnessVitals;
+    if (!v) return null;
+    const nav = performance.getEntriesByType('navigation')[0];
+    return {
+        fcp: v.fcp, lcp: v.lcp, cls: v.cls, longTasks: v.longTasks, longTaskMs: v.longTaskMs,
+        domContentLoaded: nav ? nav.domContentLoadedEventEnd : null,
+        load: nav ? nav.loadEventEnd || null : null,
+        marks: v.marks,
+    };
+}"""
+
+_MARK_JS = "(name) => window.__harnessVitals && window.__harnessVitals.marks[name] !== undefined"
+
+
+def install(context_or_page):
+    context_or_page.add_init_script(VITALS_INIT_JS)
+
+
+async def install_async(context_or_page):
+    await context_or_page.add_init_script(VITALS_INIT_JS)
+
+
+def _flatten(raw):
+    if raw is None:
+        return {}
+    sample = {k: raw[k] for k in ("fcp", "lcp", "cls", "longTasks", "longTaskMs", "domContentLoaded", "load")
+              if raw.get(k) is not None}
+    for name, ms in raw["marks"].items():
+        sample[f"mark:{name}"] = ms
+    return sample
+
+
+def collect(page, wait_for=None, settle_ms=500, timeout=90000):
+    """
+    Waits for mark `wait_for` (if given), lets LCP/CLS settle for `settle_ms`,
+    and returns {metric: value} with marks as "mark:<name>".
+    """
+    if wait_for:
+        page.wait_for_function(_MARK_JS, arg=wait_for, timeout=timeout)
+    if settle_ms:
+        page.wait_for_timeout(settle_ms)
+    return _flatten(page.evaluate(_COLLECT_JS))
+
+
+async def collect_async(page, wait_for=None, settle_ms=500, timeout=90000):
+    if wait_for:
+        await page.wait_for_function(_MARK_JS, arg=wait_for, timeout=timeout)
+    if settle_ms:
+        await page.wait_for_timeout(settle_ms)
+    return _flatten(await page.evaluate(_COLLECT_JS))
+
+
+class VitalsSampler:
+    """Samples per view and metric, summarised as percentiles."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, view, sample):
+        metrics = self.samples.setdefault(view, {})
+        for metric, value in sample.items():
+            metrics.setdefault(metric, []).append(value)
+
+    def summary(self, percentiles=(50, 75, 95)):
+        return {
+            view: {metric: {"n": len(values), **{f"p{p}": percentile(values, p) for p in percentiles}}
+                   for metric, values in metrics.items()}
+            for view, metrics in self.samples.items()
+        }
+
+    def report(self, prefix="[VITALS]"):
+        for view, metrics in self.summary().items():
+            print(f"{prefix} {view}:")
+            for metric, s in sorted(metrics.items()):
+                unit = "" if metric == "cls" or metric == "longTasks" else "ms"
+                fmt = "{:.3f}" if metric == "cls" else "{:.0f}"
+                values = " ".join(f"p{p}={fmt.format(s[f'p{p}'])}{unit}" for p in (50, 75, 95))
+                print(f"{prefix}   {metric:40} n={s['n']:<3d} {values}")
+
+    def save(self, path=None):
+        if path is None:
+            os.makedirs(VITALS_DIR, exist_ok=True)
+            path = os.path.join(VITALS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"samples": self.samples, "summary": self.summary()}, f, indent=1)
+        print(f"[VITALS] Samples written to {path}")
+        return path
+
+
+def sample_view(browser, url, mark, storage_state=None, timeout=90000):
+    """One cold load of `url` in a fresh context, until `mark`."""
+    context = browser.new_context(storage_state=storage_state)
+    try:
+        install(context)
+        page = context.new_page()
+        page.goto(url)
+        return collect(page, wait_for=mark, timeout=timeout)
+    finally:
+        context.close()
+
+
+def main():
+    from playwright.sync_api import sync_playwright
+    from harness import ui
+    from harness.browser_pool import shared_browser
+    from harness.login import login_state
+
+    parser = argparse.ArgumentParser(description="Sample Core Web Vitals and load milestones per view.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--views", default="login,professor,student")
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    views = [v.strip() for v in args.views.split(",") if v.strip()]
+    run_id = uuid.uuid4().hex[:8]
+    personas = {
+        "professor": (f"vitals_prof_{run_id}@profesor.cz", "professor-dashboard-view-visible"),
+        "student": (f"vitals_student_{run_id}@example.com", "student-dashboard-visible"),
+    }
+    sampler = VitalsSampler()
+    with sync_playwright() as p:
+        with shared_browser(p, headless=not args.headed) as (browser, _):
+            states = {role: login_state(browser, role, email, "password123", f"Vitals {role}")
+                      for role, (email, _) in personas.items() if role in views}
+            for i in range(args.runs):
+                for view in views:
+                    try:
+                        if view == "login":
+                            sample = sample_view(browser, f"{ui.BASE_URL}/", "login-view-attached")
+                            sampler.add("login-view", sample)
+                        else:
+                            sample = sample_view(browser, f"{ui.BASE_URL}/", personas[view][1], states[view])
+                            sampler.add(MARKS[personas[view][1]][0], sample)
+                    except Exception as e:
+                        print(f"[VITALS] {view} run {i + 1} failed: {e}")
+                print(f"[VITALS] Run {i + 1}/{args.runs} done")
+
+    sampler.report()
+    sampler.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Event-driven waits on Firestore documents, with propagation latency metrics.
+
+`wait_for_document` resolves as soon as a document has changed past a known
+updateTime and matches a predicate. It polls the document (masked to the
+fields the predicate needs) with a short, growing interval: the emulator's
+Listen API is a WebChannel/gRPC stream that the plain REST client cannot
+drive, and conditional polling on updateTime gives the same "resolve on
+arrival" behaviour without fixed sleeps.
+
+`LatencyRecorder` collects write-to-visible timings so a run reports real
+propagation numbers instead of sleeping a constant 3 seconds.
+"""
+
+import time
+from contextlib import contextmanager
+
+from harness.codec import decode_fields
+from harness.emulator import get_client
+
+
+class WaitTimeout(Exception):
+    pass
+
+
+def parse_update_time(value):
+    """RFC 3339 updateTime -> comparable (seconds-string, nanos) tuple, keeping nanosecond precision."""
+    if not value:
+        return ("", 0)
+    base, _, frac = value.rstrip("Z").partition(".")
+    return (base, int(frac.ljust(9, "0")[:9]) if frac else 0)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class LatencyRecorder:
+    """Named latency samples in seconds, summarised as count/min/p50/p95/max."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, name, seconds):
+        self.samples.setdefault(name, []).append(seconds)
+
+    def summary(self):
+        out = {}
+        for name, values in self.samples.items():
+            out[name] = {
+                "count": len(values),
+                "min": min(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "max": max(values),
+            }
+        return out
+
+    def report(self, prefix="[LATENCY]"):
+        for name, s in self.summary().items():
+            print(f"{prefix} {name}: n={s['count']} p50={s['p50'] * 1000:.0f}ms "
+                  f"p95={s['p95'] * 1000:.0f}ms max={s['max'] * 1000:.0f}ms")
+
+
+LATENCIES = LatencyRecorder()
+
+
+@contextmanager
+def measured(name, recorder=LATENCIES):
+    """Records the duration of the block under `name` if it completes without raising."""
+    started = time.monotonic()
+    yield
+    recorder.record(name, time.monotonic() - started)
+
+
+def get_document_with_meta(collection, doc_id, fields=None, client=None):
+    """Returns (fields, updateTime) or (None, None) if the document does not exist."""
+    client = client or get_client()
+    params = [("mask.fieldPaths", f) for f in fields] if fields is not None else None
+    r = client.get(f"{client.firestore_url}/{collection}/{doc_id}", params=params)
+    if r.status_code == 404:
+        return None, None
+    r.raise_for_status()
+    raw = r.json()
+    return decode_fields(raw.get("fields")), raw.get("updateTime")
+
+
+def wait_for_document(collection, doc_id, predicate=None, after=None, fields=None, timeout=10.0,
+                      interval=0.02, max_interval=0.25, metric=None, recorder=LATENCIES, client=None):
+    """
+    Waits until collection/doc_id has been written after `after` (an updateTime)
+    and `predicate(fields)` holds. Returns the document fields.
+
+    With `metric`, the time until the change was observed is recorded.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    after_key = parse_update_time(after) if after else None
+    delay = interval
+    last = None
+
+    while True:
+        doc, update_time = get_document_with_meta(collection, doc_id, fields=fields, client=client)
+        last = doc
+        fresh = after_key is None or (update_time and parse_update_time(update_time) > after_key)
+        if doc is not None and fresh and (predicate is None or predicate(doc)):
+            if metric:
+                recorder.record(metric, time.monotonic() - started)
+            return doc
+        now = time.monotonic()
+        if now >= deadline:
+            raise WaitTimeout(f"{collection}/{doc_id} did not reach the expected state within {timeout}s (last: {last})")
+        time.sleep(min(delay, deadline - now))
+        delay = min(delay * 1.5, max_interval)
@@ -0,0 +1,30 @@
+import json
+from datetime import datetime, timezone
+
+from harness.codec import GeoPoint, Reference, decode_run_query, loads_run_query, to_fields
+
+
+def _run_query_body(data):
+    return json.dumps([
+        {"readTime": "2024-01-01T00:00:00Z"},
+        {"document": {"name": "projects/p/databases/(default)/documents/lessons/l1", "fields": to_fields(data)}},
+    ])
+
+
+def test_fast_path_matches_strict_decoding():
+    data = {
+        "title": "Mars", "count": 3, "ratio": 0.5, "flag": True, "nothing": None,
+        "tags": ["a", 1, [2, {"x": None}]], "nested": {"a": {"b": []}, "empty": {}},
+        "at": datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+        "where": GeoPoint(50.1, 14.4), "ref": Reference("projects/p/databases/(default)/documents/users/u1"),
+        "blob": b"\x00\x01",
+    }
+    body = _run_query_body(data)
+    assert loads_run_query(body) == list(decode_run_query(json.loads(body)))
+    assert loads_run_query(body)[0] == {"id": "l1", **data}
+
+
+def test_fields_named_like_value_types():
+    data = {"stringValue": 5, "m": {"mapValue": {"arrayValue": "x"}}, "a": [{"integerValue": None}]}
+    body = _run_query_body(data)
+    assert loads_run_query(body) == [{"id": "l1", **data}]
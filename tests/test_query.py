@@ -0,0 +1,15 @@
+from harness.query import Query, and_, field_filter
+
+
+def test_filterless_query_has_no_where():
+    assert Query("lessons").to_dict() == {"from": [{"collectionId": "lessons", "allDescendants": False}]}
+
+
+def test_empty_and_is_none():
+    assert and_() is None
+    assert and_(None) is None
+
+
+def test_single_filter_is_not_wrapped():
+    query = Query("lessons").where("ownerId", "==", "u1").to_dict()
+    assert query["where"] == field_filter("ownerId", "EQUAL", "u1")
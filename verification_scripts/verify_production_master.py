@@ -1,8 +1,25 @@
+import argparse
 import asyncio
+import glob
+import json
+import random
 import time
 import os
+import sys
+import uuid
 from playwright.async_api import async_playwright, expect
 
+# Make the repo-root harness package importable when run as verification_scripts/<script>.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness.callables import timeout_ms
+from harness.emulator import STATE_DIR
+from harness.join_load import LoadStats
+from harness.pagelog import LOGS
+from harness.ui import UI_TIMINGS, configure
+from harness.ui_async import TIMEOUTS, safe_click, wait_for_stability
+from harness.vitals import collect_async, install_async
+
 # --- Configuration ---
 HEADLESS = True  # Default
 if os.environ.get("CI"):
@@ -17,51 +34,41 @@ else:
 print(f"[CONFIG] Target: {BASE_URL}, Headless: {HEADLESS}")
 print("[VERSION] Verification Script v2.1 - Semantic & Observable")
 
+# Shared async UI helpers (harness.ui_async); this script has always used 5s click attempts.
+configure(base_url=BASE_URL)
+TIMEOUTS.set(click=5000)
+
 PROF_EMAIL_PREFIX = "prof_master_"
 STUDENT_NAME = "Test Student"
 
-async def safe_click(page, selector, timeout=5000):
-    try:
-        await page.locator(selector).first.click(timeout=timeout)
-    except Exception as e:
-        print(f"[WARN] Standard click failed: {e}. Retrying with force...")
-        await page.locator(selector).first.click(force=True, timeout=timeout)
-
-async def wait_for_stability(page):
-    """Waits for UI overlays (Spinner, Toasts) to disappear to prevent click interception."""
-    try:
-        # 1. Wait for Global Spinner (High Z-Index Overlay)
-        # Using .or_ to handle potential detachment or visibility states
-        spinner = page.locator("#global-spinner")
-        if await spinner.count() > 0:
-            await expect(spinner).to_be_hidden(timeout=5000)
-
-        # 2. Wait for Toasts (Toastify notifications)
-        # These often overlay the top-right or modal areas
-        toasts = page.locator(".toastify")
-        if await toasts.count() > 0:
-            await expect(toasts.first).to_be_hidden(timeout=5000)
+def backoff_delay(attempt, base=2.0, cap=60.0):
+    """Exponential backoff with jitter: half of base * 2^(attempt-1) (capped) plus up to as much again at random."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
 
-    except Exception as e:
-        print(f"[WARN] Stability wait timed out (proceeding anyway): {e}")
-
-async def run_with_retry(func, *args, name="Act", retries=3):
-    """Executes an async function with automatic retry logic."""
+async def run_with_retry(func, *args, name="Act", retries=3, base_delay=2.0, max_delay=60.0, screenshot_page=None):
+    """
+    Executes an async function with automatic retry logic (exponential backoff with jitter between attempts).
+    `screenshot_page` returns the page to capture on failure; without it, the first Page argument is used.
+    """
     for attempt in range(1, retries + 1):
         print(f"\n[EXEC] Starting {name} (Attempt {attempt}/{retries})...")
         try:
             return await func(*args)
         except Exception as e:
             print(f"[FAIL] {name} failed on attempt {attempt}: {e}")
-
-            # Attempt to capture screenshot from any argument that looks like a Page
-            page = None
-            for arg in args:
-                if hasattr(arg, 'screenshot'):
-                    page = arg
-                    break
-
-            if page:
+            # Console and page errors since the last failure, from both contexts
+            LOGS.failed(f"{name} (attempt {attempt})", e)
+
+            # Attempt to capture screenshot from the given page, or any argument that looks like a Page
+            page = screenshot_page() if screenshot_page else None
+            if page is None:
+                for arg in args:
+                    if hasattr(arg, 'screenshot'):
+                        page = arg
+                        break
+
+            if page and not page.is_closed():
                 timestamp = int(time.time())
                 sanitized_name = name.lower().replace(" ", "_").replace("-", "")
                 screenshot_path = f"failure_{sanitized_name}_attempt_{attempt}_{timestamp}.png"
@@ -75,8 +82,9 @@ async def run_with_retry(func, *args, name="Act", retries=3):
                 print(f"[CRITICAL] {name} failed permanently after {retries} attempts.")
                 raise e
 
-            print(f"[RETRY] Waiting 10 seconds before retrying {name}...")
-            await asyncio.sleep(10)
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            print(f"[RETRY] Waiting {delay:.1f}s before retrying {name}...")
+            await asyncio.sleep(delay)
 
 async def login_and_setup_professor(context):
     """Registers a new professor account."""
@@ -114,8 +122,8 @@ async def login_and_setup_professor(context):
 
     # Wait for Dashboard or Error
     try:
-        # Wait up to 90s for cold start
-        await page.wait_for_selector("professor-dashboard-view", timeout=90000)
+        # Cold start: probed registerUserWithRole first-call latency (python -m harness.callables probe), else 90s
+        await page.wait_for_selector("professor-dashboard-view", timeout=timeout_ms("registerUserWithRole", 90000, base_url=BASE_URL))
         print("[PROF] Dashboard Loaded.")
     except Exception:
         print("[FAIL] Dashboard did not load.")
@@ -166,14 +174,15 @@ async def act_1_architect(page):
     # Cytoscape creates multiple canvases. We just need to see one.
     canvas = page.locator("#competency-map canvas").first
     try:
-        # Increased timeout to 90s for Cold Starts
-        await canvas.wait_for(state="visible", timeout=90000)
+        # Cold start: probed analyzeSyllabus first-call latency, else 90s
+        await canvas.wait_for(state="visible", timeout=timeout_ms("analyzeSyllabus", 90000, base_url=BASE_URL))
         print("[ACT 1] Success: Cytoscape Graph rendered.")
     except Exception:
         print("[FAIL] Graph canvas not found.")
         raise
 
-async def act_2_project_setup(page):
+async def create_project(page):
+    """Generates and saves the "Mars Colonization" project; returns its lesson id."""
     print("[ACT 2] Project Setup...")
 
     # Navigate to Library
@@ -206,8 +215,9 @@ async def act_2_project_setup(page):
 
     # Wait for Roles (h3:has-text("Student Roles"))
     print("  - Waiting for Roles...")
-    # Bilingual Selectors & Extended Timeout (90s)
-    await page.locator("h3:has-text('Student Roles'), h3:has-text('Role studentů'), h3:has-text('Role')").first.wait_for(timeout=90000)
+    # Bilingual Selectors & cold-start timeout (probed generateProjectScaffolding latency, else 90s)
+    await page.locator("h3:has-text('Student Roles'), h3:has-text('Role studentů'), h3:has-text('Role')").first.wait_for(
+        timeout=timeout_ms("generateProjectScaffolding", 90000, base_url=BASE_URL))
     print("  - Roles generated.")
 
     # Save Project
@@ -218,20 +228,30 @@ async def act_2_project_setup(page):
     print("  - Waiting for save confirmation (Inject Crisis button)...")
     crisis_btn = page.locator("button:has-text('Inject Crisis')")
     await crisis_btn.wait_for(state="visible", timeout=10000)
-    print("[ACT 2] Project Saved.")
-
-    # ------------------------------------------------------------------
-    # MOVED FROM ACT 0: Create Class and Assign Lesson (Data Integrity Fix)
-    # ------------------------------------------------------------------
-    print("[ACT 2] Creating Class with valid lesson selection...")
-    # Navigate to Classes
-    await safe_click(page, "professor-navigation button[data-view='classes']")
-
+    project_id = await page.evaluate("() => document.querySelector('project-editor')?.lesson?.id || null")
+    print(f"[ACT 2] Project Saved ({project_id}).")
+    return project_id
+
+async def open_existing_class(page, class_name):
+    """Opens the class detail of `class_name` if the professor already has it; returns False if not."""
+    await page.wait_for_function(
+        "() => document.querySelector('professor-classes-view')?._isLoading === false", timeout=20000)
+    exists = await page.evaluate(
+        "(name) => (document.querySelector('professor-classes-view')._classes || []).some(c => c.name === name)",
+        class_name)
+    if not exists:
+        return False
+    print(f"  - Class '{class_name}' already exists (earlier attempt), opening it instead of creating another...")
+    await page.locator("professor-classes-view h3", has_text=class_name).first.click()
+    return True
+
+async def submit_new_class(page, class_name):
+    """Fills and saves the create-class modal."""
     # Click "Vytvořit novou třídu"
     await safe_click(page, "button:has-text('Vytvořit novou třídu')")
 
     # Fill Modal
-    await page.fill("div.fixed.inset-0 input[type='text']", f"Mars Mission Control {time.time()}")
+    await page.fill("div.fixed.inset-0 input[type='text']", class_name)
 
     # [STABILITY] Wait for overlays to clear (Spinner/Toasts)
     print("  - [STABILITY] Waiting for UI to stabilize before selection...")
@@ -255,7 +275,23 @@ async def act_2_project_setup(page):
     # Save
     await safe_click(page, "div.fixed.inset-0 button:has-text('Uložit')")
 
-    # The app automatically redirects to Class Detail View after creation
+async def create_class(page, class_name=None):
+    """
+    Creates a class with the project selected; returns (class name, join code, group id).
+    A retry with the same `class_name` reuses the class an earlier attempt created.
+    """
+    # ------------------------------------------------------------------
+    # MOVED FROM ACT 0: Create Class and Assign Lesson (Data Integrity Fix)
+    # ------------------------------------------------------------------
+    print("[ACT 2] Creating Class with valid lesson selection...")
+    # Navigate to Classes
+    await safe_click(page, "professor-navigation button[data-view='classes']")
+
+    class_name = class_name or f"Mars Mission Control {time.time()}"
+    if not await open_existing_class(page, class_name):
+        await submit_new_class(page, class_name)
+
+    # The app redirects to Class Detail View after creation (and the card click opens it)
     print("  - Waiting for redirect to Class Detail...")
     await page.wait_for_selector("professor-class-detail-view", timeout=20000)
 
@@ -265,7 +301,17 @@ async def act_2_project_setup(page):
     await code_el.wait_for()
     join_code = await code_el.text_content()
     join_code = join_code.strip()
+    class_id = await page.evaluate("() => document.querySelector('professor-class-detail-view')?.classData?.groupId || null")
     print(f"  - Class Created. Code: {join_code}")
+    return class_name, join_code, class_id
+
+async def publish_project(page, join_code):
+    """Publishes the project in the class; a no-op when it is already published, so a retry never unpublishes it."""
+    if not await page.locator("professor-class-detail-view").is_visible():
+        print(f"  - Opening class {join_code}...")
+        await safe_click(page, "professor-navigation button[data-view='classes']")
+        await page.locator("professor-classes-view div.cursor-pointer").filter(has_text=join_code).first.click()
+        await page.wait_for_selector("professor-class-detail-view", timeout=20000)
 
     # Verify Project Assignment (It should be automatic via creation)
     # Toggle "Publish" (Visibility)
@@ -293,27 +339,50 @@ async def act_2_project_setup(page):
     await lesson_card.wait_for(state="visible", timeout=10000)
     print(f"  - Publishing lesson: {await lesson_card.locator('h3').text_content()}")
 
+    if await lesson_card.locator("input[type='checkbox']").first.is_checked():
+        print("  - Project already published.")
+        return
+
     # Click the label to toggle checkbox
     await lesson_card.locator("label").click()
     print("  - Project Published.")
 
+async def act_2_project_setup(page):
+    """Project, class and publishing in one go; returns the join code."""
+    await create_project(page)
+    _, join_code, _ = await create_class(page)
+    await publish_project(page, join_code)
     return join_code
 
-async def act_3_student_join(context, join_code):
-    print(f"[ACT 3] Student Joining Class {join_code}...")
-    page = await context.new_page()
-
-    await page.goto(BASE_URL)
-
-    # Check for both states (Dashboard or Login)
-    await expect(page.locator("student-dashboard").or_(page.locator("login-view"))).to_be_visible()
-
-    if await page.locator("student-dashboard").is_visible():
-        print("  - Already logged in. Logging out to ensure clean state...")
-        await safe_click(page, "student-dashboard button:has-text('Odhlásit'), student-dashboard button:has-text('Logout'), student-dashboard button:has-text('Sair')")
-        await page.wait_for_selector("login-view")
-
-    # Login as Student (Registration Required)
+# Join outcome signals (join_class)
+JOIN_ERROR_SELECTOR = ".toast-error:visible, .bg-red-600:visible, .text-red-500:visible"
+
+# Listens to users/{uid} with the app's own Firestore instance; window.__harnessMembership
+# resolves with memberOfGroups once it grows past its value at arming time.
+ARM_MEMBERSHIP_JS = """async () => {
+    const { db, auth } = await import('/js/firebase-init.js');
+    const { doc, onSnapshot } = await import('https://www.gstatic.com/firebasejs/10.12.2/firebase-firestore.js');
+    if (window.__harnessMembershipUnsub) window.__harnessMembershipUnsub();
+    let armed;
+    const ready = new Promise(resolve => { armed = resolve; });
+    window.__harnessMembership = new Promise((resolve, reject) => {
+        let initial = null;
+        window.__harnessMembershipUnsub = onSnapshot(doc(db, 'users', auth.currentUser.uid), snap => {
+            const groups = (snap.exists() && snap.data().memberOfGroups) || [];
+            if (initial === null) {
+                initial = groups.length;
+                armed();
+            } else if (groups.length > initial) {
+                window.__harnessMembershipUnsub();
+                resolve(groups);
+            }
+        }, err => { armed(); reject(err.message); });
+    });
+    await ready;
+}"""
+
+async def register_student(page):
+    """Registers a fresh student from the login view; returns the email."""
     await page.wait_for_selector("login-view")
 
     # Click "Jsem Student"
@@ -326,8 +395,8 @@ async def act_3_student_join(context, join_code):
     MAX_RETRIES = 3
     for attempt in range(MAX_RETRIES):
         try:
-            # Generate unique email for each attempt to avoid collisions
-            student_email = f"student_{time.time()}@test.cz"
+            # Generate unique email for each attempt to avoid collisions (also across concurrent students)
+            student_email = f"student_{time.time()}_{uuid.uuid4().hex[:6]}@test.cz"
             print(f"  - Registration Attempt {attempt+1}/{MAX_RETRIES} ({student_email})")
 
             await page.fill("#register-name", STUDENT_NAME)
@@ -337,7 +406,7 @@ async def act_3_student_join(context, join_code):
 
             # Wait for Student Dashboard
             print("  - Waiting for student dashboard...")
-            await page.wait_for_selector("student-dashboard", timeout=90000)
+            await page.wait_for_selector("student-dashboard", timeout=timeout_ms("registerUserWithRole", 90000, base_url=BASE_URL))
             print("  - Student Dashboard Loaded.")
             break
 
@@ -357,99 +426,143 @@ async def act_3_student_join(context, join_code):
                 print("[FAIL] All registration attempts failed.")
                 raise
 
-    # Join Class via Dashboard
+    return student_email
+
+async def join_class(page, join_code, stats=None):
+    """
+    Joins `join_code` through the dashboard modal, retrying. Each attempt's
+    submit-to-outcome time and the student's outcome go to `stats`
+    (harness.join_load.LoadStats) when given.
+    """
     print("  - Opening Join Class Modal...")
+    join_started = time.monotonic()
 
     # Retry Loop for Join
     JOIN_RETRIES = 3
     join_success = False
+    join_timeout = timeout_ms("joinClass", 45000, base_url=BASE_URL)
 
     for join_attempt in range(JOIN_RETRIES):
         try:
             print(f"  - Join Attempt {join_attempt+1}/{JOIN_RETRIES}...")
 
-            # Button with Rocket icon or "Připojit se k třídě"
-            join_btn = page.locator("button:has-text('Připojit se k třídě')")
-            if not await join_btn.is_visible():
-                join_btn = page.locator("div.bg-indigo-50:has-text('🚀')").locator("xpath=..")
+            code_input = page.locator("input[placeholder='CODE']")
+            if not await code_input.is_visible():
+                # Button with Rocket icon or "Připojit se k třídě"
+                join_btn = page.locator("button:has-text('Připojit se k třídě')")
+                if not await join_btn.is_visible():
+                    join_btn = page.locator("div.bg-indigo-50:has-text('🚀')").locator("xpath=..")
 
-            await join_btn.wait_for(state="visible", timeout=5000)
-            await join_btn.click()
+                await join_btn.wait_for(state="visible", timeout=5000)
+                await join_btn.click()
 
             # Fill Code
             print(f"  - Entering Code: {join_code}")
-            await page.fill("input[placeholder='CODE']", join_code)
+            await code_input.fill(join_code)
 
-            # Setup Dialog Handler
-            dialog_appeared = False
+            # Arm the outcome signals before submitting, so none of them can be missed
+            loop = asyncio.get_running_loop()
+            dialog_future = loop.create_future()
             async def handle_dialog(dialog):
-                nonlocal dialog_appeared
-                dialog_appeared = True
-                print(f"  - Dialog detected: {dialog.message}")
+                if not dialog_future.done():
+                    dialog_future.set_result(dialog.message)
+                # alert() blocks the page (and its Firestore listeners) until accepted
                 await dialog.accept()
 
             page.on("dialog", handle_dialog)
+            await page.evaluate(ARM_MEMBERSHIP_JS)
 
             # Submit
             await page.press("input[placeholder='CODE']", "Enter")
-
-            # Wait for either Success (Dialog) or Failure (Error Toast)
-            start_time = time.time()
-            success = False
-            error_found = False
-
-            while time.time() - start_time < 45:
-                if dialog_appeared:
-                    success = True
-                    break
-
-                # Check for error toast
-                error_toast = page.locator(".toast-error, .bg-red-600, .text-red-500").first
-                if await error_toast.is_visible():
-                    error_msg = await error_toast.text_content()
-                    print(f"[WARN] Join failed with error: {error_msg}")
-                    error_found = True
-                    break
-
-                await asyncio.sleep(0.5)
-
-            # Cleanup handler
-            page.remove_listener("dialog", handle_dialog)
+            attempt_started = time.monotonic()
+
+            # Resolve on whichever fires first: success alert, inline error / error toast, or the membership write
+            signals = {
+                asyncio.ensure_future(dialog_future): "dialog",
+                asyncio.ensure_future(page.locator(JOIN_ERROR_SELECTOR).first.wait_for(
+                    state="visible", timeout=join_timeout)): "error",
+                asyncio.ensure_future(page.evaluate("() => window.__harnessMembership")): "membership",
+            }
+            done, pending = await asyncio.wait(signals, timeout=join_timeout / 1000,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            # A locator wait that timed out "completes" with an exception; only a clean result is a signal
+            fired = [signals[t] for t in done if not t.cancelled() and t.exception() is None]
+            for task in pending:
+                task.cancel()
+            for task in done:
+                if not task.cancelled():
+                    task.exception()  # retrieved, so asyncio does not log it
+
+            error_msg = None
+            if "error" in fired and "dialog" not in fired and "membership" not in fired:
+                error_msg = (await page.locator(JOIN_ERROR_SELECTOR).first.text_content() or "").strip()
+                print(f"[WARN] Join failed with error: {error_msg}")
+            success = "dialog" in fired or "membership" in fired
+            elapsed = time.monotonic() - attempt_started
+
+            if stats is not None:
+                outcome = None if success else (error_msg or "timed out")
+                stats.call(elapsed, outcome)
 
             if success:
-                print("  - Join Success confirmed via Dialog.")
+                print(f"  - Join confirmed via {' + '.join(fired)} after {elapsed:.2f}s.")
                 join_success = True
 
-                # --- FORCE SYNCHRONIZATION ---
-                print("  - [SYNC] Force Refreshing to fetch new class data...")
-                await page.reload()
-                await page.wait_for_selector("student-dashboard", timeout=30000)
-                print("  - [SYNC] Dashboard re-initialized.")
+                # The membership reaches the dashboard through its own listeners (users -> permission
+                # sync -> students -> lesson query); make sure the SDK has it instead of reloading.
+                if "membership" not in fired:
+                    try:
+                        await asyncio.wait_for(page.evaluate("() => window.__harnessMembership"), 15)
+                    except Exception as e:
+                        print(f"[WARN] Membership not yet visible to the client SDK: {e}")
+                page.remove_listener("dialog", handle_dialog)
                 break
 
-            if error_found:
-                 print("  - Retrying Join...")
-                 await asyncio.sleep(5)
-                 await page.reload()
-                 await page.wait_for_selector("student-dashboard")
-                 continue
-
-            # Timeout
-            print("[WARN] Join operation timed out.")
-            await page.reload()
-            await page.wait_for_selector("student-dashboard")
+            page.remove_listener("dialog", handle_dialog)
+            if error_msg is None:
+                print(f"[WARN] Join operation timed out after {elapsed:.0f}s.")
+            print("  - Retrying Join...")
+            await asyncio.sleep(2 * (join_attempt + 1))
             continue
 
         except Exception as e:
             print(f"[WARN] Join Attempt {join_attempt+1} exception: {e}")
             await asyncio.sleep(5)
+            # Broken page state: only here does a reload remain the recovery
             await page.reload()
             await page.wait_for_selector("student-dashboard")
 
+    if stats is not None:
+        stats.student(time.monotonic() - join_started, join_attempt + 1, join_success)
+
     if not join_success:
         print("[FAIL] Failed to join class after retries.")
         raise Exception("Failed to join class")
 
+async def student_join(context, join_code):
+    """Registers a student in `context` and joins `join_code`; returns the dashboard page."""
+    print(f"[ACT 3] Student Joining Class {join_code}...")
+    page = await context.new_page()
+
+    await page.goto(BASE_URL)
+
+    # Check for both states (Dashboard or Login)
+    await expect(page.locator("student-dashboard").or_(page.locator("login-view"))).to_be_visible()
+
+    if await page.locator("student-dashboard").is_visible():
+        print("  - Already logged in. Logging out to ensure clean state...")
+        await safe_click(page, "student-dashboard button:has-text('Odhlásit'), student-dashboard button:has-text('Logout'), student-dashboard button:has-text('Sair')")
+        await page.wait_for_selector("login-view")
+
+    # Login as Student (Registration Required)
+    await register_student(page)
+
+    # Join Class via Dashboard
+    await join_class(page, join_code)
+    return page
+
+async def open_student_project(page):
+    """Opens the assigned project from the student dashboard and takes the 'Project Manager' role."""
     # Wait for Dashboard to update with "Active Lesson" (Real-time)
     print("  - Waiting for 'Active Lesson' card to appear...")
 
@@ -577,6 +690,10 @@ async def act_3_student_join(context, join_code):
     await page.locator("student-project-view").or_(page.locator("student-lesson-detail")).or_(page.locator("student-task-view")).first.wait_for(timeout=30000)
     print("  - Role Selection/Lesson View loaded.")
 
+    if await page.locator("text=Active Phase").first.is_visible():
+        print("[ACT 3] Role already selected.")
+        return page
+
     print("  - Selecting Role 'Project Manager'...")
     try:
         await safe_click(page, "h3:has-text('Project Manager')")
@@ -596,6 +713,10 @@ async def act_3_student_join(context, join_code):
 
     return page
 
+async def act_3_student_join(context, join_code):
+    page = await student_join(context, join_code)
+    return await open_student_project(page)
+
 async def act_4_crisis(prof_page, student_page):
     print("[ACT 4] The Crisis...")
 
@@ -691,48 +812,268 @@ async def act_5_analytics(prof_page):
     else:
         print("[WARN] Export button not found.")
 
-async def run():
+async def report_vitals(page, label):
+    """Prints how long the view actually took to come up (the dashboard waits allow up to 90s for cold start)."""
+    try:
+        sample = await collect_async(page, settle_ms=0)
+    except Exception as e:
+        print(f"[VITALS] {label}: not available ({e})")
+        return
+    parts = [f"{k}={v:.0f}ms" if k != "cls" else f"cls={v:.3f}" for k, v in sample.items()]
+    print(f"[VITALS] {label}: {' '.join(parts)}")
+
+# --- Checkpointed pipeline ---
+# Every step persists its outputs to .harness/pipeline/<run>.json when it completes. A retry re-runs only
+# the failed step, and --resume continues an earlier run after its last completed step (sessions are
+# restored from the saved storage states), so a flaky click never repeats the AI generation before it.
+
+PIPELINE_DIR = os.path.join(STATE_DIR, "pipeline")
+
+class Checkpoint:
+    """Outputs of the completed pipeline steps, written to disk after every step."""
+
+    def __init__(self, path, steps=None):
+        self.path = path
+        self.steps = steps or {}
+
+    @classmethod
+    def new(cls):
+        return cls(os.path.join(PIPELINE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json"))
+
+    @classmethod
+    def load(cls, path=None):
+        """The checkpoint at `path`, or the most recent one."""
+        if not path:
+            runs = sorted(glob.glob(os.path.join(PIPELINE_DIR, "*.json")), key=os.path.getmtime)
+            if not runs:
+                raise Exception(f"No checkpoint to resume in {PIPELINE_DIR}")
+            path = runs[-1]
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("baseUrl") != BASE_URL:
+            raise Exception(f"Checkpoint {path} belongs to {data.get('baseUrl')}, not {BASE_URL}")
+        return cls(path, data["steps"])
+
+    def done(self, step):
+        return step in self.steps
+
+    def get(self, step, key, default=None):
+        return self.steps.get(step, {}).get(key, default)
+
+    def complete(self, step, **outputs):
+        self.steps[step] = {"completedAt": time.strftime("%Y-%m-%dT%H:%M:%S"), **outputs}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"baseUrl": BASE_URL, "steps": self.steps}, f, indent=1)
+        os.replace(f"{self.path}.tmp", self.path)
+
+async def run_step(checkpoint, name, func, *args, retries=3, screenshot_page=None):
+    """Runs a step unless the checkpoint has it; `func` returns the outputs to persist (a dict or None)."""
+    if checkpoint.done(name):
+        print(f"[PIPELINE] {name}: completed at {checkpoint.get(name, 'completedAt')}, skipping")
+        return
+    with LOGS.step(name):
+        outputs = await run_with_retry(func, *args, name=name, retries=retries, screenshot_page=screenshot_page)
+    checkpoint.complete(name, **(outputs or {}))
+    print(f"[PIPELINE] {name}: checkpointed")
+
+class Live:
+    """The run's browser contexts and pages; pages are reopened when a resumed run has none."""
+
+    def __init__(self, context_prof, context_student, checkpoint):
+        self.context_prof = context_prof
+        self.context_student = context_student
+        self.checkpoint = checkpoint
+        self.prof_page = None
+        self.student_page = None
+        self.active_page = None    # the page of the running step (failure screenshots)
+        self.class_name = None     # stays the same across retries of the class step
+
+    async def professor(self):
+        if self.prof_page is None or self.prof_page.is_closed():
+            self.prof_page = await self.context_prof.new_page()
+            await self.prof_page.goto(BASE_URL)
+            await self.prof_page.wait_for_selector("professor-dashboard-view", timeout=timeout_ms("registerUserWithRole", 90000, base_url=BASE_URL))
+        self.active_page = self.prof_page
+        return self.prof_page
+
+    async def student(self):
+        if self.student_page is None or self.student_page.is_closed():
+            self.student_page = await self.context_student.new_page()
+            await self.student_page.goto(BASE_URL)
+            await self.student_page.wait_for_selector("student-dashboard", timeout=timeout_ms("registerUserWithRole", 90000, base_url=BASE_URL))
+        self.active_page = self.student_page
+        return self.student_page
+
+    async def student_project(self):
+        """The student page on the project view (deep link when a resumed run starts elsewhere)."""
+        page = await self.student()
+        if not await page.locator("student-project-view").is_visible():
+            class_id = self.checkpoint.get("class", "classId")
+            project_id = self.checkpoint.get("project", "projectId")
+            await page.goto(f"{BASE_URL}/#student/class/{class_id}/lesson/{project_id}")
+            await page.wait_for_selector("student-project-view", timeout=30000)
+        return page
+
+async def step_professor(live):
+    live.prof_page = live.active_page = await login_and_setup_professor(live.context_prof)
+    await report_vitals(live.prof_page, "professor")
+    return {"storageState": await live.context_prof.storage_state(indexed_db=True)}
+
+async def step_architect(live):
+    await act_1_architect(await live.professor())
+
+async def step_project(live):
+    return {"projectId": await create_project(await live.professor())}
+
+async def step_class(live):
+    live.class_name = live.class_name or f"Mars Mission Control {time.time()}"
+    class_name, join_code, class_id = await create_class(await live.professor(), live.class_name)
+    return {"className": class_name, "joinCode": join_code, "classId": class_id}
+
+async def step_publish(live):
+    await publish_project(await live.professor(), live.checkpoint.get("class", "joinCode"))
+
+async def step_student(live):
+    live.student_page = live.active_page = await student_join(live.context_student, live.checkpoint.get("class", "joinCode"))
+    await report_vitals(live.student_page, "student")
+    return {"storageState": await live.context_student.storage_state(indexed_db=True)}
+
+async def step_student_project(live):
+    await open_student_project(await live.student())
+
+async def step_crisis(live):
+    await act_4_crisis(await live.professor(), await live.student_project())
+
+async def step_analytics(live):
+    await act_5_analytics(await live.professor())
+
+PIPELINE = [
+    ("professor", step_professor),              # Act 0
+    ("architect", step_architect),              # Act 1
+    ("project", step_project),                  # Act 2
+    ("class", step_class),
+    ("publish", step_publish),
+    ("student", step_student),                  # Act 3
+    ("student_project", step_student_project),
+    ("crisis", step_crisis),                    # Act 4
+    ("analytics", step_analytics),              # Act 5
+]
+
+async def run(resume=None):
+    checkpoint = Checkpoint.load(resume or None) if resume is not None else Checkpoint.new()
+    if resume is not None:
+        print(f"[PIPELINE] Resuming {checkpoint.path} after: {', '.join(checkpoint.steps) or 'nothing'}")
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=HEADLESS, args=["--no-sandbox", "--disable-setuid-sandbox"])
 
-        # Contexts
-        context_prof = await browser.new_context(permissions=['microphone'])
-        context_student = await browser.new_context()
-
-        # Debug Console
-        context_student.on("page", lambda page: page.on("console", lambda msg: print(f"[STUDENT CONSOLE] {msg.text}")))
-        context_prof.on("page", lambda page: page.on("console", lambda msg: print(f"[PROF CONSOLE] {msg.text}")))
-
-        try:
-            # Act 0 (Professor Setup)
-            prof_page = await run_with_retry(login_and_setup_professor, context_prof, name="Act 0 - Setup")
-
-            # Act 1 (Architect)
-            await run_with_retry(act_1_architect, prof_page, name="Act 1 - Architect")
-
-            # Act 2 (Project Setup)
-            # RETURNS join_code now
-            join_code = await run_with_retry(act_2_project_setup, prof_page, name="Act 2 - Project Setup")
+        # Contexts (signed in again from the checkpoint when resuming)
+        context_prof = await browser.new_context(permissions=['microphone'],
+                                                 storage_state=checkpoint.get("professor", "storageState"))
+        context_student = await browser.new_context(storage_state=checkpoint.get("student", "storageState"))
 
-            # Act 3 (Student Join)
-            student_page = await run_with_retry(act_3_student_join, context_student, join_code, name="Act 3 - Student Join")
+        # Load milestones (login-view attached, dashboards visible) are recorded from navigation start
+        await install_async(context_prof)
+        await install_async(context_student)
 
-            # Act 4 (Interaction)
-            await run_with_retry(act_4_crisis, prof_page, student_page, name="Act 4 - Crisis")
+        # Console output is buffered per page and written to .harness/logs/ when a step fails
+        LOGS.attach_context(context_student, "student")
+        LOGS.attach_context(context_prof, "prof")
 
-            # Act 5 (Analytics)
-            await run_with_retry(act_5_analytics, prof_page, name="Act 5 - Analytics")
+        live = Live(context_prof, context_student, checkpoint)
+        try:
+            for name, step in PIPELINE:
+                await run_step(checkpoint, name, step, live, screenshot_page=lambda: live.active_page)
 
             print("\n[SUCCESS] Master Production Verification Completed.")
 
         except Exception as e:
             print(f"\n[ERROR] Test Failed: {e}")
+            print(f"[PIPELINE] Continue after the last completed step with: --resume {checkpoint.path}")
             import traceback
             traceback.print_exc()
-            import sys
             sys.exit(1)
+        finally:
+            UI_TIMINGS.report("[UI]")
+            await browser.close()
+
+async def join_load_browser(join_code, students, concurrency, ramp=0.0):
+    """
+    Load mode: `students` browser contexts register and join `join_code`
+    through the real join modal, at most `concurrency` at a time, started
+    evenly over `ramp` seconds. Returns harness.join_load.LoadStats.
+    """
+    stats = LoadStats("joinClass (browser)")
+    sem = asyncio.Semaphore(concurrency)
+
+    async def student(i, browser):
+        if ramp:
+            await asyncio.sleep(ramp * i / students)
+        async with sem:
+            context = await browser.new_context()
+            joined = False
+            try:
+                page = await context.new_page()
+                await page.goto(BASE_URL)
+                await register_student(page)
+                joined = True
+                await join_class(page, join_code, stats)
+            except Exception as e:
+                print(f"[LOAD] Student {i + 1} failed: {e}")
+                if not joined:
+                    # Never reached the join modal; count it as a student that did not get in.
+                    stats.student(0.0, 0, False)
+            finally:
+                await context.close()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=HEADLESS, args=["--no-sandbox", "--disable-setuid-sandbox"])
+        try:
+            stats.start()
+            await asyncio.gather(*(student(i, browser) for i in range(students)))
+            stats.stop()
         finally:
             await browser.close()
+    stats.report()
+    return stats
+
+def seeded_join_code():
+    """A fresh class on the emulators (professor + group) for load mode without --join-code."""
+    from harness.seeding import seed_classroom
+    classroom = asyncio.run(seed_classroom(1, 1, 0, prefix=f"join_{uuid.uuid4().hex[:8]}"))
+    return classroom.groups[0]["joinCode"]
+
+def join_load(args):
+    join_code = args.join_code or seeded_join_code()
+    print(f"[LOAD] {args.join_load} students joining {join_code} via {args.join_mode} "
+          f"(concurrency {args.concurrency}, ramp {args.ramp:.0f}s)")
+    if args.join_mode == "api":
+        from harness.join_load import create_students, run_join_load
+        async def api():
+            sessions = await create_students(args.join_load, f"join_{uuid.uuid4().hex[:8]}", args.concurrency)
+            stats = await run_join_load(sessions, join_code, args.concurrency, args.ramp)
+            stats.report()
+            return stats
+        stats = asyncio.run(api())
+    else:
+        stats = asyncio.run(join_load_browser(join_code, args.join_load, args.concurrency, args.ramp))
+    if stats.failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    parser = argparse.ArgumentParser(description="Master production verification (Acts 0-5).")
+    parser.add_argument("--join-load", type=int, metavar="N",
+                        help="load mode: N students join one class concurrently instead of running the acts")
+    parser.add_argument("--join-mode", choices=["browser", "api"], default="browser",
+                        help="browser: one context per student through the join modal; api: joinClass callable clients")
+    parser.add_argument("--join-code", help="class to join (default: seed a fresh one on the emulators)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--ramp", type=float, default=0.0, help="spread the student starts over this many seconds")
+    parser.add_argument("--resume", nargs="?", const="", metavar="CHECKPOINT",
+                        help="continue a run after its last completed step (default: the latest checkpoint)")
+    args = parser.parse_args()
+    if args.join_load:
+        join_load(args)
+    else:
+        asyncio.run(run(args.resume))
@@ -5,6 +5,9 @@ import os
 import time
 from playwright.sync_api import sync_playwright, expect
 
+from harness.browser_pool import connect_or_launch
+from harness.pagelog import LOGS
+
 def run_server():
     """Starts a simple HTTP server serving the 'public' directory."""
     # Ensure we serve from the 'public' directory
@@ -33,7 +36,7 @@ def verify_lesson_editor_automagic_static_checks():
     time.sleep(2) # Give it a moment to start
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
+        browser = connect_or_launch(p, headless=True, args=())
         page = browser.new_page()
 
         try:
@@ -43,8 +46,7 @@ def verify_lesson_editor_automagic_static_checks():
             page.goto(url)
 
             # Check for console errors
-            page.on("console", lambda msg: print(f"Console: {msg.text}"))
-            page.on("pageerror", lambda err: print(f"Page Error: {err}"))
+            LOGS.attach(page, "editor")
 
             # Wait for load
             page.wait_for_load_state("networkidle")
@@ -60,6 +62,7 @@ def verify_lesson_editor_automagic_static_checks():
 
         except Exception as e:
             print(f"Error during verification: {e}")
+            LOGS.failed("automagic_load", e)
             raise e
         finally:
             browser.close()
@@ -1,5 +1,4 @@
 from playwright.sync_api import sync_playwright, expect
-import time
 import os
 import sys
 import uuid
@@ -7,9 +6,25 @@ import json
 import re
 import urllib.parse
 
+from harness.conditions import (
+    IDLE, expect_lesson_saved, wait_for_editor_idle, wait_for_join_result, wait_for_lesson_id,
+    wait_for_lit_update,
+)
+from harness.browser_pool import ContextPool, shared_browser
+from harness.fastmode import FAST_MODE
+from harness.fixtures import baseline_from_env
+from harness.login import open_persona
+from harness.pagelog import LOGS
+from harness.trace import TRACE, span
+from harness.ui import (
+    TIMEOUTS, UI_TIMINGS, configure, create_group, log, safe_click, safe_fill,
+    safe_fill_and_trigger,
+)
+
 # Ensure screenshots directory exists
 SCREENSHOT_DIR = "screenshots_lite"
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+configure(screenshot_dir=SCREENSHOT_DIR)
 
 # Generate unique professor email to ensure clean state in emulators
 PROFESSOR_EMAIL = f"profesor_{uuid.uuid4().hex[:8]}@profesor.cz"
@@ -26,168 +41,12 @@ GROUP_CODE = ""
 GROUP_NAME = ""
 LESSON_ID = ""
 
-def log(msg):
-    print(f"[TEST] {msg}")
-
-# --- Helper Functions ---
-
-def safe_click(page, selector, timeout=15000):
-    log(f"Clicking: {selector}")
-    try:
-        page.click(selector, timeout=timeout)
-        return
-    except Exception as e:
-        log(f"Standard click failed for {selector}: {e}. Retrying with force=True...")
-    try:
-        page.locator(selector).first.click(force=True, timeout=timeout)
-        return
-    except Exception as e:
-        log(f"Force click failed for {selector}: {e}. Retrying with JS evaluation...")
-    try:
-        page.locator(selector).first.evaluate("el => el.click()")
-    except Exception as e:
-        log(f"JS click failed for {selector}: {e}")
-        page.screenshot(path=f"{SCREENSHOT_DIR}/click_fail_{uuid.uuid4().hex[:4]}.png")
-        raise e
-
-def safe_fill(page, selector, value, timeout=5000):
-    log(f"Filling: {selector}")
-    try:
-        page.fill(selector, value, timeout=timeout)
-    except Exception as e:
-        log(f"Standard fill failed for {selector}: {e}. Retrying with force...")
-        try:
-             page.locator(selector).first.fill(value, force=True, timeout=timeout)
-        except Exception as e2:
-             log(f"Force fill failed for {selector}: {e2}. Attempting JS value set...")
-             try:
-                 page.locator(selector).first.evaluate(f"(el, val) => {{ el.value = val; el.dispatchEvent(new Event('input', {{ bubbles: true, composed: true }})); }}", value)
-             except Exception as e3:
-                 log(f"JS fill failed: {e3}")
-                 raise e2
-
-def safe_fill_and_trigger(page, selector, value):
-    """
-    Fills an input and forces DOM events via JS evaluation to ensure LitElement/Frameworks detect the change.
-    """
-    log(f"Typing into: {selector}")
-    try:
-        page.locator(selector).first.click()
-        page.locator(selector).first.fill("")
-        page.locator(selector).first.type(value, delay=100)
-    except Exception as e:
-        log(f"Type failed for {selector}: {e}. Fallback to safe_fill...")
-        safe_fill(page, selector, value)
-
-    log(f"Triggering events for: {selector}")
-    try:
-        page.locator(selector).first.evaluate("""(el, val) => {
-            el.value = val;
-            el.dispatchEvent(new Event('input', { bubbles: true, composed: true }));
-            el.dispatchEvent(new Event('change', { bubbles: true, composed: true }));
-        }""", value)
-    except Exception as e:
-        log(f"safe_fill_and_trigger evaluate failed: {e}")
-
-def login_professor(page):
-    log("Registering/Logging in Professor...")
-    page.goto(f"{BASE_URL}/")
-    time.sleep(2)
-
-    if page.locator("text='Jsem Profesor'").is_visible():
-        safe_click(page, "button:has-text('Jsem Profesor')")
-
-    try:
-        log("Switching to Registration mode...")
-        safe_click(page, "a:has-text('Registrujte se')")
-        page.wait_for_selector("#register-name", state="visible", timeout=5000)
-    except Exception as e:
-        log(f"Registration switch failed: {e}")
-
-    log(f"Registering as {PROFESSOR_EMAIL}...")
-    safe_fill(page, "#register-name", PROFESSOR_NAME)
-    safe_fill(page, "#register-email", PROFESSOR_EMAIL)
-    safe_fill(page, "#register-password", PROFESSOR_PASSWORD)
-
-    log("Submitting registration...")
-    page.keyboard.press("Enter")
-
-    log("Waiting for global spinner to disappear...")
-    try:
-        page.wait_for_selector("#global-spinner", state="hidden", timeout=20000)
-    except Exception as e:
-        log(f"Spinner wait warning: {e}")
-
-    log("Waiting for Dashboard...")
-    try:
-        expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=30000)
-    except:
-        log("Dashboard not visible immediately. Trying force navigation fallback...")
-        if page.locator("#register-name").is_visible():
-            safe_click(page, "button:has-text('Registrovat se')")
-            page.wait_for_timeout(2000)
-        page.reload()
-        expect(page.locator("professor-dashboard-view")).to_be_visible(timeout=40000)
-
-    log("Professor registered/logged in.")
-
-def create_group(page):
-    global GROUP_CODE, GROUP_NAME
-    log("Creating Group...")
-
-    try:
-        safe_click(page, "professor-navigation button:has-text('Třídy')")
-    except:
-        safe_click(page, "professor-navigation button:has-text('Classes')")
-
-    expect(page.locator("professor-classes-view")).to_be_visible()
-
-    safe_click(page, "button:has-text('Vytvořit novou třídu')")
-
-    group_name = f"QA Group {uuid.uuid4().hex[:4]}"
-    GROUP_NAME = group_name
-    modal_input_selector = "div.fixed.inset-0 input[type='text']"
-
-    page.wait_for_selector(modal_input_selector, state="visible", timeout=5000)
-    safe_fill(page, modal_input_selector, group_name)
-
-    safe_click(page, "div.fixed.inset-0 button:has-text('Uložit')")
-
-    time.sleep(2)
-
-    card_selector = f".bg-white:has-text('{group_name}')"
-    try:
-        expect(page.locator(card_selector)).to_be_visible(timeout=10000)
-    except:
-        log("Card not found immediately. Reloading...")
-        page.reload()
-        safe_click(page, "professor-navigation button:has-text('Třídy')")
-        expect(page.locator(card_selector)).to_be_visible()
-
-    card = page.locator(card_selector).first
-    try:
-        code_el = card.locator("code")
-        if code_el.count() > 0:
-            GROUP_CODE = code_el.inner_text().strip()
-            log(f"Group created: {group_name}, Code: {GROUP_CODE}")
-        else:
-            text = card.inner_text()
-            match = re.search(r"Kód:\s*([A-Z0-9]+)", text)
-            if match:
-                GROUP_CODE = match.group(1)
-                log(f"Group created: {group_name}, Code: {GROUP_CODE} (via Regex)")
-            else:
-                raise Exception("Could not extract group code")
-    except Exception as e:
-        log(f"Failed to get group code: {e}")
-        page.screenshot(path=f"{SCREENSHOT_DIR}/group_code_fail.png")
-        raise e
-
+@span("text_lesson_logic")
 def verify_text_lesson_logic(page):
     global LESSON_ID
     log("Creating Text Lesson...")
     safe_click(page, "professor-navigation button:has-text('Nástěnka')")
-    time.sleep(1)
+    wait_for_lit_update(page, "professor-dashboard-view")
 
     safe_click(page, "text='Vytvořit manuálně'")
 
@@ -215,7 +74,12 @@ def verify_text_lesson_logic(page):
     else:
          initial_url = page.url
          save_btn.click()
-         time.sleep(2)
+         # Absence check: give a toast or a navigation a bounded window to happen.
+         try:
+             page.wait_for_function("prev => location.href !== prev || document.querySelector('.toastify')",
+                                    arg=initial_url, timeout=TIMEOUTS["negative_window"] * 2)
+         except Exception:
+             pass
 
          toast = page.locator(".Toastify__toast--error").or_(page.locator("text='Vyplňte prosím obsah'")).or_(page.locator("text='Chyba'")).first
          if toast.is_visible():
@@ -243,7 +107,7 @@ def verify_text_lesson_logic(page):
             # <div class="text-right mt-4"><button ... class="...btnPrimary">💾 ...</button></div>
             # We look for the primary button in the text-right container
             safe_click(page, "ai-generator-panel div.text-right button.bg-indigo-600")
-            time.sleep(2)
+            wait_for_editor_idle(page)
         except Exception as e:
             log(f"Could not find AI accept button: {e}")
             page.screenshot(path=f"{SCREENSHOT_DIR}/ai_button_fail.png")
@@ -252,8 +116,8 @@ def verify_text_lesson_logic(page):
         log("AI Generator not visible, assuming content needs manual entry or is already there?")
 
     log("Clicking Save...")
-    safe_click(page, "professor-header-editor button:has-text('Uložit změny')")
-    time.sleep(2)
+    with expect_lesson_saved(page):
+        safe_click(page, "professor-header-editor button:has-text('Uložit změny')")
 
     # CRITICAL: Assert URL still contains #editor
     current_url = page.url
@@ -269,24 +133,12 @@ def verify_text_lesson_logic(page):
         LESSON_ID = match.group(1)
         log(f"Extracted Lesson ID: {LESSON_ID}")
     else:
-        log("URL does not contain ID, attempting DOM extraction with retries...")
-        for attempt in range(5):
-            try:
-                LESSON_ID = page.evaluate("document.querySelector('lesson-editor')?.currentLessonId")
-                if LESSON_ID:
-                    log(f"Extracted Lesson ID from DOM (lesson-editor): {LESSON_ID}")
-                    break
-            except:
-                pass
-
-            try:
-                 LESSON_ID = page.evaluate("document.querySelector('professor-header-editor')?.lesson?.id")
-                 if LESSON_ID:
-                     log(f"Extracted Lesson ID from DOM (header): {LESSON_ID}")
-                     break
-            except:
-                 pass
-            time.sleep(1)
+        log("URL does not contain ID, reading it from the editor state...")
+        try:
+            LESSON_ID = wait_for_lesson_id(page)
+            log(f"Extracted Lesson ID from DOM: {LESSON_ID}")
+        except Exception as e:
+            log(f"DOM extraction failed: {e}")
 
     if not LESSON_ID:
         page.screenshot(path=f"{SCREENSHOT_DIR}/id_extraction_fail.png")
@@ -313,33 +165,18 @@ def verify_text_lesson_logic(page):
              if not checkbox.is_checked():
                  checkbox.check()
                  log(f"Assigned lesson to group: {GROUP_NAME}")
-                 time.sleep(2)
+                 wait_for_editor_idle(page)
         else:
              log(f"Group assignment checkbox for '{GROUP_NAME}' not found!")
              page.screenshot(path=f"{SCREENSHOT_DIR}/assignment_fail.png")
     except Exception as e:
         log(f"Assignment failed: {e}")
 
-def verify_student_view(p, headless=True):
+@span("student_phase")
+def verify_student_view(pool):
     log("Step 3: Verifying Student View...")
-    browser = p.chromium.launch(headless=headless, args=['--no-sandbox'])
-    page = browser.new_page()
-    page.on("console", lambda msg: log(f"[BROWSER] {msg.text}"))
-
-    page.goto(f"{BASE_URL}/")
-    time.sleep(1)
-    if page.locator("text='Jsem Student'").is_visible():
-        safe_click(page, "text='Jsem Student'")
-
-    if page.locator("text='Registrujte se'").is_visible():
-        safe_click(page, "text='Registrujte se'")
-
-    safe_fill(page, "#register-email", STUDENT_EMAIL)
-    safe_fill(page, "#register-password", STUDENT_PASSWORD)
-    safe_fill(page, "#register-name", STUDENT_NAME)
-    page.keyboard.press("Enter")
-
-    expect(page.locator("student-dashboard")).to_be_visible(timeout=20000)
+    context, page = open_persona(pool.browser, "student", STUDENT_EMAIL, STUDENT_PASSWORD, STUDENT_NAME, pool=pool)
+    LOGS.attach(page, "student")
 
     log(f"Joining Class {GROUP_CODE}...")
     try:
@@ -349,21 +186,21 @@ def verify_student_view(p, headless=True):
         safe_click(page, "button:has-text('Připojit se k třídě')")
 
     # Use robust input for Code
-    safe_fill_and_trigger(page, "input[placeholder='CODE']", GROUP_CODE)
+    # Typed key by key, as this script did before the helpers moved into harness.ui
+    safe_fill_and_trigger(page, "input[placeholder='CODE']", GROUP_CODE, type_delay=100)
 
     # Corrected button text based on screenshot
     safe_click(page, "button:has-text('Připojit se')")
 
     log("Waiting for join to complete...")
-    # Wait for modal to disappear or success message
+    # The modal closes on success and shows an inline error otherwise
     try:
-        # Assuming the modal closes on success
-        expect(page.locator("div.fixed.inset-0")).to_be_hidden(timeout=10000)
-    except:
+        joined, error = wait_for_join_result(page, timeout=10000)
+        if not joined:
+            log(f"Join failed, possibly already joined: {error}")
+    except Exception:
         log("Join modal did not close, possibly already joined or failed.")
 
-    time.sleep(3)
-
     lesson_url = f"{BASE_URL}/#student/class/{GROUP_CODE}/lesson/{LESSON_ID}"
     log(f"Navigating to {lesson_url}")
     page.goto(lesson_url)
@@ -384,37 +221,60 @@ def verify_student_view(p, headless=True):
         page.screenshot(path=f"{SCREENSHOT_DIR}/student_fail.png")
         raise e
 
-    browser.close()
+    pool.release(context)
 
 def run():
+    global GROUP_CODE, GROUP_NAME, PROFESSOR_EMAIL, PROFESSOR_PASSWORD, STUDENT_EMAIL, STUDENT_PASSWORD
+    # Opt-in: reset the emulators to a named baseline (see harness/fixtures.py) and run the
+    # scenario as its seeded professor and student instead of the fresh personas above.
+    personas = baseline_from_env()
+    if "professor" in personas:
+        PROFESSOR_EMAIL, PROFESSOR_PASSWORD = personas["professor"]
+    if "student" in personas:
+        STUDENT_EMAIL, STUDENT_PASSWORD = personas["student"]
+
     with sync_playwright() as p:
         is_ci = os.environ.get('CI') == 'true'
         # Force headless mode if not in CI but running in a non-graphical environment
         headless = is_ci or (os.environ.get('DISPLAY') is None)
-        browser = p.chromium.launch(headless=headless, args=['--no-sandbox'])
-        context = browser.new_context()
-        page = context.new_page()
-        page.set_default_timeout(45000)
-
-        try:
-            login_professor(page)
-            create_group(page)
-            verify_text_lesson_logic(page)
+        # Both phases share one Chromium; each persona gets its own context from the pool.
+        with shared_browser(p, headless=headless) as (browser, _):
+            # Fonts, analytics, YouTube and generated images are stubbed (HARNESS_FAST_MODE=0 for full fidelity).
+            pool = ContextPool(browser, setup=FAST_MODE.context_setup)
+            page = None
 
-        except Exception as e:
-            log(f"Professor Phase Error: {e}")
-            page.screenshot(path=f"{SCREENSHOT_DIR}/prof_error.png")
-            sys.exit(1)
-        finally:
-            browser.close()
+            try:
+                context, page = open_persona(browser, "professor", PROFESSOR_EMAIL, PROFESSOR_PASSWORD, PROFESSOR_NAME,
+                                             pool=pool)
+                LOGS.attach(page, "professor")
+                page.set_default_timeout(45000)
+                GROUP_NAME, GROUP_CODE = create_group(page)
+                verify_text_lesson_logic(page)
+                pool.release(context)
+
+            except Exception as e:
+                log(f"Professor Phase Error: {e}")
+                LOGS.failed("professor_phase", e)
+                if page:
+                    page.screenshot(path=f"{SCREENSHOT_DIR}/prof_error.png")
+                TRACE.save()
+                sys.exit(1)
 
-        try:
-            # Re-check headless condition for student view
-            headless = is_ci or (os.environ.get('DISPLAY') is None)
-            verify_student_view(p, headless=headless)
-        except Exception as e:
-            log(f"Student Phase Error: {e}")
-            sys.exit(1)
+            try:
+                verify_student_view(pool)
+            except Exception as e:
+                log(f"Student Phase Error: {e}")
+                LOGS.failed("student_phase", e)
+                TRACE.save()
+                sys.exit(1)
+
+            pool.report()
+            pool.close()
+
+    UI_TIMINGS.report("[UI]")
+    IDLE.report()
+    FAST_MODE.report()
+    TRACE.save()
 
 if __name__ == "__main__":
     run()
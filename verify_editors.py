@@ -1,9 +1,11 @@
 from playwright.sync_api import sync_playwright, expect
 import time
 
+from harness.browser_pool import connect_or_launch
+
 def run():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
+        browser = connect_or_launch(p, headless=True, args=())
         page = browser.new_page()
 
         # Navigate to the test harness
@@ -1,5 +1,7 @@
 from playwright.sync_api import sync_playwright
 
+from harness.browser_pool import connect_or_launch
+
 def verify(page):
     logs = []
     page.on("console", lambda msg: logs.append(msg.text))
@@ -66,7 +68,7 @@ def verify(page):
 
 if __name__ == "__main__":
     with sync_playwright() as p:
-        browser = p.chromium.launch()
+        browser = connect_or_launch(p, args=())
         page = browser.new_page()
         try:
             verify(page)
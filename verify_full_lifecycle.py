@@ -1,129 +1,21 @@
 import os
 import sys
-import time
-import json
 from playwright.sync_api import sync_playwright, expect
-import requests
-
-# --- CONFIGURATION ---
-PROJECT_ID = "ai-sensei-czu-pilot"
-EMULATOR_HOST = "localhost"
-API_KEY = "fake-api-key"
-
-AUTH_BASE_URL = f"http://{EMULATOR_HOST}:9099/identitytoolkit.googleapis.com/v1"
-FIRESTORE_BASE_URL = f"http://{EMULATOR_HOST}:8080/v1/projects/{PROJECT_ID}/databases/(default)/documents"
-
-# Helper for Authentication
-def rest_auth_signup(email, password):
-    url = f"{AUTH_BASE_URL}/accounts:signUp?key={API_KEY}"
-    try:
-        r = requests.post(url, json={
-            "email": email,
-            "password": password,
-            "returnSecureToken": True
-        })
-        r.raise_for_status()
-        return r.json()
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 400 and "EMAIL_EXISTS" in e.response.text:
-             return rest_auth_signin(email, password)
-        print(f"Auth Signup Error: {e.response.text}")
-        raise
-
-def rest_auth_signin(email, password):
-    url = f"{AUTH_BASE_URL}/accounts:signInWithPassword?key={API_KEY}"
-    try:
-        r = requests.post(url, json={
-            "email": email,
-            "password": password,
-            "returnSecureToken": True
-        })
-        r.raise_for_status()
-        return r.json()
-    except requests.exceptions.HTTPError as e:
-        print(f"Auth Signin Error: {e.response.text}")
-        raise
-
-def rest_set_claims(localId, claims):
-    url = f"http://{EMULATOR_HOST}:9099/emulator/v1/projects/{PROJECT_ID}/accounts/{localId}"
-    r = requests.post(url, json={
-        "customAttributes": json.dumps(claims)
-    })
-    if r.status_code >= 400:
-        r = requests.patch(url, json={
-            "customAttributes": json.dumps(claims)
-        })
-    return r.json()
-
-# Helper for Firestore
-def to_value(v):
-    if v is None: return {"nullValue": None}
-    if isinstance(v, bool): return {"booleanValue": v}
-    if isinstance(v, int): return {"integerValue": v}
-    if isinstance(v, float): return {"doubleValue": v}
-    if isinstance(v, str): return {"stringValue": v}
-    if isinstance(v, list): return {"arrayValue": {"values": [to_value(x) for x in v]}}
-    if isinstance(v, dict): return {"mapValue": {"fields": {k: to_value(val) for k, val in v.items()}}}
-    return {"stringValue": str(v)}
-
-def from_value(v):
-    if "stringValue" in v: return v["stringValue"]
-    if "booleanValue" in v: return v["booleanValue"]
-    if "integerValue" in v: return int(v["integerValue"])
-    if "doubleValue" in v: return float(v["doubleValue"])
-    if "arrayValue" in v: return [from_value(x) for x in v["arrayValue"].get("values", [])]
-    if "mapValue" in v: return {k: from_value(val) for k, val in v["mapValue"].get("fields", {}).items()}
-    if "nullValue" in v: return None
-    return None
-
-def rest_firestore_create(collection, doc_id, data):
-    fields = {k: to_value(v) for k, v in data.items()}
-    url = f"{FIRESTORE_BASE_URL}/{collection}?documentId={doc_id}"
-    r = requests.post(url, json={"fields": fields})
-    if r.status_code == 409: # Already exists
-        rest_firestore_update(collection, doc_id, data)
-
-def rest_firestore_update(collection, doc_id, data):
-    fields = {k: to_value(v) for k, v in data.items()}
-    mask = []
-    for k in data.keys():
-        mask.append(f"updateMask.fieldPaths={k}")
-    query = "&".join(mask)
-    url = f"{FIRESTORE_BASE_URL}/{collection}/{doc_id}?{query}"
-    requests.patch(url, json={"fields": fields})
-
-def rest_firestore_get(collection, doc_id):
-    url = f"{FIRESTORE_BASE_URL}/{collection}/{doc_id}"
-    r = requests.get(url)
-    if r.status_code == 200:
-        raw = r.json()
-        return {k: from_value(v) for k, v in raw.get("fields", {}).items()}
-    return None
-
-def rest_firestore_query(collection, field, operator, value):
-    url = f"{FIRESTORE_BASE_URL}:runQuery"
-    body = {
-        "structuredQuery": {
-            "from": [{"collectionId": collection}],
-            "where": {
-                "fieldFilter": {
-                    "field": {"fieldPath": field},
-                    "op": operator,
-                    "value": to_value(value)
-                }
-            }
-        }
-    }
-    r = requests.post(url, json=body)
-    results = []
-    if r.status_code == 200:
-        for item in r.json():
-            if "document" in item:
-                doc = item["document"]
-                doc_id = doc["name"].split("/")[-1]
-                fields = {k: from_value(v) for k, v in doc.get("fields", {}).items()}
-                results.append({"id": doc_id, **fields})
-    return results
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from harness.auth import get_session
+from harness.conditions import IDLE, wait_for_editor_idle, wait_for_lit_update
+from harness.pagelog import LOGS
+from harness.emulator import (
+    rest_set_claims,
+    rest_firestore_create,
+    rest_firestore_update,
+    rest_firestore_get,
+)
+from harness.bulk import rest_firestore_bulk_write, merge_mask
+from harness.query import Query
+from harness.transforms import rest_join_group
+from harness.waiters import LATENCIES, WaitTimeout, measured, wait_for_document
 
 # --- TEST DATA ---
 PROFESSOR_EMAIL = "anet@professor.com"
@@ -138,32 +30,25 @@ def setup_data_rest():
     print("🛠️ Setting up test data (via REST)...")
 
     # 1. Professor
-    res = rest_auth_signup(PROFESSOR_EMAIL, PROFESSOR_PASSWORD)
-    prof_uid = res["localId"]
+    prof_uid = get_session(PROFESSOR_EMAIL, PROFESSOR_PASSWORD).uid
     rest_set_claims(prof_uid, {"role": "professor"})
-
-    rest_firestore_create("users", prof_uid, {
-        "email": PROFESSOR_EMAIL,
-        "role": "professor"
-    })
     print(f"   Professor Ready: {prof_uid}")
 
     # 2. Student
-    res = rest_auth_signup(STUDENT_EMAIL, STUDENT_PASSWORD)
-    stud_uid = res["localId"]
+    stud_uid = get_session(STUDENT_EMAIL, STUDENT_PASSWORD).uid
     rest_set_claims(stud_uid, {"role": "student"})
-
-    rest_firestore_create("students", stud_uid, {
-        "email": STUDENT_EMAIL,
-        "name": "Janko Student",
-        "memberOfGroups": []
-    })
-    rest_firestore_create("users", stud_uid, {
-        "email": STUDENT_EMAIL,
-        "role": "student"
-    })
     print(f"   Student Ready: {stud_uid}")
 
+    # 3. Profile documents in one round trip (merge, so re-runs keep existing fields)
+    docs = [
+        ("users", prof_uid, {"email": PROFESSOR_EMAIL, "role": "professor"}),
+        ("students", stud_uid, {"email": STUDENT_EMAIL, "name": "Janko Student", "memberOfGroups": []}),
+        ("users", stud_uid, {"email": STUDENT_EMAIL, "role": "student"}),
+    ]
+    result = rest_firestore_bulk_write((c, d, data, merge_mask(data)) for c, d, data in docs)
+    if not result.ok:
+        raise Exception(f"Profile seeding failed: {result.failures}")
+
     return prof_uid, stud_uid
 
 
@@ -180,8 +65,7 @@ def run_simulation():
         page = context.new_page()
 
         # --- DIAGNOSTICS ---
-        page.on("console", lambda msg: print(f"BROWSER LOG: {msg.text}"))
-        page.on("pageerror", lambda err: print(f"BROWSER ERROR: {err}"))
+        LOGS.attach(page, "browser")
 
         print("\n🚀 Starting End-to-End Simulation")
 
@@ -199,8 +83,8 @@ def run_simulation():
         # We look for the professor role button text from locales/cs.json ("Jsem Profesor")
         # OR the specific button structure.
 
-        # Wait a moment for translations to settle if needed (logs show it happens fast)
-        time.sleep(1)
+        # Let the login view finish rendering (translations load before the first render settles)
+        wait_for_lit_update(page, "login-view")
 
         try:
             # If the role selection button is visible, click it.
@@ -241,8 +125,8 @@ def run_simulation():
                   print(f"   Login Error: {err}")
              sys.exit(1)
 
-        # Add a sleep to ensure data fetch initiates
-        time.sleep(3)
+        # The dashboard renders once its lesson fetch has resolved (or failed)
+        wait_for_lit_update(page, "professor-dashboard-view")
 
         if page.is_visible("text=Chyba oprávnení"):
             print("   ❌ FAIL: Permission denied on fetch.")
@@ -268,7 +152,7 @@ def run_simulation():
         else:
             print("   (Class already exists)")
 
-        groups = rest_firestore_query("groups", "name", "EQUAL", GROUP_NAME)
+        groups = Query("groups").where("name", "==", GROUP_NAME).select().limit(1).get()
         if not groups:
              print("   ❌ FAIL: Group not found in DB.")
              sys.exit(1)
@@ -294,7 +178,10 @@ def run_simulation():
              page.click("text=Vytvořit manuálně")
 
         page.wait_for_selector("lesson-editor")
-        time.sleep(2)
+        try:
+            page.wait_for_function("() => location.href.includes('editor/')", timeout=10000)
+        except PlaywrightTimeoutError:
+            pass
 
         if "editor/" in page.url:
             lesson_id = page.url.split("editor/")[1]
@@ -307,7 +194,7 @@ def run_simulation():
         page.wait_for_selector("#lesson-title", state="visible")
         page.fill("#lesson-title", LESSON_TITLE + " Updated")
         page.keyboard.press("Tab")
-        time.sleep(2)
+        wait_for_editor_idle(page)
 
         current_url = page.url
         if lesson_id not in current_url:
@@ -327,7 +214,7 @@ def run_simulation():
             "status": "ready"
         })
 
-        lesson_data = rest_firestore_get("lessons", lesson_id)
+        lesson_data = rest_firestore_get("lessons", lesson_id, fields=["files"])
         files = lesson_data.get("files", [])
         if files is None: files = []
         files.append({"id": file_id, "path": file_path, "name": "biology_podcast.mp3", "type": "audio"})
@@ -340,7 +227,7 @@ def run_simulation():
         except:
              print("   ⚠️ Timeout reloading editor.")
 
-        time.sleep(2)
+        wait_for_lit_update(page, "lesson-editor")
         if page.is_visible("text=biology_podcast.mp3"):
              print("   ✅ Audio file listed in editor.")
         else:
@@ -361,7 +248,6 @@ def run_simulation():
         # "Přiřadit lekci"
         page.click("button:has-text('Přiřadit lekci')")
 
-        time.sleep(1)
         try:
             page.click(f"button:has-text('{LESSON_TITLE}')")
         except:
@@ -369,7 +255,7 @@ def run_simulation():
 
         page.wait_for_selector(f"h3:has-text('{LESSON_TITLE}')")
 
-        lesson_data = rest_firestore_get("lessons", lesson_id)
+        lesson_data = rest_firestore_get("lessons", lesson_id, fields=["status"])
         status = lesson_data.get("status", "Naplánováno")
         print(f"   Initial Status: {status}")
 
@@ -378,14 +264,12 @@ def run_simulation():
         except:
             print("   ⚠️ Could not click publish checkbox.")
 
-        time.sleep(2)
-
-        lesson_data = rest_firestore_get("lessons", lesson_id)
-        new_status = lesson_data.get("status")
-        if new_status == "Aktivní":
-             print("   ✅ Lesson published (Status: Aktivní).")
-        else:
-             print(f"   ❌ FAIL: Status did not change to Aktivní. Got: {new_status}")
+        try:
+            wait_for_document("lessons", lesson_id, predicate=lambda d: d.get("status") == "Aktivní",
+                              fields=["status"], timeout=10, metric="publish_click_to_write")
+            print("   ✅ Lesson published (Status: Aktivní).")
+        except WaitTimeout as e:
+             print(f"   ❌ FAIL: Status did not change to Aktivní. {e}")
              rest_firestore_update("lessons", lesson_id, {"status": "Aktivní"})
 
         try:
@@ -399,19 +283,8 @@ def run_simulation():
 
         print("\n--- Phase 2: Student 'Janko' Workflow ---")
 
-        group_data = rest_firestore_get("groups", group_id)
-        s_ids = group_data.get("studentIds", [])
-        if s_ids is None: s_ids = []
-        if stud_uid not in s_ids:
-            s_ids.append(stud_uid)
-            rest_firestore_update("groups", group_id, {"studentIds": s_ids})
-
-        stud_data = rest_firestore_get("students", stud_uid)
-        m_groups = stud_data.get("memberOfGroups", [])
-        if m_groups is None: m_groups = []
-        if group_id not in m_groups:
-            m_groups.append(group_id)
-            rest_firestore_update("students", stud_uid, {"memberOfGroups": m_groups})
+        # Atomic arrayUnion on both sides instead of two read-modify-write cycles
+        rest_join_group(group_id, stud_uid)
 
         print(f"   Student added to Group '{GROUP_NAME}'.")
 
@@ -425,7 +298,7 @@ def run_simulation():
                  page.click("text=Jsem Student")
 
             page.wait_for_selector("#login-email", state="visible", timeout=10000)
-            time.sleep(1)
+            wait_for_lit_update(page, "login-view")
 
             page.fill("#login-email", STUDENT_EMAIL)
             page.fill("#login-password", STUDENT_PASSWORD)
@@ -449,18 +322,20 @@ def run_simulation():
              sys.exit(1)
 
         print("   Testing 'Planned' status visibility (Real-time update)...")
-        rest_firestore_update("lessons", lesson_id, {"status": "Naplánováno"})
-        time.sleep(3)
-
-        if page.is_visible(f"text={LESSON_TITLE}"):
+        lesson_card = page.locator(f"text={LESSON_TITLE}").first
+        try:
+            with measured("write_to_hidden"):
+                rest_firestore_update("lessons", lesson_id, {"status": "Naplánováno"})
+                lesson_card.wait_for(state="hidden", timeout=10000)
+            print("   ✅ Lesson correctly hidden when 'Naplánováno'.")
+        except PlaywrightTimeoutError:
              print("   ❌ FAIL: Lesson visible despite being 'Naplánováno'.")
-        else:
-             print("   ✅ Lesson correctly hidden when 'Naplánováno'.")
 
-        rest_firestore_update("lessons", lesson_id, {"status": "Aktivní"})
-        time.sleep(3)
-
-        if not page.is_visible(f"text={LESSON_TITLE}"):
+        try:
+            with measured("write_to_visible"):
+                rest_firestore_update("lessons", lesson_id, {"status": "Aktivní"})
+                lesson_card.wait_for(state="visible", timeout=10000)
+        except PlaywrightTimeoutError:
              print("   ⚠️ Lesson did not reappear quickly. Refreshing...")
              page.reload()
              page.wait_for_selector("student-dashboard-view")
@@ -487,7 +362,11 @@ def run_simulation():
                  print("   ✅ Audio file listed as text link.")
 
         print("\n✅ SIMULATION COMPLETED SUCCESSFULLY")
+        LATENCIES.report()
+        IDLE.report()
         browser.close()
 
 if __name__ == "__main__":
-    run_simulation()
+    # Every failure path ends in sys.exit(1); the step flushes the buffered browser logs then.
+    with LOGS.step("simulation"):
+        run_simulation()
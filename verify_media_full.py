@@ -2,17 +2,19 @@ import time
 import re
 from playwright.sync_api import sync_playwright, expect
 
+from harness.browser_pool import connect_or_launch
+from harness.pagelog import LOGS
+
 def run():
     print("[TEST] Starting Full Media Verification (Audio & Comic)...")
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-setuid-sandbox'])
+        browser = connect_or_launch(p, headless=True, args=['--no-sandbox', '--disable-setuid-sandbox'])
         context = browser.new_context(viewport={'width': 1280, 'height': 800})
         page = context.new_page()
 
-        # Capture console logs
-        page.on("console", lambda msg: print(f"[BROWSER] {msg.text}"))
-        page.on("pageerror", lambda err: print(f"[BROWSER ERROR] {err}"))
+        # Console logs are buffered and written to .harness/logs/ if the test fails
+        LOGS.attach(page, "browser")
 
         try:
             # 1. Access the app
@@ -163,6 +165,7 @@ def run():
             print(f"[TEST] FAILED: {e}")
             page.screenshot(path="media_test_failure.png")
             print("[TEST] Screenshot saved to media_test_failure.png")
+            LOGS.failed("media_verification", e)
             raise e
         finally:
             browser.close()
@@ -0,0 +1,143 @@
+from playwright.sync_api import sync_playwright
+import argparse
+import json
+import os
+import sys
+import uuid
+
+from harness.browser_pool import ContextPool, shared_browser
+from harness.bulk import rest_firestore_bulk_write
+from harness.login import login_state, provision_account
+from harness.network import BudgetExceeded, NetworkRecorder, save_traffic
+from harness.trace import TRACE
+from harness.ui import configure, log, safe_click
+
+# Records the traffic of the budgeted views with a cold HTTP cache and fails
+# when a view exceeds its budget (harness/network.py, HARNESS_NETWORK_BUDGETS).
+#   python verify_network_budgets.py              # enforce
+#   python verify_network_budgets.py --calibrate  # print measured numbers + 20% as a budgets file
+
+SCREENSHOT_DIR = "screenshots_lite"
+os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+configure(screenshot_dir=SCREENSHOT_DIR)
+
+RUN_ID = uuid.uuid4().hex[:8]
+PROFESSOR_EMAIL = f"profesor_net_{RUN_ID}@profesor.cz"
+STUDENT_EMAIL = f"student_net_{RUN_ID}@example.com"
+PASSWORD = "password123"
+
+BASE_URL = "http://localhost:5000"
+LIBRARY_LESSONS = 10
+
+
+def seed():
+    """A professor with a group, LIBRARY_LESSONS published lessons assigned to it, and one enrolled student."""
+    prof = provision_account(PROFESSOR_EMAIL, PASSWORD, "professor", "Net Professor")
+    student = provision_account(STUDENT_EMAIL, PASSWORD, "student", "Net Student")
+    group_id = f"net_group_{RUN_ID}"
+    lesson_ids = [f"net_lesson_{RUN_ID}_{i}" for i in range(LIBRARY_LESSONS)]
+
+    ops = [
+        ("groups", group_id, {"name": f"Net Group {RUN_ID}", "ownerId": prof.uid, "joinCode": RUN_ID[:6].upper(),
+                              "studentIds": [student.uid]}, None),
+        ("users", student.uid, {"memberOfGroups": [group_id]}, ["memberOfGroups"]),
+        ("students", student.uid, {"memberOfGroups": [group_id]}, ["memberOfGroups"]),
+    ]
+    for i, lesson_id in enumerate(lesson_ids):
+        ops.append(("lessons", lesson_id, {
+            "title": f"Network budget lesson {i}",
+            "topic": "Budgets",
+            "ownerId": prof.uid,
+            "assignedToGroups": [group_id],
+            "isPublished": True,
+            "status": "Aktivní",
+            "text_content": "Lorem ipsum dolor sit amet. " * 40,
+        }, None))
+    result = rest_firestore_bulk_write(ops)
+    if not result.ok:
+        raise Exception(f"Seeding failed: {result.failures}")
+    return lesson_ids[0]
+
+
+def open_page(pool, role, email, name):
+    """Signed-in page whose first navigation has not happened yet, so its recorder sees the cold load."""
+    state = login_state(pool.browser, role, email, PASSWORD, name)
+    context = pool.acquire(f"{role}:{email}", storage_state=state)
+    page = context.new_page()
+    return context, page, NetworkRecorder(page)
+
+
+def measure_professor(pool):
+    context, page, recorder = open_page(pool, "professor", PROFESSOR_EMAIL, "Net Professor")
+    with recorder.view("professor-dashboard-view"):
+        page.goto(f"{BASE_URL}/")
+        page.wait_for_selector("professor-dashboard-view", state="visible")
+
+    with recorder.view("professor-library-view"):
+        safe_click(page, "professor-navigation button[data-view='library']")
+        page.wait_for_selector("professor-library-view", state="visible")
+    pool.release(context)
+    return recorder
+
+
+def measure_student(pool, lesson_id):
+    context, page, recorder = open_page(pool, "student", STUDENT_EMAIL, "Net Student")
+    with recorder.view("student-lesson-detail"):
+        page.goto(f"{BASE_URL}/?view=lesson&id={lesson_id}")
+        page.wait_for_selector("student-lesson-detail", state="visible")
+    pool.release(context)
+    return recorder
+
+
+def calibrated(recorders, headroom=1.2):
+    out = {}
+    for recorder in recorders:
+        for traffic in recorder.views:
+            s = traffic.summary()
+            out[traffic.view] = {f: int(s[f] * headroom) + 1 for f in ("requests", "bytes", "reads", "callables")}
+    return out
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Enforce per-view network budgets.")
+    parser.add_argument("--calibrate", action="store_true", help="print measured budgets instead of enforcing")
+    parser.add_argument("--save", help="write the captured requests as JSON")
+    args = parser.parse_args()
+
+    lesson_id = seed()
+    recorders = []
+    failed = False
+    with sync_playwright() as p:
+        is_ci = os.environ.get('CI') == 'true'
+        with shared_browser(p, headless=is_ci) as (browser, _):
+            # max_uses=1: every persona starts from a new context, i.e. a cold HTTP cache.
+            pool = ContextPool(browser, max_uses=1)
+            try:
+                recorders.append(measure_professor(pool))
+                recorders.append(measure_student(pool, lesson_id))
+            except Exception as e:
+                log(f"Network budget run failed: {e}")
+                failed = True
+            pool.close()
+
+    for recorder in recorders:
+        recorder.report()
+    if args.save:
+        save_traffic(recorders, args.save)
+
+    if args.calibrate:
+        print(json.dumps(calibrated(recorders), indent=2))
+    else:
+        for recorder in recorders:
+            try:
+                recorder.enforce()
+            except BudgetExceeded:
+                failed = True
+
+    TRACE.save()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()